@@ -0,0 +1,55 @@
+import math
+import numpy as np
+from waveforms import waveform_signal
+
+class BeamSampler:
+    """
+    Genera todas las muestras del haz entre el cuadro anterior y el actual.
+
+    Las muestras se toman en instantes k / sample_rate (k entero), por lo que la figura
+    no depende de los FPS: un cuadro lento solo produce un bloque de muestras más grande.
+    """
+
+    def __init__(self, sample_rate=20000.0, amplitude=800.0, max_block_time=0.25):
+        self.sample_rate = float(sample_rate)
+        self.amplitude = amplitude  # Voltaje máximo de las placas
+        self.max_block_time = max_block_time  # Máximo de tiempo simulado por bloque (s)
+        self.next_index = 0
+        self.skipped_samples = 0
+
+    def reset(self, start_time=0.0):
+        """Reinicia el reloj de muestreo en start_time."""
+        self.next_index = math.ceil(start_time * self.sample_rate)
+
+    def set_sample_rate(self, sample_rate):
+        """Cambia la frecuencia de muestreo sin repetir ni saltar instantes ya emitidos."""
+        last_time = self.next_index / self.sample_rate
+        self.sample_rate = float(sample_rate)
+        self.reset(last_time)
+
+    def sample_times(self, end_time):
+        """Instantes de muestreo pendientes hasta end_time (inclusive)."""
+        last_index = math.floor(end_time * self.sample_rate)
+        if last_index < self.next_index:
+            return np.empty(0)
+
+        # Tras una pausa larga (ventana arrastrada, etc.) no intentar recuperar todo
+        max_samples = max(1, int(self.max_block_time * self.sample_rate))
+        first_index = self.next_index
+        if last_index - first_index + 1 > max_samples:
+            self.skipped_samples += last_index - first_index + 1 - max_samples
+            first_index = last_index - max_samples + 1
+
+        self.next_index = last_index + 1
+        return np.arange(first_index, last_index + 1) / self.sample_rate
+
+    def sample(self, end_time, freq_v, freq_h, phase_v=0, phase_h=0, wave_v=0, wave_h=0):
+        """
+        Devuelve (tiempos, V_vert, V_horiz) para todas las muestras pendientes.
+        wave_v y wave_h son las formas de onda de cada par de placas: índices en WAVE_SHAPES,
+        como los guarda el registro (también se acepta lo que acepte waveforms.wavetable).
+        """
+        times = self.sample_times(end_time)
+        v_vert = waveform_signal(times, freq_v, self.amplitude, phase_v, wave_v)
+        v_horiz = waveform_signal(times, freq_h, self.amplitude, phase_h, wave_h)
+        return times, v_vert, v_horiz
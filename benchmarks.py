@@ -0,0 +1,208 @@
+# Microbenchmarks de calculos y de las rutas críticas del visualizador.
+# Cada caso mide el tiempo por llamada (mejor de varias repeticiones). Los resultados
+# se pueden guardar como línea base y comparar contra una ejecución posterior.
+#
+#   python benchmarks.py                                   # ejecutar todo
+#   python benchmarks.py --filter draw_screen_view
+#   python benchmarks.py --compare                         # contra benchmarks_baseline.json
+#   python benchmarks.py --compare otra_base.json --threshold 1.2 --fail-on-regression
+#
+# benchmarks_baseline.json es la línea base del repositorio; guarda el entorno en que se
+# midió ("environment"), así que compararla en otra máquina solo indica tendencias.
+# Para regenerarla (p. ej. tras una optimización intencional), en una máquina sin carga:
+#
+#   python benchmarks.py --save-baseline benchmarks_baseline.json
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+import numpy as np
+import pygame
+import scipy
+
+import calculos
+from field_solver import fringe_field
+from waveforms import waveform_signal
+from point_buffer import PointRingBuffer
+from visualization import CRTVisualizer
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+SCREEN_POINT_COUNTS = (100, 1000, 10000)
+BATCH_SIZE = 10000
+WAVE_SAMPLES = 100000
+
+def _physics_benchmarks():
+    speed = calculos.ini_speed(1000)
+    times = np.linspace(0.0, calculos.region_time(speed)["reach_screen"], BATCH_SIZE)
+    voltages = np.linspace(-1000, 1000, BATCH_SIZE)
+    rng = np.random.default_rng(0)
+
+    cases = {
+        "ini_speed": lambda: calculos.ini_speed(1000),
+        "region_time": lambda: calculos.region_time(speed),
+        "get_position_by_time": lambda: calculos.get_position_by_time(1000, 300, -200, 1e-8),
+        "lissajous_position_by_time": lambda: calculos.lissajous_position_by_time(
+            1000, 2.0, 3.0, 0.1, 800, fase_h=np.pi / 2),
+        "get_final_screen_position": lambda: calculos.get_final_screen_position(1000, 300, -200),
+        f"get_position_by_time_batch[{BATCH_SIZE}]": lambda: calculos.get_position_by_time_batch(
+            1000, 300, -200, times),
+        f"get_final_screen_position_batch[{BATCH_SIZE}]": lambda: calculos.get_final_screen_position_batch(
+            1000, voltages, voltages[::-1]),
+        "monte_carlo_beam[167x600]": lambda: calculos.monte_carlo_beam(
+            1000, voltages[:167], voltages[-167:], electrons=600, rng=rng),
+        "get_final_screen_position_integrated[167]": lambda: calculos.get_final_screen_position_integrated(
+            1000, voltages[:167], voltages[-167:]),
+        "get_final_screen_position_integrated[167,bordes]": lambda: calculos.get_final_screen_position_integrated(
+            1000, voltages[:167], voltages[-167:], fringe_field()),
+    }
+    wave_times = np.arange(WAVE_SAMPLES) / 10000.0
+    cases[f"sinusoidal_signal[{WAVE_SAMPLES}]"] = lambda: calculos.sinusoidal_signal(wave_times, 3.0, 800, 0.5)
+    for shape in ("sine", "square", "noise"):
+        cases[f"waveform_signal[{shape},{WAVE_SAMPLES}]"] = (
+            lambda shape=shape: waveform_signal(wave_times, 3.0, 800, 0.5, shape))
+    return cases
+
+def _visualizer_benchmarks():
+    pygame.init()
+    surface = pygame.display.set_mode((1400, 900))
+    visualizer = CRTVisualizer()
+    visualizer.screen_view = pygame.Rect(650, 420, 250, 250)
+
+    cases = {
+        "calculate_electron_position[manual]": lambda: visualizer.calculate_electron_position(
+            1000, 300, -200),
+        "calculate_electron_position[lissajous]": lambda: visualizer.calculate_electron_position(
+            1000, 300, -200, 0.1),
+    }
+
+    rng = np.random.default_rng(0)
+    for count in SCREEN_POINT_COUNTS:
+        x_pos, y_pos = rng.random(count), rng.random(count)
+        cases[f"draw_screen_view[manual,{count}]"] = _draw_manual_case(visualizer, surface, x_pos, y_pos)
+        cases[f"draw_screen_view[lissajous,{count}]"] = _draw_lissajous_case(visualizer, surface, x_pos, y_pos)
+    return cases
+
+def _draw_manual_case(visualizer, surface, x_pos, y_pos):
+    """Un cuadro manual con `count` puntos vivos ya depositados (persistencia larga)."""
+    def run():
+        visualizer.set_mode("Manual")
+        visualizer.draw_screen_view(surface, persistence_time=1e6)
+
+    def setup():
+        visualizer.set_mode("Manual")
+        visualizer.screen_persistence = PointRingBuffer(len(x_pos))
+        visualizer.add_screen_points(x_pos, y_pos, mode="manual")
+    return setup, run
+
+def _draw_lissajous_case(visualizer, surface, x_pos, y_pos):
+    """Un cuadro Lissajous: depositar `count` muestras nuevas y dibujar la pantalla."""
+    def run():
+        visualizer.add_screen_points(x_pos, y_pos, brightness=0.9, mode="lissajous")
+        visualizer.draw_screen_view(surface)
+
+    def setup():
+        visualizer.set_mode("Lissajous")
+        visualizer.clear_lissajous_points()
+    return setup, run
+
+def collect_benchmarks():
+    """Nombre -> función sin argumentos, o (setup, función) si necesita preparación."""
+    cases = _physics_benchmarks()
+    cases.update(_visualizer_benchmarks())
+    return cases
+
+def time_call(func, min_time=0.2, repeat=5):
+    """Mejor tiempo por llamada (s) de `repeat` mediciones de al menos min_time cada una."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number, number
+
+def run_benchmarks(name_filter=None, min_time=0.2, repeat=5):
+    results = {}
+    for name, case in collect_benchmarks().items():
+        if name_filter and name_filter not in name:
+            continue
+        if isinstance(case, tuple):
+            setup, case = case
+            setup()
+        per_call, number = time_call(case, min_time, repeat)
+        results[name] = {"per_call_us": per_call * 1e6, "number": number}
+    return results
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def print_results(results):
+    print(f"{'benchmark':<46}{'µs/llamada':>14}{'llamadas':>10}")
+    for name, result in results.items():
+        print(f"{name:<46}{result['per_call_us']:>14.2f}{result['number']:>10}")
+
+def compare(results, baseline, threshold=1.2):
+    """Imprime la comparación con la línea base; devuelve los nombres que empeoraron."""
+    regressions = []
+    print(f"{'benchmark':<46}{'base µs':>12}{'actual µs':>12}{'razón':>9}")
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<46}{'-':>12}{result['per_call_us']:>12.2f}{'nuevo':>9}")
+            continue
+        ratio = result["per_call_us"] / base["per_call_us"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  más lento"
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            flag = "  más rápido"
+        print(f"{name:<46}{base['per_call_us']:>12.2f}{result['per_call_us']:>12.2f}{ratio:>9.2f}{flag}")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks del simulador CRT.")
+    parser.add_argument("--filter", help="solo los benchmarks cuyo nombre contenga este texto")
+    parser.add_argument("--min-time", type=float, default=0.2, help="segundos por medición")
+    parser.add_argument("--repeat", type=int, default=5, help="mediciones por benchmark")
+    parser.add_argument("--save-baseline", help="guardar los resultados como línea base (JSON)")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH,
+                        help="comparar contra esta línea base (JSON; por defecto la del repositorio)")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="razón actual/base a partir de la cual se marca una regresión")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="terminar con error si hay regresiones al comparar")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_benchmarks(args.filter, args.min_time, args.repeat)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"Regresiones: {', '.join(regressions)}")
+            return 1
+    else:
+        print_results(results)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,9 +3,12 @@
 # Julián Divas
 # 24687
 
-from typing import Final
+from typing import Final, NamedTuple, Optional
+from functools import lru_cache
+from types import MappingProxyType
 import numpy as np
 from scipy.constants import electron_mass, e
+from scipy.interpolate import PPoly
 import math
 
 # Constantes físicas del CRT (según el proyecto)
@@ -72,7 +75,8 @@ def get_position_normal_mode(accel_vol, hplates_V, vplates_V, ini_speed_val):
     return (x_position, y_position, z_position)
 
 def sinusoidal_signal(time, freq, amplitude, phase):
-    return amplitude*np.sin(2 * np.pi * freq * time + phase)
+    """Genera una señal sinusoidal (otras formas de onda: waveforms.waveform_signal)."""
+    return amplitude * np.sin(2 * np.pi * freq * time + phase)
 
 # Time between plates
 def total_time(ini_speed_val):
@@ -131,9 +135,12 @@ def determine_region(time, times):
 def get_position_by_time(e_accel, v_vertical, v_horizontal, time):
     """
     FUNCIÓN PRINCIPAL CORREGIDA: Calcula la posición del electrón en un tiempo dado.
+    Evalúa la forma cerrada sin compilar ni memoizar la trayectoria: para muchos
+    tiempos con los mismos voltajes conviene compile_trajectory.
     """
-    speed = ini_speed(e_accel)
-    region_times = region_time(speed)
+    sensitivity = deflection_sensitivity(e_accel)
+    speed = sensitivity.speed
+    region_times = sensitivity.region_times
 
     return {
         "lateral_view": get_lateral_view_position(v_vertical, speed, time, region_times),
@@ -222,40 +229,548 @@ def get_superior_view_position(plates_voltage, ini_speed_val, time, region_times
         final_displacement = displacement_in_plates + (exit_velocity * time_after_plates)
         return (depth, final_displacement)
 
-def sinusoidal_signal(time, freq, amplitude, fase):
-    """Genera una señal sinusoidal."""
-    return amplitude * np.sin(2 * np.pi * freq * time + fase)
-
 def lissajous_position_by_time(e_accel, h_freq, v_freq, time, amplitude, fase_h=0, fase_v=0):
     """
     CORREGIDO: Calcula la posición para figuras de Lissajous con fases independientes.
+    Usa el motor vectorizado (lissajous_position_batch) y devuelve la misma forma
+    que get_position_by_time.
     """
-    v_voltage = sinusoidal_signal(time, v_freq, amplitude, fase_v)
-    h_voltage = sinusoidal_signal(time, h_freq, amplitude, fase_h)
+    result = lissajous_position_batch(e_accel, h_freq, v_freq, time, amplitude, fase_h, fase_v)
+    depth = float(result["depth"])
 
-    return get_position_by_time(e_accel, v_voltage, h_voltage, time)
+    return {
+        "lateral_view": (depth, float(result["lateral_view"])),
+        "superior_view": (depth, float(result["superior_view"])),
+        "tiempo": time,
+        "region": REGION_NAMES[int(result["region"])]
+    }
 
 def get_final_screen_position(e_accel, v_vertical, v_horizontal):
     """
     NUEVA FUNCIÓN: Calcula la posición final del electrón en la pantalla.
     Esta función es útil para obtener directamente donde golpea el electrón.
     """
-    speed = ini_speed(e_accel)
+    sensitivity = deflection_sensitivity(e_accel)
+    x_displacement, y_displacement = sensitivity.screen_position(v_vertical, v_horizontal)
+
+    return {
+        "x_displacement": x_displacement,  # Desplazamiento horizontal
+        "y_displacement": y_displacement,  # Desplazamiento vertical
+        "time_to_screen": sensitivity.time_to_screen
+    }
+
+# CACHÉ DE SENSIBILIDAD DE DEFLEXIÓN (depende solo de V_acc y de la geometría)
+class DeflectionSensitivity(NamedTuple):
+    """
+    Función de transferencia lineal voltaje de placas -> desplazamiento en pantalla
+    para un voltaje de aceleración dado.
+    """
+    e_accel: float
+    speed: float
+    region_times: MappingProxyType
+    lateral_per_volt: float   # m/V en pantalla por voltaje de placas verticales
+    superior_per_volt: float  # m/V en pantalla por voltaje de placas horizontales
+
+    @property
+    def time_to_screen(self):
+        return self.region_times["reach_screen"]
+
+    def screen_position(self, v_vertical, v_horizontal):
+        """Devuelve (x, y) en pantalla; acepta escalares o arreglos."""
+        return self.superior_per_volt * v_horizontal, self.lateral_per_volt * v_vertical
+
+DEFLECTION_CACHE_SIZE: Final = 64
+
+def crt_geometry():
+    """Tupla con la geometría actual del CRT, usada como parte de la clave de caché."""
+    return (db_plates_canyon, lon_plates, d_plates, db_between_plates, db_plates_screen)
+
+@lru_cache(maxsize=DEFLECTION_CACHE_SIZE)
+def _deflection_sensitivity(e_accel, geometry):
+    speed = float(ini_speed(e_accel))
     region_times = region_time(speed)
-    
-    # Usar el tiempo cuando el electrón llega a la pantalla
     screen_time = region_times["reach_screen"]
-    
-    # Obtener posiciones en ambas vistas
-    lateral_pos = get_lateral_view_position(v_vertical, speed, screen_time, region_times)
-    superior_pos = get_superior_view_position(v_horizontal, speed, screen_time, region_times)
-    
+
+    # El desplazamiento es lineal en el voltaje: basta evaluar con 1 V
+    lateral = get_lateral_view_position(1.0, speed, screen_time, region_times)[1]
+    superior = get_superior_view_position(1.0, speed, screen_time, region_times)[1]
+
+    return DeflectionSensitivity(e_accel, speed, MappingProxyType(region_times),
+                                 float(lateral), float(superior))
+
+def deflection_sensitivity(e_accel):
+    """Sensibilidad de deflexión memoizada por V_acc (LRU acotado) y geometría."""
+    return _deflection_sensitivity(float(e_accel), crt_geometry())
+
+def clear_deflection_cache():
+    """Invalida la caché de sensibilidad, por ejemplo tras cambiar la geometría."""
+    _deflection_sensitivity.cache_clear()
+    _compile_trajectory.cache_clear()
+
+# MOTOR VECTORIZADO: evalúa muchos (V_acc, V_vert, V_horiz, t) en una sola llamada
+# Códigos enteros de región, en el mismo orden que determine_region
+REGION_IN_CANYON: Final = 0
+REGION_BEFORE_VERTICAL_PLATES: Final = 1
+REGION_IN_VERTICAL_PLATES: Final = 2
+REGION_BETWEEN_PLATES: Final = 3
+REGION_IN_HORIZONTAL_PLATES: Final = 4
+REGION_AFTER_HORIZONTAL_PLATES: Final = 5
+REGION_IN_SCREEN: Final = 6
+
+REGION_NAMES: Final = (
+    "in_canyon",
+    "before_vertical_plates",
+    "in_vertical_plates",
+    "between_plates",
+    "in_horizontal_plates",
+    "after_horizontal_plates",
+    "in_screen",
+)
+
+def determine_region_batch(time, times):
+    """Versión vectorizada de determine_region: devuelve códigos enteros de región."""
+    time = np.asarray(time, dtype=float)
+    region = np.zeros(np.broadcast(time, times["reach_screen"]).shape, dtype=np.int8)
+    # El código es el número de límites estrictamente menores que el tiempo
+    for key in ("time_0", "start_vplates", "end_vplates", "start_hplates", "end_hplates", "reach_screen"):
+        region += time > times[key]
+    return region
+
+def plates_deflection_batch(plates_voltage, time, start_time, end_time):
+    """
+    Desplazamiento transversal vectorizado para un par de placas.
+    Equivale a get_lateral_view_position / get_superior_view_position sin ramas.
+    """
+    e_field_accel_val = e_field_accel(electric_field(np.asarray(plates_voltage, dtype=float)))
+    time_in_plates = np.clip(time - start_time, 0.0, end_time - start_time)
+    time_after_plates = np.maximum(time - end_time, 0.0)
+
+    # Parabólico dentro de las placas + rectilíneo con la velocidad de salida
+    return (0.5 * e_field_accel_val * time_in_plates**2
+            + e_field_accel_val * (end_time - start_time) * time_after_plates)
+
+def get_position_by_time_batch(e_accel, v_vertical, v_horizontal, time):
+    """
+    Versión vectorizada de get_position_by_time.
+    Acepta arreglos (o escalares) que se combinan por broadcasting y devuelve arreglos
+    de profundidad, desplazamiento lateral, desplazamiento superior y códigos de región.
+    """
+    time = np.asarray(time, dtype=float)
+    speed = ini_speed(np.asarray(e_accel, dtype=float))
+    region_times = region_time(speed)
+
+    return {
+        "depth": speed * time,
+        "lateral_view": plates_deflection_batch(v_vertical, time,
+                                                region_times["start_vplates"], region_times["end_vplates"]),
+        "superior_view": plates_deflection_batch(v_horizontal, time,
+                                                 region_times["start_hplates"], region_times["end_hplates"]),
+        "tiempo": time,
+        "region": determine_region_batch(time, region_times)
+    }
+
+def lissajous_position_batch(e_accel, h_freq, v_freq, time, amplitude, fase_h=0, fase_v=0):
+    """Versión vectorizada de lissajous_position_by_time sobre un arreglo de tiempos."""
+    time = np.asarray(time, dtype=float)
+    v_voltage = sinusoidal_signal(time, v_freq, amplitude, fase_v)
+    h_voltage = sinusoidal_signal(time, h_freq, amplitude, fase_h)
+
+    return get_position_by_time_batch(e_accel, v_voltage, h_voltage, time)
+
+def get_final_screen_position_batch(e_accel, v_vertical, v_horizontal):
+    """Versión vectorizada de get_final_screen_position."""
+    if np.ndim(e_accel) == 0:
+        # Un solo V_acc: usar la sensibilidad memoizada
+        sensitivity = deflection_sensitivity(e_accel)
+        x_displacement, y_displacement = sensitivity.screen_position(
+            np.asarray(v_vertical, dtype=float), np.asarray(v_horizontal, dtype=float))
+        return {
+            "x_displacement": x_displacement,
+            "y_displacement": y_displacement,
+            "time_to_screen": sensitivity.time_to_screen
+        }
+
+    speed = ini_speed(np.asarray(e_accel, dtype=float))
+    region_times = region_time(speed)
+    screen_time = region_times["reach_screen"]
+
     return {
-        "x_displacement": superior_pos[1],  # Desplazamiento horizontal
-        "y_displacement": lateral_pos[1],   # Desplazamiento vertical
+        "x_displacement": plates_deflection_batch(v_horizontal, screen_time,
+                                                  region_times["start_hplates"], region_times["end_hplates"]),
+        "y_displacement": plates_deflection_batch(v_vertical, screen_time,
+                                                  region_times["start_vplates"], region_times["end_vplates"]),
         "time_to_screen": screen_time
     }
 
+def fit_plates_voltage(e_accel, max_deflection=0.12):
+    """Voltaje de placas con el que el impacto llega justo al borde (en el eje más sensible)."""
+    sensitivity = deflection_sensitivity(e_accel)
+    per_volt = max(abs(sensitivity.lateral_per_volt), abs(sensitivity.superior_per_volt))
+    return max_deflection / per_volt
+
+def on_screen(x_normalized, y_normalized):
+    """True para los impactos dentro de la pantalla normalizada [0, 1] (bordes incluidos)."""
+    return (x_normalized >= 0.0) & (x_normalized <= 1.0) & (y_normalized >= 0.0) & (y_normalized <= 1.0)
+
+def screen_hit_normalized(e_accel, v_vertical, v_horizontal, max_deflection=0.12, field=None):
+    """
+    Posición de impacto en pantalla normalizada a [0, 1] (0.5 = centro).
+    Acepta arreglos de voltajes; max_deflection es el desplazamiento (m) que llega al borde.
+    Con `field` se integra ese campo numéricamente en lugar de usar las fórmulas analíticas.
+
+    Los electrones que se desvían más allá del borde no llegan a la pantalla: su
+    posición es NaN (on_screen da False) en lugar de recortarse contra el borde.
+    """
+    if field is None:
+        hit = get_final_screen_position_batch(e_accel, v_vertical, v_horizontal)
+    else:
+        hit = get_final_screen_position_integrated(e_accel, v_vertical, v_horizontal, field)
+    x_normalized = 0.5 + hit["x_displacement"] / (2 * max_deflection)
+    y_normalized = 0.5 + hit["y_displacement"] / (2 * max_deflection)
+    miss = ~on_screen(x_normalized, y_normalized)
+    return np.where(miss, np.nan, x_normalized), np.where(miss, np.nan, y_normalized)
+
+# TRAYECTORIA COMPILADA: polinomios por tramos entre los límites de región
+class CompiledTrajectory(NamedTuple):
+    """
+    Trayectoria del electrón para voltajes fijos, en forma polinómica por tramos.
+
+    breakpoints son los límites de región [0, start_vplates, end_vplates, start_hplates,
+    end_hplates, reach_screen] y coefficients tiene forma (3, 5, 3): potencia (mayor
+    primero, en la variable local t - breakpoints[i]), tramo y coordenada
+    (profundidad, lateral, superior). Es la misma convención que scipy.interpolate.PPoly.
+    """
+    e_accel: float
+    v_vertical: float
+    v_horizontal: float
+    breakpoints: np.ndarray
+    coefficients: np.ndarray
+
+    def region(self, time):
+        """Códigos de región (REGION_*) para un arreglo de tiempos."""
+        # Un tiempo igual a un límite pertenece a la región anterior, como en determine_region
+        return np.searchsorted(self.breakpoints, time, side="left").astype(np.int8)
+
+    def evaluate(self, time, nu=0):
+        """
+        Derivada nu-ésima (0 = posición, 1 = velocidad) en cada tiempo.
+        Devuelve un arreglo (3, ...) con profundidad, lateral y superior; fuera de
+        [0, reach_screen] se extrapolan el primer y el último tramo.
+        """
+        time = np.asarray(time, dtype=float)
+        coefficients = self.coefficients
+        for _ in range(nu):
+            powers = np.arange(coefficients.shape[0] - 1, 0, -1)
+            coefficients = coefficients[:-1] * powers[:, None, None]
+
+        segment = np.clip(np.searchsorted(self.breakpoints, time, side="right") - 1,
+                          0, len(self.breakpoints) - 2)
+        local_time = time - self.breakpoints[segment]
+
+        # Horner sobre los coeficientes del tramo de cada tiempo
+        value = np.zeros(time.shape + (3,))
+        for row in coefficients:
+            value = value * local_time[..., None] + row[segment]
+        return np.moveaxis(value, -1, 0)
+
+    def position(self, time):
+        """Igual que get_position_by_time_batch, para un arreglo de tiempos."""
+        depth, lateral, superior = self.evaluate(time)
+        return {
+            "depth": depth,
+            "lateral_view": lateral,
+            "superior_view": superior,
+            "tiempo": np.asarray(time, dtype=float),
+            "region": self.region(time)
+        }
+
+    def velocity(self, time):
+        """Velocidades (profundidad, lateral, superior) en m/s, forma (3, ...)."""
+        return self.evaluate(time, nu=1)
+
+    def to_ppoly(self):
+        """La misma trayectoria como scipy.interpolate.PPoly (valores de forma (..., 3))."""
+        return PPoly(self.coefficients, self.breakpoints)
+
+def _plates_coefficients(plates_voltage, starts, start_time, end_time):
+    """Coeficientes (a, b, c) del desplazamiento de un par de placas en cada tramo."""
+    accel = e_field_accel(electric_field(plates_voltage))
+    inside = (starts >= start_time) & (starts < end_time)
+    return (np.where(inside, 0.5 * accel, 0.0),
+            accel * np.clip(starts - start_time, 0.0, end_time - start_time),
+            plates_deflection_batch(plates_voltage, starts, start_time, end_time))
+
+@lru_cache(maxsize=DEFLECTION_CACHE_SIZE)
+def _compile_trajectory(e_accel, v_vertical, v_horizontal, geometry):
+    sensitivity = _deflection_sensitivity(e_accel, geometry)
+    speed = sensitivity.speed
+    times = sensitivity.region_times
+    breakpoints = np.array([times[key] for key in
+                            ("time_0", "start_vplates", "end_vplates",
+                             "start_hplates", "end_hplates", "reach_screen")])
+    starts = breakpoints[:-1]
+
+    coefficients = np.empty((3, len(starts), 3))
+    coefficients[:, :, 0] = (np.zeros_like(starts), np.full_like(starts, speed), speed * starts)
+    coefficients[:, :, 1] = _plates_coefficients(v_vertical, starts,
+                                                 times["start_vplates"], times["end_vplates"])
+    coefficients[:, :, 2] = _plates_coefficients(v_horizontal, starts,
+                                                 times["start_hplates"], times["end_hplates"])
+
+    # La trayectoria queda en caché y se comparte: los arreglos son de solo lectura
+    breakpoints.flags.writeable = False
+    coefficients.flags.writeable = False
+    return CompiledTrajectory(e_accel, v_vertical, v_horizontal, breakpoints, coefficients)
+
+def compile_trajectory(e_accel, v_vertical, v_horizontal):
+    """Compila (y memoiza) la trayectoria para V_acc y voltajes de placas escalares."""
+    return _compile_trajectory(float(e_accel), float(v_vertical), float(v_horizontal), crt_geometry())
+
+# INTEGRADOR NUMÉRICO: campos arbitrarios (no uniformes), muchas partículas a la vez
+INTEGRATOR_SUBSTEPS: Final = 2  # Pasos por unidad común de la geometría (1 cm)
+
+def screen_depth():
+    """Distancia (m) del cañón a la pantalla."""
+    return db_plates_canyon + lon_plates + db_between_plates + lon_plates + db_plates_screen
+
+def plates_masks(depth):
+    """(dentro de las placas verticales, dentro de las horizontales) para cada profundidad."""
+    start_hplates = db_plates_canyon + lon_plates + db_between_plates
+    return ((depth >= db_plates_canyon) & (depth < db_plates_canyon + lon_plates),
+            (depth >= start_hplates) & (depth < start_hplates + lon_plates))
+
+def uniform_plates_field(depth, lateral, superior, v_vertical, v_horizontal):
+    """
+    Campo ideal de las placas (V/m): uniforme entre cada par y nulo fuera.
+    Devuelve (E_profundidad, E_lateral, E_superior); es el modelo de las fórmulas analíticas.
+    """
+    in_vplates, in_hplates = plates_masks(depth)
+    return 0.0, electric_field(v_vertical) * in_vplates, electric_field(v_horizontal) * in_hplates
+
+# Profundidades fuera de las cuales el campo es nulo: el integrador las recorre en línea recta
+uniform_plates_field.depth_range = (db_plates_canyon, db_plates_canyon + 2 * lon_plates + db_between_plates)
+
+def integration_step_length(substeps=INTEGRATOR_SUBSTEPS):
+    """
+    Largo de paso (m) que cae exactamente en todos los límites de región: el máximo
+    común divisor de las distancias longitudinales (en µm), dividido en `substeps`.
+    """
+    lengths = (db_plates_canyon, lon_plates, db_between_plates, db_plates_screen)
+    return math.gcd(*(round(length * 1e6) for length in lengths)) * 1e-6 / substeps
+
+class IntegratedTrajectories(NamedTuple):
+    """
+    Resultado de integrate_trajectories. position y velocity tienen forma (3, ...) con
+    (profundidad, lateral, superior) al llegar a la pantalla; path, si se pidió,
+    tiene forma (pasos + 1, 3, ...) y flight_times (pasos + 1, ...).
+    """
+    position: np.ndarray
+    velocity: np.ndarray
+    time_to_screen: np.ndarray
+    transmitted: Optional[np.ndarray]  # False si tocó alguna de las placas (con aperture=True)
+    path: Optional[np.ndarray] = None
+    flight_times: Optional[np.ndarray] = None
+
+def integrate_trajectories(e_accel, v_vertical, v_horizontal, field=uniform_plates_field,
+                           v_lateral=0.0, v_superior=0.0, emission_time=0.0,
+                           substeps=None, aperture=True, record=False):
+    """
+    Integra las ecuaciones de movimiento de muchas partículas a la vez hasta la pantalla.
+
+    Esquema leapfrog deriva-impulso-deriva (velocity-Verlet evaluando el campo a mitad
+    de paso). Cada partícula avanza integration_step_length(substeps) de profundidad por
+    paso, así que los límites de región caen en bordes de paso: con un campo constante
+    por tramos el resultado coincide con la solución analítica hasta el redondeo.
+
+    Los argumentos se combinan por broadcasting (un elemento por partícula).
+    v_vertical y v_horizontal pueden ser funciones del tiempo absoluto
+    (emission_time + tiempo de vuelo), para voltajes que cambian durante el vuelo.
+    field(profundidad, lateral, superior, V_vert, V_horiz) -> (E_prof, E_lat, E_sup) en V/m.
+    substeps=None usa field.substeps si el campo lo define (campos que varían en
+    distancias cortas), o INTEGRATOR_SUBSTEPS. Si el campo define depth_range, fuera
+    de ese intervalo no se dan pasos: el tramo sin campo es recto.
+    aperture=True comprueba en cada paso (inicio, mitad y final) si la partícula toca las
+    placas; sin esa comprobación cada paso cuesta cerca de la mitad.
+    """
+    def voltage(value, flight):
+        return value(emission_time + flight) if callable(value) else value
+
+    speed = ini_speed(np.asarray(e_accel, dtype=float))
+    emission_time = np.asarray(emission_time, dtype=float)
+    shape = np.broadcast_shapes(speed.shape, np.shape(v_lateral), np.shape(v_superior),
+                                emission_time.shape,
+                                *(np.shape(v) for v in (v_vertical, v_horizontal) if not callable(v)))
+
+    velocity = np.empty((3,) + shape)
+    velocity[1] = v_lateral
+    velocity[2] = v_superior
+    velocity[0] = np.sqrt(speed**2 - velocity[1]**2 - velocity[2]**2)
+    position = np.zeros((3,) + shape)
+    flight = np.zeros(shape)
+    transmitted = np.ones(shape, dtype=bool) if aperture else None
+
+    if substeps is None:
+        substeps = getattr(field, "substeps", INTEGRATOR_SUBSTEPS)
+    depth_end = screen_depth()
+    step = integration_step_length(substeps)
+    steps = int(round(depth_end / step))
+    dt = step / velocity[0]
+    half_dt = 0.5 * dt
+    half_gap = d_plates / 2
+    path = [position.copy()] if record else None
+    times = [flight.copy()] if record else None
+
+    # Sin campo antes de depth_range: un solo tramo recto (los pasos siguen alineados)
+    first, last = 0, steps
+    if hasattr(field, "depth_range") and not record:
+        field_start, field_end = field.depth_range
+        first = min(max(int(math.floor(field_start / step + 1e-9)), 0), steps)
+        last = min(max(int(math.ceil(field_end / step - 1e-9)), first), steps)
+        position += velocity * (first * dt)
+        flight += first * dt
+
+    for _ in range(first, last):
+        if aperture:
+            excursion = np.abs(position[1:])
+        position += velocity * half_dt  # Deriva hasta la mitad del paso
+        flight += half_dt
+
+        fields = field(position[0], position[1], position[2],
+                       voltage(v_vertical, flight), voltage(v_horizontal, flight))
+        for axis, component in enumerate(fields):
+            if np.ndim(component) or component:
+                velocity[axis] += e_field_accel(component) * dt  # Impulso
+
+        if aperture:
+            # Pasos cuya mitad cae dentro de unas placas: se comprueban sus dos extremos y la mitad
+            in_plates = plates_masks(position[0])
+            np.maximum(excursion, np.abs(position[1:]), out=excursion)
+            position += velocity * half_dt  # Deriva hasta el final del paso
+            np.maximum(excursion, np.abs(position[1:]), out=excursion)
+            transmitted &= ~((in_plates[0] & (excursion[0] > half_gap))
+                             | (in_plates[1] & (excursion[1] > half_gap)))
+        else:
+            position += velocity * half_dt
+        flight += half_dt
+        if record:
+            path.append(position.copy())
+            times.append(flight.copy())
+
+    # Un campo longitudinal cambia la velocidad: cerrar el último tramo recto hasta la pantalla
+    remaining = (depth_end - position[0]) / velocity[0]
+    position += velocity * remaining
+    flight += remaining
+
+    return IntegratedTrajectories(position, velocity, flight, transmitted,
+                                  np.stack(path) if record else None,
+                                  np.stack(times) if record else None)
+
+def get_final_screen_position_integrated(e_accel, v_vertical, v_horizontal,
+                                         field=uniform_plates_field, substeps=None):
+    """Como get_final_screen_position_batch, pero integrando `field` numéricamente."""
+    result = integrate_trajectories(e_accel, v_vertical, v_horizontal, field,
+                                    substeps=substeps, aperture=False)
+    return {
+        "x_displacement": result.position[2],
+        "y_displacement": result.position[1],
+        "time_to_screen": result.time_to_screen
+    }
+
+def validate_integrator(e_accel=1000, v_vertical=300, v_horizontal=-200,
+                        substeps=INTEGRATOR_SUBSTEPS, tolerance=1e-9):
+    """
+    Compara el integrador (con el campo uniforme) con la solución analítica en cada paso
+    y en la pantalla. Acepta arreglos de voltajes. Devuelve los errores máximos
+    (m y s) y "ok" si todos están por debajo de `tolerance`.
+    """
+    result = integrate_trajectories(e_accel, v_vertical, v_horizontal, substeps=substeps, record=True)
+    analytic = get_position_by_time_batch(e_accel, v_vertical, v_horizontal, result.flight_times)
+    analytic_path = np.stack([analytic["depth"], analytic["lateral_view"], analytic["superior_view"]], axis=1)
+    screen = get_final_screen_position_batch(e_accel, v_vertical, v_horizontal)
+
+    errors = {
+        "path_error": float(np.max(np.abs(result.path - analytic_path))),
+        "screen_error": float(max(np.max(np.abs(result.position[2] - screen["x_displacement"])),
+                                  np.max(np.abs(result.position[1] - screen["y_displacement"])))),
+        "time_error": float(np.max(np.abs(result.time_to_screen - screen["time_to_screen"]))),
+    }
+    errors["ok"] = all(error <= tolerance for error in errors.values())
+    return errors
+
+# HAZ MONTE CARLO: muchos electrones por muestra, con dispersión de energía y divergencia
+class BeamHits(NamedTuple):
+    """
+    Impactos de un haz Monte Carlo. Los arreglos tienen forma muestras + (electrones,);
+    transmitted es False para los electrones que chocaron con alguna de las placas.
+    """
+    x_displacement: np.ndarray
+    y_displacement: np.ndarray
+    transmitted: np.ndarray
+    e_accel: np.ndarray  # Energía de cada electrón (V)
+
+    @property
+    def transmission(self):
+        """Fracción de electrones que llegan a la pantalla."""
+        return float(self.transmitted.mean()) if self.transmitted.size else 1.0
+
+def plates_excursion_batch(transverse_speed, plates_voltage, start_time, end_time):
+    """
+    Máximo |desplazamiento| dentro de unas placas para y(t) = v·t + a/2·(t - t0)².
+    Se evalúa en la entrada, en la salida y en el extremo de la parábola (si cae dentro).
+    """
+    accel = e_field_accel(electric_field(np.asarray(plates_voltage, dtype=float)))
+    length = end_time - start_time
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vertex = np.where(accel != 0, -transverse_speed / accel, 0.0)
+    vertex = np.clip(vertex, 0.0, length)
+
+    def displacement(local_time):
+        return transverse_speed * (start_time + local_time) + 0.5 * accel * local_time**2
+
+    return np.maximum(np.maximum(np.abs(displacement(0.0)), np.abs(displacement(length))),
+                      np.abs(displacement(vertex)))
+
+def monte_carlo_beam(e_accel, v_vertical, v_horizontal, electrons=1000, energy_spread=0.01,
+                     divergence=5e-3, rng=None, field=None):
+    """
+    Haz de `electrons` electrones por muestra a través del modelo de regiones.
+
+    v_vertical y v_horizontal son escalares o arreglos de muestras; el resultado tiene
+    forma muestras + (electrones,) y se calcula en una sola pasada de NumPy. Cada
+    electrón sale del cañón con energía V_acc·(1 + energy_spread·N(0, 1)) y ángulos
+    divergence·N(0, 1) (rad) en cada eje. Los que se alejan más de d_plates/2 del eje
+    dentro de sus placas se marcan como interceptados. Con `field` las trayectorias se
+    integran numéricamente (integrate_trajectories) en lugar de usar las fórmulas.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    v_vertical = np.asarray(v_vertical, dtype=float)[..., None]
+    v_horizontal = np.asarray(v_horizontal, dtype=float)[..., None]
+    shape = np.broadcast_shapes(v_vertical.shape, v_horizontal.shape)[:-1] + (electrons,)
+
+    energy = e_accel * np.maximum(1.0 + energy_spread * rng.standard_normal(shape), 1e-3)
+    speed = ini_speed(energy)
+    v_lateral = speed * np.sin(divergence * rng.standard_normal(shape))
+    v_superior = speed * np.sin(divergence * rng.standard_normal(shape))
+    if field is not None:
+        result = integrate_trajectories(energy, v_vertical, v_horizontal, field, v_lateral, v_superior)
+        return BeamHits(result.position[2], result.position[1], result.transmitted, energy)
+
+    times = region_time(np.sqrt(speed**2 - v_lateral**2 - v_superior**2))
+    screen_time = times["reach_screen"]
+
+    y_displacement = v_lateral * screen_time + plates_deflection_batch(
+        v_vertical, screen_time, times["start_vplates"], times["end_vplates"])
+    x_displacement = v_superior * screen_time + plates_deflection_batch(
+        v_horizontal, screen_time, times["start_hplates"], times["end_hplates"])
+
+    half_gap = d_plates / 2
+    transmitted = ((plates_excursion_batch(v_lateral, v_vertical, times["start_vplates"],
+                                           times["end_vplates"]) <= half_gap)
+                   & (plates_excursion_batch(v_superior, v_horizontal, times["start_hplates"],
+                                             times["end_hplates"]) <= half_gap))
+
+    return BeamHits(x_displacement, y_displacement, transmitted, energy)
+
 # NUEVAS FUNCIONES PARA DEBUGGING Y VALIDACIÓN
 def validate_crt_geometry():
     """Valida que la geometría del CRT sea consistente."""
@@ -292,4 +807,7 @@ if __name__ == "__main__":
     validate_crt_geometry()
     
     print("\n=== PRUEBA DE TRAYECTORIA ===")
-    debug_electron_trajectory(1000, 500, -300, 5)
\ No newline at end of file
+    debug_electron_trajectory(1000, 500, -300, 5)
+
+    print("\n=== VALIDACIÓN DEL INTEGRADOR ===")
+    print(validate_integrator(1000, np.linspace(-1000, 1000, 21), np.linspace(1000, -1000, 21)))
\ No newline at end of file
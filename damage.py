@@ -0,0 +1,51 @@
+import pygame
+
+class DamageTracker:
+    """
+    Seguimiento de regiones cambiadas para actualizar la ventana con
+    pygame.display.update(rects) en lugar de pygame.display.flip().
+
+    Cada región se identifica por nombre y una firma con el estado que la
+    determina; solo se vuelve a dibujar (y a enviar) cuando la firma cambia.
+    """
+
+    def __init__(self):
+        self.signatures = {}
+        self.rects = []
+        self.full_redraw = True
+        self.layout_signature = None
+
+    def force_full_redraw(self):
+        """El próximo cuadro se dibuja completo y se presenta con flip()."""
+        self.full_redraw = True
+
+    def check_layout(self, signature):
+        """Fuerza un redibujado completo si cambió el estado que afecta a toda la ventana."""
+        if signature != self.layout_signature:
+            self.layout_signature = signature
+            self.full_redraw = True
+
+    def needs_redraw(self, name, rect, signature):
+        """
+        Devuelve True si la región debe redibujarse, y en ese caso la marca como dañada.
+        En un cuadro completo siempre devuelve True (y guarda la firma).
+        """
+        key = (tuple(rect), signature)
+        if self.full_redraw or self.signatures.get(name) != key:
+            self.signatures[name] = key
+            self.rects.append(pygame.Rect(rect))
+            return True
+        return False
+
+    def mark(self, rect):
+        """Marca una región como dañada sin comparar firmas."""
+        self.rects.append(pygame.Rect(rect))
+
+    def present(self):
+        """Envía a la ventana solo las regiones dañadas."""
+        if self.full_redraw:
+            pygame.display.flip()
+        elif self.rects:
+            pygame.display.update(self.rects)
+        self.rects = []
+        self.full_redraw = False
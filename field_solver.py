@@ -0,0 +1,249 @@
+# Campo de las placas deflectoras con efectos de borde.
+#
+# Resuelve la ecuación de Laplace por diferencias finitas en el plano profundidad-
+# transversal de un par de placas (placas de espesor nulo, 1 V entre ellas, borde del
+# dominio a 0 V) con un sistema disperso de SciPy. El campo es lineal en el voltaje, así
+# que basta un mapa por geometría: se guarda en disco (.npz) y se escala por el voltaje
+# de cada muestra. FringeField lo interpola para calculos.integrate_trajectories.
+#
+#   python field_solver.py                 # resolver (o cargar) y comparar sensibilidades
+#   python field_solver.py --rebuild --step 0.00025
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import spsolve
+
+from calculos import (integrate_trajectories, deflection_sensitivity, crt_geometry,
+                      lon_plates, d_plates)
+
+GRID_STEP = 5e-4          # Separación de la rejilla (m); debe dividir lon_plates y d_plates / 2
+FRINGE_MARGIN = 0.03      # Dominio delante y detrás de las placas (m)
+TRANSVERSE_EXTENT = 0.03  # Semialto del dominio (m)
+FRINGE_SUBSTEPS = 2       # Pasos del integrador por cm (con 32 la sensibilidad cambia < 0.02 %)
+CACHE_DIR = os.environ.get("CRT_FIELD_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".cache", "crt_simulator"))
+CACHE_VERSION = 1
+
+def solve_plates_potential(length=lon_plates, gap=d_plates, margin=FRINGE_MARGIN,
+                           extent=TRANSVERSE_EXTENT, step=GRID_STEP):
+    """
+    Potencial de un par de placas con 1 V entre ellas: -0.5 V en u = +gap/2 y +0.5 V en
+    u = -gap/2, de modo que el campo en el centro es +1/gap (el signo de electric_field).
+    Devuelve (z, u, phi) con z medida desde la entrada de las placas; phi[i, j] = phi(z[i], u[j]).
+    """
+    nz = int(round((length + 2 * margin) / step)) + 1
+    nu = int(round(2 * extent / step)) + 1
+    z = np.linspace(-margin, length + margin, nz)
+    u = np.linspace(-extent, extent, nu)
+
+    # Nodos con potencial fijo: borde del dominio y placas
+    fixed = np.zeros((nz, nu), dtype=bool)
+    fixed[[0, -1], :] = True
+    fixed[:, [0, -1]] = True
+    potential = np.zeros((nz, nu))
+    on_plates = (z >= -step / 2) & (z <= length + step / 2)
+    top = np.argmin(np.abs(u - gap / 2))
+    bottom = np.argmin(np.abs(u + gap / 2))
+    fixed[on_plates, top] = fixed[on_plates, bottom] = True
+    potential[on_plates, top] = -0.5
+    potential[on_plates, bottom] = 0.5
+
+    # Laplaciano de 5 puntos sobre los nodos libres (todos tienen sus 4 vecinos en la rejilla)
+    free = ~fixed
+    index = np.full((nz, nu), -1, dtype=np.int64)
+    count = int(free.sum())
+    index[free] = np.arange(count)
+    ii, jj = np.nonzero(free)
+
+    rows, cols, data = [np.arange(count)], [np.arange(count)], [np.full(count, 4.0)]
+    rhs = np.zeros(count)
+    for di, dj in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        ni, nj = ii + di, jj + dj
+        neighbor_free = free[ni, nj]
+        rows.append(index[ii, jj][neighbor_free])
+        cols.append(index[ni, nj][neighbor_free])
+        data.append(np.full(int(neighbor_free.sum()), -1.0))
+        rhs += np.where(neighbor_free, 0.0, potential[ni, nj])
+
+    matrix = csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+                        shape=(count, count))
+    potential[free] = spsolve(matrix, rhs)
+    return z, u, potential
+
+class FieldMap:
+    """
+    Campo por voltio (V/m por V) de un par de placas en una rejilla regular, con
+    interpolación bilineal vectorizada. Fuera de la rejilla el campo es 0.
+    """
+
+    def __init__(self, z, u, e_depth, e_transverse):
+        self.z = np.asarray(z, dtype=float)
+        self.u = np.asarray(u, dtype=float)
+        self.e_depth = np.asarray(e_depth, dtype=float)
+        self.e_transverse = np.asarray(e_transverse, dtype=float)
+        self.step = float(self.z[1] - self.z[0])
+        self._inv_step = 1.0 / self.step
+        self._shape = self.e_depth.shape
+
+        # Coeficientes bilineales de cada celda, v = c0 + c1·wz + c2·wu + c3·wz·wu, para las
+        # dos componentes: una sola indexación por punto. La celda extra (ceros) es "fuera".
+        corners = np.stack([self.e_depth, self.e_transverse], axis=-1)
+        v00, v10 = corners[:-1, :-1], corners[1:, :-1]
+        v01, v11 = corners[:-1, 1:], corners[1:, 1:]
+        cells = np.stack([v00, v10 - v00, v01 - v00, v11 - v10 - v01 + v00], axis=2)
+        self._cells = np.concatenate([cells.reshape(-1, 4, 2), np.zeros((1, 4, 2))])
+        self._outside = len(self._cells) - 1
+
+    @classmethod
+    def from_potential(cls, z, u, potential):
+        e_depth, e_transverse = np.gradient(-potential, z, u)
+        return cls(z, u, e_depth, e_transverse)
+
+    def sample(self, depth, transverse):
+        """(E_profundidad, E_transversal) por voltio en cada punto; depth relativa a la entrada."""
+        nz, nu = self._shape
+        fz = (np.asarray(depth, dtype=float) - self.z[0]) * self._inv_step
+        fu = (np.asarray(transverse, dtype=float) - self.u[0]) * self._inv_step
+        i = fz.astype(np.int64)
+        j = fu.astype(np.int64)
+        inside = (fz >= 0) & (fu >= 0) & (i < nz - 1) & (j < nu - 1)
+
+        cell = self._cells[np.where(inside, i * (nu - 1) + j, self._outside)]
+        wz = (fz - i)[..., None]
+        wu = (fu - j)[..., None]
+        value = cell[..., 0, :] + cell[..., 1, :] * wz + (cell[..., 2, :] + cell[..., 3, :] * wz) * wu
+        return value[..., 0], value[..., 1]
+
+    def save(self, path):
+        # Escritura atómica: un proceso que lea a la vez nunca ve un archivo a medias
+        temporary = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(temporary, z=self.z, u=self.u,
+                            e_depth=self.e_depth, e_transverse=self.e_transverse)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["z"], data["u"], data["e_depth"], data["e_transverse"])
+
+def field_map_key(length=lon_plates, gap=d_plates, margin=FRINGE_MARGIN,
+                  extent=TRANSVERSE_EXTENT, step=GRID_STEP):
+    """Clave del mapa en la caché de disco: depende solo de la geometría y de la rejilla."""
+    spec = {"version": CACHE_VERSION, "length": length, "gap": gap, "margin": margin,
+            "extent": extent, "step": step}
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+@lru_cache(maxsize=8)
+def load_field_map(length=lon_plates, gap=d_plates, margin=FRINGE_MARGIN,
+                   extent=TRANSVERSE_EXTENT, step=GRID_STEP, cache_dir=CACHE_DIR, rebuild=False):
+    """
+    Mapa de campo de un par de placas: de memoria, de la caché de disco o resuelto
+    (y guardado) si no existe o no se puede leer.
+    """
+    path = os.path.join(cache_dir, f"plates_field_{field_map_key(length, gap, margin, extent, step)}.npz")
+    if not rebuild and os.path.exists(path):
+        try:
+            return FieldMap.load(path)
+        except (OSError, ValueError, KeyError):
+            pass  # Archivo dañado: se vuelve a resolver
+
+    field_map = FieldMap.from_potential(*solve_plates_potential(length, gap, margin, extent, step))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        field_map.save(path)
+    except OSError:
+        pass  # Sin caché en disco (p. ej. directorio de solo lectura): se usa en memoria
+    return field_map
+
+class FringeField:
+    """
+    Campo de los dos pares de placas con efectos de borde, con la firma que espera
+    calculos.integrate_trajectories. Cada par usa el mismo mapa, desplazado a su
+    profundidad; las placas horizontales desvían en la coordenada superior.
+    """
+
+    substeps = FRINGE_SUBSTEPS
+    relative_cost = 4  # Tiempo por paso frente a calculos.uniform_plates_field (interpolación)
+
+    def __init__(self, field_map, geometry=None):
+        # geometry como calculos.crt_geometry() (por defecto, la actual)
+        canyon, length, _, between, _ = crt_geometry() if geometry is None else geometry
+        self.map = field_map
+        self.start_vplates = canyon
+        self.start_hplates = canyon + length + between
+        # El mapa es nulo fuera de su rejilla: el integrador no da pasos ahí
+        self.depth_range = (self.start_vplates + field_map.z[0], self.start_hplates + field_map.z[-1])
+
+    def __call__(self, depth, lateral, superior, v_vertical, v_horizontal):
+        ez_vertical, e_lateral = self.map.sample(depth - self.start_vplates, lateral)
+        ez_horizontal, e_superior = self.map.sample(depth - self.start_hplates, superior)
+        return (v_vertical * ez_vertical + v_horizontal * ez_horizontal,
+                v_vertical * e_lateral, v_horizontal * e_superior)
+
+@lru_cache(maxsize=4)
+def _fringe_field(geometry):
+    _, length, gap, _, _ = geometry
+    return FringeField(load_field_map(length=length, gap=gap), geometry)
+
+def fringe_field():
+    """FringeField de la geometría actual (el mapa se resuelve una sola vez)."""
+    return _fringe_field(crt_geometry())
+
+def fringe_deflection_sensitivity(e_accel):
+    """
+    Desplazamiento en pantalla por voltio (m/V) con efectos de borde y su razón con el
+    modelo de placas ideales. Acepta un arreglo de V_acc.
+    """
+    field = fringe_field()
+    e_accel = np.asarray(e_accel, dtype=float)
+    # Con 1 V la deflexión es lineal: basta una partícula por eje
+    result = integrate_trajectories(e_accel[..., None], np.array([1.0, 0.0]), np.array([0.0, 1.0]),
+                                    field, aperture=False)
+    lateral = result.position[1][..., 0]
+    superior = result.position[2][..., 1]
+
+    ideal = np.vectorize(lambda V: deflection_sensitivity(V).lateral_per_volt)(e_accel)
+    ideal_superior = np.vectorize(lambda V: deflection_sensitivity(V).superior_per_volt)(e_accel)
+    return {
+        "lateral_per_volt": lateral,
+        "superior_per_volt": superior,
+        "lateral_ratio": lateral / ideal,
+        "superior_ratio": superior / ideal_superior,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Campo de las placas con efectos de borde.")
+    parser.add_argument("--step", type=float, default=GRID_STEP, help="separación de la rejilla (m)")
+    parser.add_argument("--rebuild", action="store_true", help="resolver aunque exista en la caché")
+    parser.add_argument("--vacc", type=float, nargs="+", default=[500, 1000, 2000],
+                        help="voltajes de aceleración para comparar sensibilidades")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    field_map = load_field_map(step=args.step, rebuild=args.rebuild)
+    elapsed = time.perf_counter() - start
+    nz, nu = field_map.e_depth.shape
+    center = field_map.sample(lon_plates / 2, 0.0)[1]
+    print(f"Mapa {nz}x{nu} en {elapsed:.2f} s (caché: {CACHE_DIR}); "
+          f"campo en el centro {float(center):.2f} V/m por V (ideal {1 / d_plates:.2f})")
+
+    if args.step == GRID_STEP:
+        sensitivity = fringe_deflection_sensitivity(args.vacc)
+        for i, V in enumerate(args.vacc):
+            print(f"V_acc {V:7.0f} V: {sensitivity['lateral_per_volt'][i] * 1e3:.4f} mm/V lateral "
+                  f"({sensitivity['lateral_ratio'][i]:.4f} x ideal), "
+                  f"{sensitivity['superior_per_volt'][i] * 1e3:.4f} mm/V superior "
+                  f"({sensitivity['superior_ratio'][i]:.4f} x ideal)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
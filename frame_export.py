@@ -0,0 +1,123 @@
+import json
+import os
+import queue
+import threading
+import time
+import pygame
+
+class FrameExporter:
+    """
+    Exporta cuadros renderizados a disco desde un hilo escritor.
+
+    submit() solo copia los píxeles (de toda la ventana o de un rectángulo) y los
+    encola; el hilo los escribe como PNG numerados o en un único archivo RGB crudo
+    (frames.rgb + frames.json, listo para ffmpeg -f rawvideo). La cola es acotada:
+    con block=False un cuadro que no cabe se descarta y se cuenta, así el bucle de
+    60 FPS nunca espera al disco; con block=True (modo offline) se espera.
+    """
+
+    FORMATS = ("png", "raw")
+
+    def __init__(self, output_dir, fmt="png", fps=60, queue_size=32, block=False):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Formato desconocido: {fmt} (opciones: {', '.join(self.FORMATS)})")
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.fps = fps
+        self.block = block
+        self.queue = queue.Queue(maxsize=queue_size)
+
+        # Estadísticas de contrapresión
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.blocked_time = 0.0  # Tiempo que submit() esperó con la cola llena (s)
+        self.max_queue_depth = 0
+        self.frame_size = None
+
+        self._raw_file = None
+        self._thread = None
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.fmt == "raw":
+            self._raw_file = open(os.path.join(self.output_dir, "frames.rgb"), "wb")
+        self._thread = threading.Thread(target=self._run, name="frame-export", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, surface, rect=None):
+        """
+        Encola una copia de `surface` (o del rectángulo `rect`).
+        Devuelve False si el cuadro se descartó porque la cola estaba llena.
+        """
+        if rect is not None:
+            surface = surface.subsurface(rect)
+        size = surface.get_size()
+        if self.frame_size is None:
+            self.frame_size = size
+        elif size != self.frame_size:
+            raise ValueError(f"Tamaño de cuadro {size} distinto del inicial {self.frame_size}")
+
+        frame = (self.submitted, pygame.image.tobytes(surface, "RGB"))
+        self.submitted += 1
+        if self.block:
+            start = time.perf_counter()
+            self.queue.put(frame)
+            self.blocked_time += time.perf_counter() - start
+        else:
+            try:
+                self.queue.put_nowait(frame)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return True
+
+    def close(self):
+        """Espera a que se escriban los cuadros pendientes y cierra los archivos."""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._raw_file is not None:
+            self._raw_file.close()
+            self._raw_file = None
+            self._write_raw_header()
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "blocked_s": self.blocked_time,
+            "max_queue_depth": self.max_queue_depth,
+            "pending": self.queue.qsize(),
+        }
+
+    def _run(self):
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                break
+            index, pixels = frame
+            if self.fmt == "raw":
+                self._raw_file.write(pixels)
+            else:
+                image = pygame.image.frombytes(pixels, self.frame_size, "RGB")
+                pygame.image.save(image, os.path.join(self.output_dir, f"frame_{index:06d}.png"))
+            self.written += 1
+
+    def _write_raw_header(self):
+        width, height = self.frame_size or (0, 0)
+        with open(os.path.join(self.output_dir, "frames.json"), "w") as f:
+            json.dump({
+                "file": "frames.rgb",
+                "pix_fmt": "rgb24",
+                "width": width,
+                "height": height,
+                "fps": self.fps,
+                "frames": self.written,
+                "ffmpeg": f"ffmpeg -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r {self.fps} "
+                          f"-i frames.rgb video.mp4",
+            }, f, indent=2)
@@ -0,0 +1,130 @@
+# Galería de figuras de Lissajous renderizada sin ventana.
+# Para cada razón de FrequencyGrid, desfase y voltaje de aceleración genera un PNG
+# (con el mismo PhosphorScreen de la aplicación) y un .npz comprimido con los puntos.
+# El trabajo se reparte en un pool de procesos.
+#
+#   python gallery.py                                  # fases 0, 45, 90 y 135°, V_acc = 1000 V
+#   python gallery.py --phases 0 90 --voltages 500 1000 2000 --output galeria
+#   python gallery.py --workers 1                      # sin pool, útil para depurar
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+import pygame
+
+from calculos import sinusoidal_signal, screen_hit_normalized, on_screen, fit_plates_voltage
+from grid_component import FREQUENCY_RATIOS
+from phosphor import PhosphorScreen
+
+# Desplazamiento en pantalla (m) que llega al borde, como en screen_hit_normalized
+MAX_DEFLECTION = 0.12
+# Sin --amplitude, la figura ocupa esta fracción de la pantalla
+FIT_FRACTION = 0.9
+
+def gallery_jobs(phases, voltages, ratios=FREQUENCY_RATIOS):
+    """Todas las combinaciones (razón, desfase en grados, V_acc) a renderizar."""
+    return [(freq_h, freq_v, phase, V_acc)
+            for freq_h, freq_v in ratios
+            for phase in phases
+            for V_acc in voltages]
+
+def job_name(freq_h, freq_v, phase, V_acc):
+    return f"lissajous_{freq_h}-{freq_v}_fase{phase:g}_vacc{V_acc:g}"
+
+def fit_amplitude(V_acc):
+    """Voltaje de placas con el que la figura ocupa FIT_FRACTION de la pantalla."""
+    return FIT_FRACTION * fit_plates_voltage(V_acc, MAX_DEFLECTION)
+
+def render_job(job, output_dir, size=250, sample_rate=20000.0, amplitude=None, cycles=1):
+    """
+    Renderiza una figura: muestrea las señales de placas durante `cycles` periodos
+    completos, calcula los impactos con calculos y los deposita en un PhosphorScreen.
+    Con amplitude=None se usa fit_amplitude(V_acc).
+    """
+    freq_h, freq_v, phase, V_acc = job
+    if amplitude is None:
+        amplitude = fit_amplitude(V_acc)
+    # Con razones enteras la figura se repite cada 1 / mcd(f_h, f_v) segundos
+    period = 1.0 / math.gcd(freq_h, freq_v)
+    times = np.arange(int(round(cycles * period * sample_rate))) / sample_rate
+
+    v_vert = sinusoidal_signal(times, freq_v, amplitude, 0.0)
+    v_horiz = sinusoidal_signal(times, freq_h, amplitude, math.radians(phase))
+    x_pos, y_pos = screen_hit_normalized(V_acc, v_vert, v_horiz, max_deflection=MAX_DEFLECTION)
+
+    # Sin persistencia: cada píxel toma el máximo, como una exposición larga
+    phosphor = PhosphorScreen(size, size, color=(255, 255, 0), deposit_gain=1.0)
+    # Con una amplitud mayor que la de ajuste, los impactos fuera de pantalla (NaN) no se dibujan
+    hit = on_screen(x_pos, y_pos)
+    phosphor.deposit(x_pos[hit], y_pos[hit], brightness=0.9, accumulate=False)
+    image = pygame.Surface((size, size))
+    image.fill((0, 0, 0))
+    phosphor.draw(image, (0, 0))
+
+    name = job_name(freq_h, freq_v, phase, V_acc)
+    pygame.image.save(image, os.path.join(output_dir, name + ".png"))
+    np.savez_compressed(os.path.join(output_dir, name + ".npz"),
+                        x=x_pos.astype(np.float32), y=y_pos.astype(np.float32), t=times,
+                        v_vertical=v_vert, v_horizontal=v_horiz,
+                        freq_h=freq_h, freq_v=freq_v, phase=phase, V_acc=V_acc, amplitude=amplitude)
+
+    return {"name": name, "freq_h": freq_h, "freq_v": freq_v, "phase": phase,
+            "V_acc": V_acc, "amplitude": amplitude, "points": int(times.size),
+            "on_screen": int(np.count_nonzero(hit))}
+
+def render_gallery(jobs, output_dir, workers=None, **render_options):
+    """Renderiza todos los trabajos; con workers=1 se hace en este proceso."""
+    os.makedirs(output_dir, exist_ok=True)
+    render = partial(render_job, output_dir=output_dir, **render_options)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [render(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Varios trabajos por envío para amortizar la comunicación entre procesos
+        chunksize = max(1, len(jobs) // (4 * workers))
+        return list(executor.map(render, jobs, chunksize=chunksize))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Renderiza la galería de figuras de Lissajous.")
+    parser.add_argument("--output", default="gallery", help="directorio de salida")
+    parser.add_argument("--phases", type=float, nargs="+", default=[0, 45, 90, 135],
+                        help="desfases de la señal horizontal, en grados")
+    parser.add_argument("--voltages", type=float, nargs="+", default=[1000],
+                        help="voltajes de aceleración (V)")
+    parser.add_argument("--size", type=int, default=250, help="lado de cada imagen en píxeles")
+    parser.add_argument("--sample-rate", type=float, default=20000.0, help="muestras por segundo")
+    parser.add_argument("--amplitude", type=float,
+                        help="voltaje máximo de las placas (por defecto, el que llena la pantalla)")
+    parser.add_argument("--cycles", type=int, default=1, help="periodos completos por figura")
+    parser.add_argument("--workers", type=int, help="procesos del pool (por defecto, uno por CPU)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = gallery_jobs(args.phases, args.voltages)
+
+    start = time.perf_counter()
+    results = render_gallery(jobs, args.output, workers=args.workers, size=args.size,
+                             sample_rate=args.sample_rate, amplitude=args.amplitude,
+                             cycles=args.cycles)
+    elapsed = time.perf_counter() - start
+
+    with open(os.path.join(args.output, "index.json"), "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{len(results)} figuras en {args.output}/ ({elapsed:.2f} s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,71 @@
 import pygame
 import math
+from collections import OrderedDict
+from fractions import Fraction
+import numpy as np
+from text_cache import get_font, render_text
+from waveforms import wavetable
+
+# Common frequency ratios (freq_h, freq_v) for Lissajous figures, in grid order
+FREQUENCY_RATIOS = (
+    (1, 1), (1, 2), (2, 1), (1, 3), (3, 1),
+    (2, 3), (3, 2), (1, 4), (4, 1), (3, 4),
+    (4, 3), (2, 5), (5, 2), (3, 5), (5, 3),
+    (4, 5), (5, 4), (1, 6), (6, 1), (5, 6)
+)
+
+# Preview sampling: the curve covers exactly one period of the rational ratio
+PREVIEW_MAX_DENOMINATOR = 24    # Ratios are approximated by p:q with q <= this
+PREVIEW_SAMPLES_PER_CYCLE = 64  # Samples per cycle of the faster signal
+PREVIEW_MIN_SAMPLES = 200
+PREVIEW_CACHE_SIZE = 128
+PREVIEW_FADE_BANDS = 16         # Color steps of the fade; one draw.lines call each
+
+def frequency_ratio(freq_h, freq_v, max_denominator=PREVIEW_MAX_DENOMINATOR):
+    """Coprime integers (p, q) with p:q ~= freq_h:freq_v"""
+    if freq_h <= 0 or freq_v <= 0:
+        return (1, 1)
+    ratio = Fraction(freq_h / freq_v).limit_denominator(max_denominator)
+    return (max(ratio.numerator, 1), ratio.denominator)
+
+def lissajous_curve(freq_h, freq_v, phase_h=0, phase_v=0, wave_h="sine", wave_v="sine"):
+    """
+    Unit Lissajous curve (x, y in [-1, 1]) over exactly one period, closed.
+    With p:q the reduced ratio, sin(p*u + phase_h), sin(q*u + phase_v) for u in [0, 2*pi]
+    traces the same figure as the real frequencies. wave_h / wave_v replace the sines
+    with other waveforms (see waveforms.wavetable).
+    """
+    p, q = frequency_ratio(freq_h, freq_v)
+    samples = max(PREVIEW_MIN_SAMPLES, PREVIEW_SAMPLES_PER_CYCLE * max(p, q))
+    cycles = np.linspace(0.0, 1.0, samples + 1)
+    return (wavetable(wave_h)(p * cycles + phase_h / (2 * np.pi)),
+            wavetable(wave_v)(q * cycles + phase_v / (2 * np.pi)))
 
 class FrequencyGrid:
     def __init__(self, x, y, width, height, title="Frequency Grid"):
         self.rect = pygame.Rect(x, y, width, height)
         self.title = title
-        self.font = pygame.font.SysFont('Arial', 16, bold=True)
-        self.small_font = pygame.font.SysFont('Arial', 12)
+        self.font = get_font('Arial', 16, bold=True)
+        self.small_font = get_font('Arial', 12)
         
-        # Grid parameters
-        self.grid_cols = 10
-        self.grid_rows = 10
+        # Grid parameters: just enough rows for the ratios, so cells can hold a thumbnail
+        self.grid_cols = 5
+        self.grid_rows = math.ceil(len(FREQUENCY_RATIOS) / self.grid_cols)
         self.cell_width = (width - 40) // self.grid_cols
         self.cell_height = (height - 60) // self.grid_rows
         
         # Frequency ranges (1:1, 1:2, 2:1, 2:3, 3:2, etc.)
         self.freq_combinations = []
+        self.cell_lookup = {}  # (row, col) -> combo
         self.selected_combo = None
         self.hovered_combo = None
         
+        # Pre-rendered cells per (index, state), the static panel and the current composite
+        self._cell_surfaces = {}
+        self._base_surface = None
+        self._composite = None
+        self._composite_key = None
+        
         # Generate frequency combinations
         self._generate_frequency_combinations()
         
@@ -36,12 +83,7 @@ class FrequencyGrid:
     
     def _generate_frequency_combinations(self):
         """Generate common frequency ratio combinations for Lissajous figures"""
-        ratios = [
-            (1, 1), (1, 2), (2, 1), (1, 3), (3, 1),
-            (2, 3), (3, 2), (1, 4), (4, 1), (3, 4),
-            (4, 3), (2, 5), (5, 2), (3, 5), (5, 3),
-            (4, 5), (5, 4), (1, 6), (6, 1), (5, 6)
-        ]
+        ratios = FREQUENCY_RATIOS
         
         base_freq = 1.0
         for i, (freq_h_ratio, freq_v_ratio) in enumerate(ratios):
@@ -54,14 +96,16 @@ class FrequencyGrid:
                 col = i % self.grid_cols
                 
                 if row < self.grid_rows:
-                    self.freq_combinations.append({
+                    combo = {
                         'freq_h': freq_h,
                         'freq_v': freq_v,
                         'ratio_text': f"{freq_h_ratio}:{freq_v_ratio}",
                         'row': row,
                         'col': col,
                         'index': i
-                    })
+                    }
+                    self.freq_combinations.append(combo)
+                    self.cell_lookup[(row, col)] = combo
     
     def get_cell_rect(self, row, col):
         """Get the rectangle for a specific grid cell"""
@@ -90,75 +134,115 @@ class FrequencyGrid:
     def handle_event(self, event):
         """Handle mouse events for the grid"""
         if event.type == pygame.MOUSEMOTION:
-            cell = self.get_cell_from_pos(event.pos)
-            self.hovered_combo = None
-            
-            if cell:
-                row, col = cell
-                for combo in self.freq_combinations:
-                    if combo['row'] == row and combo['col'] == col:
-                        self.hovered_combo = combo
-                        break
+            self.hovered_combo = self.cell_lookup.get(self.get_cell_from_pos(event.pos))
         
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            cell = self.get_cell_from_pos(event.pos)
-            
-            if cell:
-                row, col = cell
-                for combo in self.freq_combinations:
-                    if combo['row'] == row and combo['col'] == col:
-                        self.selected_combo = combo
-                        return combo  # Return the selected combination
+            combo = self.cell_lookup.get(self.get_cell_from_pos(event.pos))
+            if combo:
+                self.selected_combo = combo
+                return combo  # Return the selected combination
         
         return None
     
-    def draw(self, surface):
-        """Draw the frequency grid"""
+    def _cell_style(self, state):
+        """Cell, text and thumbnail colors for 'normal', 'hover' or 'selected'"""
+        if state == 'selected':
+            return self.colors['cell_selected'], self.colors['text_light'], self.colors['text_light']
+        if state == 'hover':
+            return self.colors['cell_hover'], self.colors['text'], self.colors['header']
+        return self.colors['cell_normal'], self.colors['text'], self.colors['header']
+    
+    def _cell_surface(self, combo, state):
+        """Cell with its ratio label and Lissajous thumbnail, rendered once per state"""
+        key = (combo['index'], state)
+        cell = self._cell_surfaces.get(key)
+        if cell is not None:
+            return cell
+        
+        cell_color, text_color, curve_color = self._cell_style(state)
+        width, height = self.cell_width - 2, self.cell_height - 2
+        cell = pygame.Surface((width, height), pygame.SRCALPHA)
+        cell_rect = cell.get_rect()
+        pygame.draw.rect(cell, cell_color, cell_rect, border_radius=4)
+        pygame.draw.rect(cell, self.colors['border'], cell_rect, 1, border_radius=4)
+        
+        # Ratio label in the top-left corner
+        cell.blit(render_text(self.small_font, combo['ratio_text'], text_color), (4, 2))
+        
+        # Thumbnail: one closed period of the curve, in the right part of the cell
+        side = min(height - 6, width - 24)
+        if side > 4:
+            x, y = lissajous_curve(combo['freq_h'], combo['freq_v'])
+            half = (side - 1) / 2
+            left = width - side - 3 + half
+            top = (height - side) / 2 + half
+            points = list(zip((left + x * half).tolist(), (top + y * half).tolist()))
+            pygame.draw.aalines(cell, curve_color, False, points)
+        
+        self._cell_surfaces[key] = cell
+        return cell
+    
+    def _draw_base(self):
+        """Panel, header, title and every cell in its normal state (local coordinates)"""
+        # Extra strip below the panel for the selection info line
+        base = pygame.Surface((self.rect.width, self.rect.height + 30), pygame.SRCALPHA)
+        panel = pygame.Rect(0, 0, self.rect.width, self.rect.height)
+        
         # Main panel background
-        pygame.draw.rect(surface, self.colors['background'], self.rect, border_radius=8)
-        pygame.draw.rect(surface, self.colors['border'], self.rect, 2, border_radius=8)
+        pygame.draw.rect(base, self.colors['background'], panel, border_radius=8)
+        pygame.draw.rect(base, self.colors['border'], panel, 2, border_radius=8)
         
         # Header
-        header_rect = pygame.Rect(self.rect.x, self.rect.y, self.rect.width, 35)
-        pygame.draw.rect(surface, self.colors['header'], header_rect, 
+        header_rect = pygame.Rect(0, 0, self.rect.width, 35)
+        pygame.draw.rect(base, self.colors['header'], header_rect, 
                         border_top_left_radius=8, border_top_right_radius=8)
         
         # Title
-        title_text = self.font.render(self.title, True, self.colors['text_light'])
+        title_text = render_text(self.font, self.title, self.colors['text_light'])
         title_x = header_rect.centerx - title_text.get_width() // 2
-        surface.blit(title_text, (title_x, header_rect.y + 8))
+        base.blit(title_text, (title_x, header_rect.y + 8))
         
         # Draw grid cells
         for combo in self.freq_combinations:
-            cell_rect = self.get_cell_rect(combo['row'], combo['col'])
-            
-            # Determine cell color
-            if self.selected_combo and combo['index'] == self.selected_combo['index']:
-                cell_color = self.colors['cell_selected']
-                text_color = self.colors['text_light']
-            elif self.hovered_combo and combo['index'] == self.hovered_combo['index']:
-                cell_color = self.colors['cell_hover']
-                text_color = self.colors['text']
-            else:
-                cell_color = self.colors['cell_normal']
-                text_color = self.colors['text']
-            
-            # Draw cell
-            pygame.draw.rect(surface, cell_color, cell_rect, border_radius=4)
-            pygame.draw.rect(surface, self.colors['border'], cell_rect, 1, border_radius=4)
-            
-            # Draw ratio text
-            ratio_text = self.small_font.render(combo['ratio_text'], True, text_color)
-            text_rect = ratio_text.get_rect(center=cell_rect.center)
-            surface.blit(ratio_text, text_rect)
+            base.blit(self._cell_surface(combo, 'normal'), self._local_cell_rect(combo))
+        return base
+    
+    def _local_cell_rect(self, combo):
+        return self.get_cell_rect(combo['row'], combo['col']).move(-self.rect.x, -self.rect.y)
+    
+    def _get_composite(self):
+        """Grid surface for the current (hover, selected) pair, rebuilt only when it changes"""
+        hovered = self.hovered_combo['index'] if self.hovered_combo else None
+        selected = self.selected_combo['index'] if self.selected_combo else None
+        key = (hovered, selected, self.rect.size)
+        if self._composite is not None and key == self._composite_key:
+            return self._composite
+        
+        if self._base_surface is None or self._base_surface.get_width() != self.rect.width:
+            self._base_surface = self._draw_base()
+        composite = self._base_surface.copy()
+        
+        if self.hovered_combo and hovered != selected:
+            composite.blit(self._cell_surface(self.hovered_combo, 'hover'),
+                           self._local_cell_rect(self.hovered_combo))
         
-        # Draw current selection info
         if self.selected_combo:
-            info_y = self.rect.bottom + 10
+            composite.blit(self._cell_surface(self.selected_combo, 'selected'),
+                           self._local_cell_rect(self.selected_combo))
+            
+            # Draw current selection info
             info_text = f"Selected: {self.selected_combo['ratio_text']} " \
                        f"(H: {self.selected_combo['freq_h']:.1f} Hz, V: {self.selected_combo['freq_v']:.1f} Hz)"
-            info_surface = self.small_font.render(info_text, True, self.colors['text'])
-            surface.blit(info_surface, (self.rect.x, info_y))
+            info_surface = render_text(self.small_font, info_text, self.colors['text'])
+            composite.blit(info_surface, (0, self.rect.height + 10))
+        
+        self._composite = composite
+        self._composite_key = key
+        return composite
+    
+    def draw(self, surface):
+        """Draw the frequency grid: a single blit of the cached composite"""
+        surface.blit(self._get_composite(), self.rect.topleft)
     
     def get_selected_frequencies(self):
         """Get the currently selected frequency combination"""
@@ -171,29 +255,50 @@ class LissajousPreview:
     def __init__(self, x, y, size=150):
         self.rect = pygame.Rect(x, y, size, size)
         self.size = size
-        self.font = pygame.font.SysFont('Arial', 14, bold=True)
+        self.font = get_font('Arial', 14, bold=True)
         
         # Preview parameters
         self.points = []
-        self.max_points = 200
+        self.revision = 0  # Increases every time the curve changes
         
-    def update_preview(self, freq_h, freq_v, phase_h=0, phase_v=0):
-        """Update the Lissajous preview with given frequencies"""
-        self.points.clear()
+        # Screen-space curves: LRU for slider values, pinned for the precomputed grid ratios
+        self._curve_cache = OrderedDict()
+        self._pinned_curves = {}
         
-        # Generate points for the Lissajous curve
-        for i in range(self.max_points):
-            t = i * 2 * math.pi / 50  # Time parameter
-            
-            # Lissajous equations
-            x = math.sin(freq_h * t + phase_h)
-            y = math.sin(freq_v * t + phase_v)
-            
-            # Convert to screen coordinates
-            screen_x = self.rect.centerx + int(x * (self.size - 20) / 2)
-            screen_y = self.rect.centery + int(y * (self.size - 20) / 2)
-            
-            self.points.append((screen_x, screen_y))
+    def _curve_points(self, freq_h, freq_v, phase_h=0, phase_v=0, wave_h="sine", wave_v="sine"):
+        """Screen coordinates of the curve, from the cache when possible"""
+        key = (freq_h, freq_v, phase_h, phase_v, wave_h, wave_v, tuple(self.rect))
+        points = self._pinned_curves.get(key)
+        if points is not None:
+            return points
+        points = self._curve_cache.get(key)
+        if points is not None:
+            self._curve_cache.move_to_end(key)
+            return points
+        
+        x, y = lissajous_curve(freq_h, freq_v, phase_h, phase_v, wave_h, wave_v)
+        half = (self.size - 20) / 2
+        screen_x = self.rect.centerx + (x * half).astype(int)
+        screen_y = self.rect.centery + (y * half).astype(int)
+        points = list(zip(screen_x.tolist(), screen_y.tolist()))
+        
+        self._curve_cache[key] = points
+        if len(self._curve_cache) > PREVIEW_CACHE_SIZE:
+            self._curve_cache.popitem(last=False)
+        return points
+        
+    def precompute(self, frequencies, phase_h=0, phase_v=0):
+        """Build and pin the curves for (freq_h, freq_v) pairs, e.g. every grid ratio"""
+        for freq_h, freq_v in frequencies:
+            key = (freq_h, freq_v, phase_h, phase_v, "sine", "sine", tuple(self.rect))
+            self._pinned_curves[key] = self._curve_points(freq_h, freq_v, phase_h, phase_v)
+        
+    def update_preview(self, freq_h, freq_v, phase_h=0, phase_v=0, wave_h="sine", wave_v="sine"):
+        """Update the Lissajous preview with given frequencies (and waveform names)"""
+        points = self._curve_points(freq_h, freq_v, phase_h, phase_v, wave_h, wave_v)
+        if points is not self.points:
+            self.points = points
+            self.revision += 1
     
     def draw(self, surface):
         """Draw the Lissajous preview"""
@@ -202,7 +307,7 @@ class LissajousPreview:
         pygame.draw.rect(surface, (100, 100, 100), self.rect, 2, border_radius=8)
         
         # Title
-        title = self.font.render("Preview", True, (255, 255, 255))
+        title = render_text(self.font, "Preview", (255, 255, 255))
         surface.blit(title, (self.rect.x + 5, self.rect.y + 5))
         
         # Draw axes
@@ -214,10 +319,13 @@ class LissajousPreview:
                         (center_x, self.rect.y + 25), 
                         (center_x, self.rect.bottom - 10), 1)
         
-        # Draw Lissajous curve
-        if len(self.points) > 1:
-            for i in range(len(self.points) - 1):
-                alpha = int(255 * (i / len(self.points)))  # Fade effect
-                color = (0, alpha, 0)  # Green with fade
-                if alpha > 10:  # Only draw visible points
-                    pygame.draw.line(surface, color, self.points[i], self.points[i + 1], 2)
\ No newline at end of file
+        # Draw Lissajous curve, fading in along the path
+        # Consecutive segments share a color band and are drawn with one call
+        count = len(self.points)
+        if count > 1:
+            for band in range(PREVIEW_FADE_BANDS):
+                start = band * (count - 1) // PREVIEW_FADE_BANDS
+                end = (band + 1) * (count - 1) // PREVIEW_FADE_BANDS
+                alpha = int(255 * (band + 1) / PREVIEW_FADE_BANDS)  # Fade effect
+                if end > start and alpha > 10:  # Only draw visible bands
+                    pygame.draw.lines(surface, (0, alpha, 0), False, self.points[start:end + 1], 2)
\ No newline at end of file
@@ -0,0 +1,85 @@
+import struct
+import numpy as np
+
+# Registro binario de las entradas del usuario, para reproducirlas de forma determinista.
+#
+# Archivo: MAGIC seguido de registros de 18 bytes (little-endian):
+#   kind   uint8    tipo de registro (KIND_*)
+#   ident  uint8    índice del slider o de la combinación de frecuencias
+#   value  float64  valor nuevo (slider, modo, pausa) o dt de simulación (TICK)
+#   time   float64  tiempo de simulación cuando ocurrió
+# Cada cuadro termina con un TICK; los registros anteriores a él se aplican en ese cuadro.
+
+MAGIC = b"CRTLOG\x00\x01"
+
+KIND_TICK = 0     # Fin de cuadro: value = dt simulado
+KIND_SLIDER = 1   # ident = índice en main.sliders, value = valor nuevo
+KIND_MODE = 2     # value = 1.0 Lissajous, 0.0 manual
+KIND_GRID = 3     # ident = índice de la combinación de FrequencyGrid
+KIND_PAUSE = 4    # value = 1.0 pausado
+KIND_RESET = 5
+KIND_BEAM = 6     # value = 1.0 haz Monte Carlo activado
+KIND_FIELD = 7    # ident = índice del modelo de campo (main.FIELD_MODELS)
+KIND_WAVE = 8     # ident = 0 placas verticales, 1 horizontales; value = índice en WAVE_SHAPES
+KIND_ENGINE = 9   # value = 1.0 si la sesión simulaba Lissajous en el SimulationWorker
+
+KIND_NAMES = {
+    KIND_TICK: "tick",
+    KIND_SLIDER: "slider",
+    KIND_MODE: "mode",
+    KIND_GRID: "grid",
+    KIND_PAUSE: "pause",
+    KIND_RESET: "reset",
+    KIND_BEAM: "beam",
+    KIND_FIELD: "field",
+    KIND_WAVE: "wave",
+    KIND_ENGINE: "engine",
+}
+
+RECORD = struct.Struct("<BBdd")
+RECORD_DTYPE = np.dtype([("kind", "u1"), ("ident", "u1"), ("value", "<f8"), ("time", "<f8")])
+
+class InputRecorder:
+    """Escribe registros en un archivo de log con búfer (se vuelca al cerrar)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+
+    def write(self, kind, ident=0, value=0.0, sim_time=0.0):
+        self._file.write(RECORD.pack(kind, ident, value, sim_time))
+        self.records += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+def read_log(path):
+    """Lee un log completo como arreglo estructurado (campos kind, ident, value, time)."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} no es un log de entradas del simulador")
+        data = f.read()
+    usable = len(data) - len(data) % RECORD.size  # Un registro incompleto al final se descarta
+    return np.frombuffer(data[:usable], dtype=RECORD_DTYPE)
+
+def log_summary(records):
+    """Cantidad de registros por tipo y tiempo simulado total."""
+    kinds = np.bincount(records["kind"], minlength=len(KIND_NAMES))
+    ticks = records[records["kind"] == KIND_TICK]
+    return {
+        "frames": int(kinds[KIND_TICK]),
+        "simulated_s": float(ticks["value"].sum()),
+        "events": {KIND_NAMES[kind]: int(count) for kind, count in enumerate(kinds)
+                   if kind != KIND_TICK and kind in KIND_NAMES},
+    }
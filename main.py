@@ -1,69 +1,217 @@
 import pygame
 from pygame.locals import *
 from slider import Slider
+from parameters import ParameterRegistry
 from visualization import CRTVisualizer
 from grid_component import FrequencyGrid, LissajousPreview
+from beam_sampler import BeamSampler
+from simulation_worker import SimulationWorker
+from damage import DamageTracker
+from profiler import FrameProfiler
+from frame_export import FrameExporter
+from input_log import (InputRecorder, read_log, log_summary, KIND_TICK, KIND_SLIDER,
+                       KIND_MODE, KIND_GRID, KIND_PAUSE, KIND_RESET, KIND_BEAM, KIND_FIELD,
+                       KIND_WAVE, KIND_ENGINE)
+from text_cache import get_font, render_text
+from calculos import uniform_plates_field, fit_plates_voltage
+from field_solver import fringe_field
+from waveforms import WAVE_SHAPES, wave_label
 import numpy as np
 import math
+import argparse
+import os
+import time
 
 # Inicializar modo global
 mode = False
 
-# Variables globales para los controles
-V_acc = 1000
-V_vert = 0
-V_horiz = 0
-persistence = 1.0
-freq_v = 1.0
-freq_h = 1.0
-phase_v = 0
-phase_h = 0
+# Parámetros del simulador: tipo, rango, valor por defecto y observadores
+params = ParameterRegistry()
+params.define("V_acc", 1000, 500, 2000, label="V Aceleración", unit="V")
+params.define("V_vert", 0, -1000, 1000, label="V Vertical", unit="V")
+params.define("V_horiz", 0, -1000, 1000, label="V Horizontal", unit="V")
+params.define("persistence", 1.0, 0.1, 5.0, label="Persistencia", unit="s")
+params.define("freq_v", 1.0, 0.1, 10.0, label="Frecuencia Vertical", unit="Hz")
+params.define("freq_h", 1.0, 0.1, 10.0, label="Frecuencia Horizontal", unit="Hz")
+params.define("phase_v", 0.0, 0.0, 2 * math.pi, label="Fase Vertical", unit="rad")
+params.define("phase_h", 0.0, 0.0, 2 * math.pi, label="Fase Horizontal", unit="rad")
+# Formas de onda de las placas en modo Lissajous (índices en WAVE_SHAPES, teclas V y H)
+params.define("wave_v", 0, 0, len(WAVE_SHAPES) - 1, label="Onda Vertical", kind=int)
+params.define("wave_h", 0, 0, len(WAVE_SHAPES) - 1, label="Onda Horizontal", kind=int)
+
+# Parámetros que muestran los sliders, de arriba abajo
+SLIDER_PARAMETERS = ("V_acc", "V_vert", "V_horiz", "persistence", "freq_v", "freq_h")
+# Parámetros que dependen del modo: voltajes en manual, frecuencias en Lissajous
+MANUAL_PARAMETERS = ("V_vert", "V_horiz")
+LISSAJOUS_PARAMETERS = ("freq_v", "freq_h")
+# Parámetros que lee el hilo de simulación
+WORKER_PARAMETERS = ("V_acc", "freq_v", "freq_h", "phase_v", "phase_h", "wave_v", "wave_h")
+# Parámetros que cambian la curva del preview
+PREVIEW_PARAMETERS = ("freq_h", "freq_v", "phase_h", "phase_v", "wave_h", "wave_v")
+
+# Copias globales de los parámetros, al día mediante sync_globals. En modo Lissajous
+# V_vert y V_horiz son en cambio los voltajes instantáneos del haz.
+V_acc = params["V_acc"]
+V_vert = params["V_vert"]
+V_horiz = params["V_horiz"]
+persistence = params["persistence"]
+freq_v = params["freq_v"]
+freq_h = params["freq_h"]
+phase_v = params["phase_v"]
+phase_h = params["phase_h"]
+wave_v = params["wave_v"]
+wave_h = params["wave_h"]
+
+# Muestras del haz por segundo en modo Lissajous (independiente de los FPS)
+LISSAJOUS_SAMPLE_RATE = 10000
+# Voltaje pico de las placas en modo Lissajous: la figura entra en la pantalla aun con el
+# V_acc mínimo (los impactos fuera de ella se descartan) y se achica al subir V_acc
+LISSAJOUS_AMPLITUDE = 0.9 * fit_plates_voltage(params.parameters["V_acc"].minimum)
 
 sliders = []
 buttons = []
 frequency_grid = None
 lissajous_preview = None
+damage = None
+beam_sampler = BeamSampler(sample_rate=LISSAJOUS_SAMPLE_RATE, amplitude=LISSAJOUS_AMPLITUDE)
 
-def draw_ui(screen):
-    """Dibuja la interfaz de usuario con todos los controles."""
-    global V_acc, V_vert, V_horiz, persistence, freq_v, freq_h, mode
+# Simular el modo Lissajous en un hilo a paso fijo, independiente de los FPS del render
+USE_SIMULATION_THREAD = True
+simulation_worker = None
+
+# Haz Monte Carlo (tecla B): semilla fija para que la reproducción de un log sea idéntica
+BEAM_SEED = 0
+# Brillo del haz en modo manual por segundo de simulación (independiente de los FPS)
+BEAM_MANUAL_BRIGHTNESS = 3.0
+
+# Motores de la pantalla (tecla I): fórmulas analíticas o integración numérica del campo.
+# Cada modelo es (nombre, fábrica del campo): el mapa con bordes se resuelve al elegirlo.
+FIELD_MODELS = (
+    ("analítico", lambda: None),
+    ("integrado", lambda: uniform_plates_field),
+    ("bordes", fringe_field),
+)
+field_model = 0
+
+def reset_beam():
+    """Empieza a muestrear el haz desde el instante actual, sin recuperar el pasado."""
+    beam_sampler.reset(simulation_time)
+    if simulation_worker:
+        # El haz Monte Carlo necesita los voltajes de cada muestra: se muestrea en este hilo
+        simulation_worker.set_enabled(mode and not visualizer.beam_enabled)
+        simulation_worker.reset(simulation_time)
+
+# Registro de entradas para reproducir la sesión (--record / --replay)
+recorder = None
+
+def record_input(kind, ident=0, value=0.0):
+    """Guarda una entrada del usuario en el log, si se está grabando."""
+    if recorder:
+        recorder.write(kind, ident, value, simulation_time)
+
+# Tiempos por etapa de cada cuadro (F3 muestra/oculta el HUD)
+profiler = FrameProfiler()
+hud_rect = None
+
+# Capas estáticas pre-renderizadas: nombre -> (clave, Surface)
+static_layers = {}
+
+def get_static_layer(name, area, draw_static, *extra_key):
+    """
+    Devuelve una Surface con la parte estática de `area`, dibujada una sola vez.
+    Se vuelve a dibujar solo si cambian el área o extra_key (p. ej. el color de fondo).
+    draw_static(layer, offset) dibuja con coordenadas de pantalla desplazadas por offset.
+    """
+    key = (tuple(area),) + extra_key
+    cached = static_layers.get(name)
+    if cached is None or cached[0] != key:
+        layer = pygame.Surface(area.size)
+        draw_static(layer, (-area.x, -area.y))
+        cached = (key, layer)
+        static_layers[name] = cached
+    return cached[1]
+
+def invalidate_static_layers():
+    """Descarta las capas estáticas (por ejemplo tras cambiar el layout)."""
+    static_layers.clear()
+
+def draw_panel_static(layer, offset):
+    """Marco del panel de control: sombra, fondo, cabecera y títulos de sección."""
+    layer.fill(visualizer.colors['canvas'])
+    
+    def moved(rect):
+        return rect.move(offset)
     
     # Fondo del panel de control mejorado
     panel_rect = pygame.Rect(10, 10, 370, 800)  # Aumentar altura para el grid
     
     # Sombra del panel
     shadow_rect = pygame.Rect(12, 12, 370, 800)
-    pygame.draw.rect(screen, (200, 200, 210), shadow_rect, border_radius=8)
+    pygame.draw.rect(layer, (200, 200, 210), moved(shadow_rect), border_radius=8)
     
     # Panel principal con gradiente simulado
-    pygame.draw.rect(screen, (245, 248, 252), panel_rect, border_radius=8)
-    pygame.draw.rect(screen, (180, 190, 200), panel_rect, 2, border_radius=8)
+    pygame.draw.rect(layer, (245, 248, 252), moved(panel_rect), border_radius=8)
+    pygame.draw.rect(layer, (180, 190, 200), moved(panel_rect), 2, border_radius=8)
     
     # Barra superior del panel
     header_rect = pygame.Rect(10, 10, 370, 50)
-    pygame.draw.rect(screen, (65, 105, 225), header_rect, border_top_left_radius=8, border_top_right_radius=8)
+    pygame.draw.rect(layer, (65, 105, 225), moved(header_rect), border_top_left_radius=8, border_top_right_radius=8)
     
     # Título del panel
-    font_title = pygame.font.SysFont('Arial', 24, bold=True)
-    title = font_title.render("CONTROLES CRT", True, (255, 255, 255))
+    font_title = get_font('Arial', 24, bold=True)
+    title = render_text(font_title, "CONTROLES CRT", (255, 255, 255))
     title_x = header_rect.centerx - title.get_width() // 2
-    screen.blit(title, (title_x, 25))
+    layer.blit(title, moved(pygame.Rect(title_x, 25, 0, 0)))
+    
+    # Sección de botones 
+    buttons_y = 350  # Mover botones más arriba para hacer espacio al grid
+    font_section = get_font('Arial', 20, bold=True)
+    section_title = render_text(font_section, "ACCIONES", (60, 70, 80))
+    layer.blit(section_title, moved(pygame.Rect(30, buttons_y - 25, 0, 0)))
+    
+    # Información de estado 
+    status_y = 430
+    section_title = render_text(font_section, "ESTADO", (60, 70, 80))
+    layer.blit(section_title, moved(pygame.Rect(30, status_y, 0, 0)))
+    
+    # Valores actuales en una caja
+    values_rect = pygame.Rect(25, status_y + 50, 330, 140)
+    pygame.draw.rect(layer, (240, 245, 250), moved(values_rect), border_radius=6)
+    pygame.draw.rect(layer, (200, 210, 220), moved(values_rect), 1, border_radius=6)
+
+def draw_ui(screen, damage=None):
+    """Dibuja la interfaz de usuario con todos los controles."""
+    global V_acc, V_vert, V_horiz, persistence, freq_v, freq_h, mode
+    
+    mouse_pos = pygame.mouse.get_pos()
+    values_text = [
+        f"Aceleración: {V_acc:.0f} V",
+        f"Vertical: {V_vert:.1f} V",
+        f"Horizontal: {V_horiz:.1f} V", 
+        f"Persistencia: {persistence:.1f} s",
+        f"Freq V: {freq_v:.1f} Hz",
+        f"Freq H: {freq_h:.1f} Hz"
+    ]
+    
+    # Marco del panel (cacheado; incluye la sombra de 2 px)
+    panel_area = pygame.Rect(10, 10, 372, 802)
+    if damage is not None:
+        signature = (mode, tuple(values_text),
+                     tuple(button['rect'].collidepoint(mouse_pos) for button in buttons),
+                     tuple((slider.value, slider.disabled) for slider in sliders))
+        if not damage.needs_redraw('panel', panel_area, signature):
+            return
+    
+    screen.blit(get_static_layer('panel', panel_area, draw_panel_static, visualizer.colors['canvas']), panel_area)
     
     # Dibujar sliders
     for slider in sliders:
         slider.draw(screen, title_font_size=18, value_font_size=16, 
                    title_offset_y=22, value_offset_y=12, line_thickness=4, handle_radius=8)
     
-    # Sección de botones 
-    buttons_y = 350  # Mover botones más arriba para hacer espacio al grid
-    font_section = pygame.font.SysFont('Arial', 20, bold=True)
-    section_title = font_section.render("ACCIONES", True, (60, 70, 80))
-    screen.blit(section_title, (30, buttons_y - 25))
-    
     # Dibujar botones
-    font_btn = pygame.font.SysFont('Arial', 16, bold=True)
+    font_btn = get_font('Arial', 16, bold=True)
     for i, button in enumerate(buttons):
-        mouse_pos = pygame.mouse.get_pos()
         is_hovered = button['rect'].collidepoint(mouse_pos)
         
         # Colores según el tipo de botón y estado
@@ -94,41 +242,25 @@ def draw_ui(screen):
     
     # Información de estado 
     status_y = 430
-    font_section = pygame.font.SysFont('Arial', 20, bold=True)
-    section_title = font_section.render("ESTADO", True, (60, 70, 80))
-    screen.blit(section_title, (30, status_y))
     
     # Estado del modo con indicador visual
     mode_status = "LISSAJOUS" if mode else "MANUAL"
     mode_color = (46, 125, 50) if mode else (211, 47, 47)
     
-    font_status = pygame.font.SysFont('Arial', 18, bold=True)
-    mode_text = font_status.render(f"MODO: {mode_status}", True, mode_color)
+    font_status = get_font('Arial', 18, bold=True)
+    mode_text = render_text(font_status, f"MODO: {mode_status}", mode_color)
     screen.blit(mode_text, (30, status_y + 25))
     
-    # Valores actuales en una caja
-    values_rect = pygame.Rect(25, status_y + 50, 330, 140)
-    pygame.draw.rect(screen, (240, 245, 250), values_rect, border_radius=6)
-    pygame.draw.rect(screen, (200, 210, 220), values_rect, 1, border_radius=6)
-    
-    font_values = pygame.font.SysFont('Arial', 14)
-    values_text = [
-        f"Aceleración: {V_acc:.0f} V",
-        f"Vertical: {V_vert:.1f} V",
-        f"Horizontal: {V_horiz:.1f} V", 
-        f"Persistencia: {persistence:.1f} s",
-        f"Freq V: {freq_v:.1f} Hz",
-        f"Freq H: {freq_h:.1f} Hz"
-    ]
-    
+    # Valores actuales (la caja es parte de la capa estática)
+    font_values = get_font('Arial', 14)
     for i, text in enumerate(values_text):
-        value = font_values.render(text, True, (60, 70, 80))
+        value = render_text(font_values, text, (60, 70, 80))
         screen.blit(value, (35, status_y + 65 + i * 20))
 
-def draw_voltage_displays(screen, V_vert, V_horiz):
+def draw_voltage_displays(screen, V_vert, V_horiz, damage=None):
     """Dibuja displays de voltaje para las vistas con mejor diseño."""
-    font = pygame.font.SysFont('Arial', 20, bold=True)
-    small_font = pygame.font.SysFont('Arial', 14, bold=True)
+    font = get_font('Arial', 20, bold=True)
+    small_font = get_font('Arial', 14, bold=True)
     
     # Posiciones ajustadas para las vistas
     displays = [
@@ -138,6 +270,14 @@ def draw_voltage_displays(screen, V_vert, V_horiz):
     
     for display in displays:
         rect = display["rect"]
+        value_text = f"{display['value']:.1f} V"
+        
+        # Solo redibujar si cambió el texto mostrado
+        area = pygame.Rect(rect.x, rect.y, rect.width + 2, rect.height + 2)
+        if damage is not None:
+            if not damage.needs_redraw(display["title"], area, value_text):
+                continue
+            screen.fill(visualizer.colors['canvas'], area)
         
         # Sombra
         shadow_rect = pygame.Rect(rect.x + 2, rect.y + 2, rect.width, rect.height)
@@ -148,161 +288,247 @@ def draw_voltage_displays(screen, V_vert, V_horiz):
         pygame.draw.rect(screen, display["color"], rect, 3, border_radius=8)
         
         # Título
-        title = small_font.render(display["title"], True, (60, 70, 80))
+        title = render_text(small_font, display["title"], (60, 70, 80))
         title_rect = title.get_rect(centerx=rect.centerx, y=rect.y + 8)
         screen.blit(title, title_rect)
         
         # Valor
-        value_text = f"{display['value']:.1f} V"
-        value = font.render(value_text, True, display["color"])
+        value = render_text(font, value_text, display["color"])
         value_rect = value.get_rect(centerx=rect.centerx, y=rect.y + 26)
         screen.blit(value, value_rect)
 
+VIEW_LABELS = [
+    {"text": "Vista Lateral", "pos": (470, 25), "color": (46, 125, 50)},
+    {"text": "Vista Superior", "pos": (720, 25), "color": (255, 152, 0)},
+    {"text": "Pantalla del CRT", "pos": (560, 420), "color": (65, 105, 225)}
+]
+
+# Color de fondo de la ventana antes de dibujar las vistas
+WINDOW_BACKGROUND = (235, 240, 245)
+
 def draw_view_labels(screen):
     """Dibuja etiquetas mejoradas para las vistas."""
-    font = pygame.font.SysFont('Arial', 16, bold=True)
+    font = get_font('Arial', 16, bold=True)
     
-    # Etiquetas con fondo
-    labels = [
-        {"text": "Vista Lateral", "pos": (470, 25), "color": (46, 125, 50)},
-        {"text": "Vista Superior", "pos": (720, 25), "color": (255, 152, 0)},
-        {"text": "Pantalla del CRT", "pos": (560, 420), "color": (65, 105, 225)}
-    ]
-    
-    for label in labels:
-        text = font.render(label["text"], True, label["color"])
-        
-        # Fondo semi-transparente
+    # Etiquetas con fondo, cada una pre-renderizada como capa estática
+    for label in VIEW_LABELS:
+        text_width, text_height = font.size(label["text"])
         bg_rect = pygame.Rect(label["pos"][0] - 5, label["pos"][1] - 2, 
-                             text.get_width() + 10, text.get_height() + 4)
-        pygame.draw.rect(screen, (255, 255, 255, 200), bg_rect, border_radius=4)
-        pygame.draw.rect(screen, label["color"], bg_rect, 2, border_radius=4)
+                             text_width + 10, text_height + 4)
+        
+        def draw_label(layer, offset, label=label, bg_rect=bg_rect):
+            layer.fill(WINDOW_BACKGROUND)
+            text = render_text(font, label["text"], label["color"])
+            
+            # Fondo semi-transparente
+            pygame.draw.rect(layer, (255, 255, 255, 200), bg_rect.move(offset), border_radius=4)
+            pygame.draw.rect(layer, label["color"], bg_rect.move(offset), 2, border_radius=4)
+            
+            layer.blit(text, (label["pos"][0] + offset[0], label["pos"][1] + offset[1]))
         
-        screen.blit(text, label["pos"])
+        screen.blit(get_static_layer(f"label:{label['text']}", bg_rect, draw_label), bg_rect)
         
 def reset_values():
     """Resetea todos los valores a sus valores por defecto."""
-    global V_acc, V_vert, V_horiz, persistence, freq_v, freq_h, phase_v, phase_h, mode, simulation_time
-    
-    # Valores por defecto
-    V_acc = 1000
-    V_vert = 0
-    V_horiz = 0
-    persistence = 1.0
-    freq_v = 1.0
-    freq_h = 1.0
-    phase_v = 0
-    phase_h = 0
+    global mode, simulation_time
+    
+    record_input(KIND_RESET)
+    
+    # Valores por defecto; los observadores actualizan sliders, preview e hilo
     mode = False
+    params.reset()
+    restore_plate_voltages()
+    update_slider_states()
     simulation_time = 0  # Reset simulation time
-    
-    # Actualizar sliders a los valores por defecto
-    for slider in sliders:
-        if "Aceleración" in slider.title:
-            slider.value = V_acc
-        elif "Vertical" in slider.title:
-            slider.value = V_vert
-        elif "Horizontal" in slider.title:
-            slider.value = V_horiz
-        elif "Persistencia" in slider.title:
-            slider.value = persistence
-        elif "Frecuencia Vertical" in slider.title:
-            slider.value = freq_v
-        elif "Frecuencia Horizontal" in slider.title:
-            slider.value = freq_h
+    visualizer.reset_clock(simulation_time)
+    reset_beam()
     
     # Actualizar texto del botón de modo
-    font_btn = pygame.font.SysFont('Arial', 16, bold=True)
+    font_btn = get_font('Arial', 16, bold=True)
     for button in buttons:
         if button['id'] == 'mode':
             button_text = "Modo Lissajous" if not mode else "Modo Manual"
-            button['text'] = font_btn.render(button_text, True, (255, 255, 255))
+            button['text'] = render_text(font_btn, button_text, (255, 255, 255))
     
     # Limpiar pantalla del visualizador
     visualizer.clear_all_points()
+    damage.force_full_redraw()
     
     # Reset grid selection
     if frequency_grid:
         frequency_grid.selected_combo = None
 
+def sync_globals(changed):
+    """Observador: copia los parámetros que cambiaron a sus variables globales."""
+    global V_acc, V_vert, V_horiz, persistence, freq_v, freq_h, phase_v, phase_h, wave_v, wave_h
+    
+    V_acc = changed.get("V_acc", V_acc)
+    persistence = changed.get("persistence", persistence)
+    freq_v = changed.get("freq_v", freq_v)
+    freq_h = changed.get("freq_h", freq_h)
+    phase_v = changed.get("phase_v", phase_v)
+    phase_h = changed.get("phase_h", phase_h)
+    wave_v = changed.get("wave_v", wave_v)
+    wave_h = changed.get("wave_h", wave_h)
+    if not mode:  # En Lissajous los voltajes de placa los fija el haz
+        V_vert = changed.get("V_vert", V_vert)
+        V_horiz = changed.get("V_horiz", V_horiz)
+
+def sync_sliders(changed):
+    """Observador: mueve los sliders de los parámetros que cambiaron."""
+    for slider in sliders:
+        if slider.name in changed:
+            slider.set_value(changed[slider.name])
+
+def sync_preview(changed):
+    """Observador: recalcula el preview solo si cambió una frecuencia, una fase o una forma de onda."""
+    lissajous_preview.update_preview(params["freq_h"], params["freq_v"],
+                                     params["phase_h"], params["phase_v"],
+                                     WAVE_SHAPES[params["wave_h"]], WAVE_SHAPES[params["wave_v"]])
+
+def sync_worker(changed):
+    """Observador: pasa al hilo de simulación los parámetros que cambiaron."""
+    simulation_worker.set_params(**changed)
+
+def connect_parameters():
+    """Conecta los observadores del registro con los componentes creados en setup_app."""
+    params.clear_observers()
+    params.observe(None, sync_globals)
+    params.observe(SLIDER_PARAMETERS, sync_sliders)
+    params.observe(PREVIEW_PARAMETERS, sync_preview)
+    if simulation_worker:
+        params.observe(WORKER_PARAMETERS, sync_worker)
+        simulation_worker.set_params(**params.values(WORKER_PARAMETERS))
+
+def restore_plate_voltages():
+    """Vuelve V_vert y V_horiz a los valores de los sliders (al salir del modo Lissajous)."""
+    global V_vert, V_horiz
+    
+    V_vert = params["V_vert"]
+    V_horiz = params["V_horiz"]
+
+def update_slider_states():
+    """Habilita los sliders de voltaje en modo manual y los de frecuencia en Lissajous."""
+    for slider in sliders:
+        if slider.name in MANUAL_PARAMETERS:
+            slider.set_disabled(mode)
+        elif slider.name in LISSAJOUS_PARAMETERS:
+            slider.set_disabled(not mode)
+
+def set_slider_value(index, value):
+    """Fija el valor del slider `index` como si el usuario lo hubiera arrastrado."""
+    record_input(KIND_SLIDER, index, value)
+    params.set(sliders[index].name, value)
+
+def select_frequency_combo(combo):
+    """Aplica una combinación de frecuencias elegida en el grid."""
+    record_input(KIND_GRID, combo['index'])
+    frequency_grid.selected_combo = combo
+    # Una sola notificación para las dos frecuencias (un solo recálculo del preview)
+    params.update(freq_h=combo['freq_h'], freq_v=combo['freq_v'])
+
+def toggle_mode():
+    """Cambia entre el modo manual y el modo Lissajous."""
+    global mode
+    
+    mode = not mode
+    record_input(KIND_MODE, value=float(mode))
+    if not mode:
+        restore_plate_voltages()
+    reset_beam()
+    
+    # Actualizar texto del botón
+    font_btn = get_font('Arial', 16, bold=True)
+    button_text = "Modo Manual" if mode else "Modo Lissajous"
+    for button in buttons:
+        if button['id'] == 'mode':
+            button['text'] = render_text(font_btn, button_text, (255, 255, 255))
+    
+    # Actualizar estado de sliders según el modo
+    update_slider_states()
+
+def toggle_beam():
+    """Activa o desactiva el haz Monte Carlo con dispersión de energía y divergencia (tecla B)."""
+    enabled = not visualizer.beam_enabled
+    record_input(KIND_BEAM, value=float(enabled))
+    visualizer.set_beam(enabled, seed=BEAM_SEED)
+    reset_beam()
+
+def set_field_model(index):
+    """Usa el modelo de campo FIELD_MODELS[index] en la pantalla, el haz y el hilo."""
+    global field_model
+    
+    field_model = index
+    label, make_field = FIELD_MODELS[index]
+    field = make_field()
+    visualizer.set_field(field, label)
+    if simulation_worker:
+        simulation_worker.set_field(field)
+
+def set_waveform(plates, index):
+    """Forma de onda WAVE_SHAPES[index] para las placas verticales (0) u horizontales (1)."""
+    record_input(KIND_WAVE, plates, index)
+    params.set("wave_v" if plates == 0 else "wave_h", index)
+
+def cycle_waveform(plates):
+    """Pasa a la siguiente forma de onda de las placas verticales (tecla V) u horizontales (H)."""
+    current = params["wave_v" if plates == 0 else "wave_h"]
+    set_waveform(plates, (current + 1) % len(WAVE_SHAPES))
+
+def cycle_field_model():
+    """Pasa al siguiente modelo de campo (tecla I)."""
+    index = (field_model + 1) % len(FIELD_MODELS)
+    record_input(KIND_FIELD, index)
+    set_field_model(index)
+
+def toggle_pause():
+    global paused
+    
+    paused = not paused
+    record_input(KIND_PAUSE, value=float(paused))
+    if simulation_worker:
+        simulation_worker.set_paused(paused)
+
 def handle_ui_events(event):
     """Maneja los eventos de la interfaz de usuario."""
-    global V_acc, V_vert, V_horiz, persistence, freq_v, freq_h, mode
-    
     # Manejar eventos del grid de frecuencias
     if frequency_grid and mode:  # Solo activo en modo Lissajous
         selected_combo = frequency_grid.handle_event(event)
         if selected_combo:
-            freq_h = selected_combo['freq_h']
-            freq_v = selected_combo['freq_v']
-            
-            # Actualizar sliders de frecuencia
-            for slider in sliders:
-                if "Frecuencia Horizontal" in slider.title:
-                    slider.value = freq_h
-                elif "Frecuencia Vertical" in slider.title:
-                    slider.value = freq_v
-            
-            # Actualizar preview
-            if lissajous_preview:
-                lissajous_preview.update_preview(freq_h, freq_v, phase_h, phase_v)
+            select_frequency_combo(selected_combo)
     
-    for slider in sliders:
+    for index, slider in enumerate(sliders):
         if slider.handle_event(event):
-            slider_name = slider.title.split(":")[0].lower().replace(" ", "_")
-            if slider_name == "v_aceleración":
-                V_acc = slider.value
-            elif slider_name == "v_vertical":
-                V_vert = slider.value
-            elif slider_name == "v_horizontal":
-                V_horiz = slider.value
-            elif slider_name == "persistencia":
-                persistence = slider.value
-            elif slider_name == "frecuencia_vertical":
-                freq_v = slider.value
-                if lissajous_preview:
-                    lissajous_preview.update_preview(freq_h, freq_v, phase_h, phase_v)
-            elif slider_name == "frecuencia_horizontal":
-                freq_h = slider.value
-                if lissajous_preview:
-                    lissajous_preview.update_preview(freq_h, freq_v, phase_h, phase_v)
+            record_input(KIND_SLIDER, index, slider.value)
+            params.set(slider.name, slider.value)
     
     if event.type == MOUSEBUTTONDOWN and event.button == 1:
         for button in buttons:
             if button['rect'].collidepoint(event.pos):
                 if button['id'] == 'mode':
-                    mode = not mode
-                    # Actualizar texto del botón
-                    font_btn = pygame.font.SysFont('Arial', 16, bold=True)
-                    button_text = "Modo Manual" if mode else "Modo Lissajous"
-                    button['text'] = font_btn.render(button_text, True, (255, 255, 255))
-                    
-                    # Actualizar estado de sliders según el modo
-                    for slider in sliders:
-                        if slider.title.startswith(("V Vertical", "V Horizontal")):
-                            slider.set_disabled(mode)
-                        elif slider.title.startswith("Frecuencia"):
-                            slider.set_disabled(not mode)
-                            
+                    toggle_mode()
                 elif button['id'] == 'reset':
                     reset_values()
                     
                 return True
     
     if event.type == KEYDOWN and event.key == K_SPACE:
-        global paused
-        paused = not paused
+        toggle_pause()
     
     return False
 
-def main():
-    global V_acc, V_vert, V_horiz, persistence, mode, freq_v, freq_h, sliders, buttons, visualizer, paused
-    global frequency_grid, lissajous_preview, simulation_time
-
-    # Inicializar pygame
-    pygame.init()
-    screen = pygame.display.set_mode((1400, 900))
-    pygame.display.set_caption("Simulación de un Tubo de Rayos Catódicos")
+def setup_app(screen, threaded=USE_SIMULATION_THREAD, realtime=True):
+    """
+    Crea el visualizador, los componentes de frecuencia, los sliders y los botones.
+    Con threaded=True el modo Lissajous se simula en un SimulationWorker; con
+    realtime=False su hilo no arranca y update_simulation lo avanza a paso fijo
+    hasta el tiempo simulado (así se reproduce un log grabado con el hilo).
+    """
+    global sliders, buttons, visualizer, paused, frequency_grid, lissajous_preview
+    global simulation_time, last_manual_update, damage, simulation_worker
+    
+    # Seguimiento de regiones cambiadas; el primer cuadro es completo
+    damage = DamageTracker()
     
     # Inicializar visualizador CRT
     visualizer = CRTVisualizer()
@@ -315,167 +541,458 @@ def main():
     # Inicializar componentes de frecuencia
     frequency_grid = FrequencyGrid(1000, 400, 350, 250, "Ratios de Frecuencia")
     lissajous_preview = LissajousPreview(1000, 680, 150)
+    # Curvas de todas las razones del grid listas desde el inicio
+    lissajous_preview.precompute((combo['freq_h'], combo['freq_v'])
+                                 for combo in frequency_grid.freq_combinations)
     
     # Crear sliders con mejor espaciado para evitar superposición
     sliders.clear()
     y_start = 85
     spacing = 44 
     
-    sliders.append(Slider(30, y_start, 310, 15, 500, 2000, V_acc, title="V Aceleración", unit="V"))
-    sliders.append(Slider(30, y_start + spacing, 310, 15, -1000, 1000, V_vert, title="V Vertical", unit="V"))
-    sliders.append(Slider(30, y_start + spacing*2, 310, 15, -1000, 1000, V_horiz, title="V Horizontal", unit="V"))
-    sliders.append(Slider(30, y_start + spacing*3, 310, 15, 0.1, 5.0, persistence, title="Persistencia", unit="s"))
-    sliders.append(Slider(30, y_start + spacing*4, 310, 15, 0.1, 10.0, freq_v, title="Frecuencia Vertical", unit="Hz"))
-    sliders.append(Slider(30, y_start + spacing*5, 310, 15, 0.1, 10.0, freq_h, title="Frecuencia Horizontal", unit="Hz"))
+    for i, name in enumerate(SLIDER_PARAMETERS):
+        parameter = params.parameters[name]
+        sliders.append(Slider(30, y_start + spacing*i, 310, 15, parameter.minimum, parameter.maximum,
+                              parameter.value, title=parameter.label, unit=parameter.unit, name=name))
     
     # Crear botones
     buttons.clear()
-    font_btn = pygame.font.SysFont('Arial', 16, bold=True)
+    font_btn = get_font('Arial', 16, bold=True)
     
     button_text = "Modo Lissajous" if not mode else "Modo Manual"
     buttons.append({
         'id': 'mode',
         'rect': pygame.Rect(30, 370, 140, 38),
-        'text': font_btn.render(button_text, True, (255, 255, 255))
+        'text': render_text(font_btn, button_text, (255, 255, 255))
     })
     
     buttons.append({
         'id': 'reset',
         'rect': pygame.Rect(180, 370, 140, 38),
-        'text': font_btn.render("Reset", True, (255, 255, 255))
+        'text': render_text(font_btn, "Reset", (255, 255, 255))
     })
     
-    # Configurar estado inicial de sliders
-    for slider in sliders:
-        if slider.title.startswith("Frecuencia"):
-            slider.set_disabled(True)  # Inicialmente deshabilitados
+    # Configurar estado inicial de sliders (frecuencias deshabilitadas en modo manual)
+    update_slider_states()
     
-    clock = pygame.time.Clock()
-    running = True
     paused = False
     
     # FIXED: Initialize simulation time properly
     simulation_time = 0.0
     last_manual_update = 0.0
     
-    # Actualizar preview inicial
-    lissajous_preview.update_preview(freq_h, freq_v, phase_h, phase_v)
+    if simulation_worker:
+        simulation_worker.stop()
+    simulation_worker = None
+    if threaded:
+        simulation_worker = SimulationWorker(sample_rate=LISSAJOUS_SAMPLE_RATE, amplitude=LISSAJOUS_AMPLITUDE)
+        if realtime:
+            simulation_worker.start()
+    reset_beam()
+    connect_parameters()
+    set_field_model(field_model)
     
-    while running:
-        dt = clock.tick(60) / 1000.0  # Delta time en segundos
-        
+    # Actualizar preview inicial
+    sync_preview(params.values(PREVIEW_PARAMETERS))
+
+def draw_frame(screen):
+    """
+    Dibuja las vistas del CRT, los displays y la interfaz de usuario.
+    Solo se redibujan las regiones cuyo estado cambió (ver DamageTracker).
+    """
+    # Cambiar de modo o pausar altera toda la ventana
+    damage.check_layout((mode, paused, visualizer.beam_enabled, field_model, wave_v, wave_h))
+    
+    if damage.full_redraw:
         # Fondo con gradiente simulado
-        screen.fill((235, 240, 245))
+        screen.fill(WINDOW_BACKGROUND)
         
         # Dibujar etiquetas de las vistas
-        draw_view_labels(screen)
-        
-        # FIXED: Set visualizer mode properly
-        mode_text = "Lissajous" if mode else "Manual"
-        visualizer.set_mode(mode_text)
-        
-        # Dibujar las vistas del CRT
-        visualizer.draw_all_views(screen, V_acc, V_vert, V_horiz, persistence, mode_text)
-        
-        # Dibujar displays de voltaje
-        draw_voltage_displays(screen, V_vert, V_horiz)
+        with profiler.stage("draw_view_labels"):
+            draw_view_labels(screen)
+    
+    # FIXED: Set visualizer mode properly
+    mode_text = "Lissajous" if mode else "Manual"
+    visualizer.set_mode(mode_text)
+    
+    # Dibujar las vistas del CRT
+    with profiler.stage("draw_all_views"):
+        visualizer.draw_all_views(screen, V_acc, V_vert, V_horiz, persistence, mode_text, damage=damage,
+                                  sim_time=simulation_time)
+    
+    # Dibujar displays de voltaje
+    with profiler.stage("draw_voltage_displays"):
+        draw_voltage_displays(screen, V_vert, V_horiz, damage=damage)
+    
+    # Dibujar la interfaz de usuario
+    with profiler.stage("draw_ui"):
+        draw_ui(screen, damage=damage)
+    
+    # Dibujar grid de frecuencias y preview solo en modo Lissajous
+    if mode:
+        with profiler.stage("frequency_grid"):
+            # El área del grid incluye la línea de selección debajo del panel
+            grid_area = pygame.Rect(frequency_grid.rect.x, frequency_grid.rect.y,
+                                    frequency_grid.rect.width, frequency_grid.rect.height + 30)
+            hovered = frequency_grid.hovered_combo['index'] if frequency_grid.hovered_combo else None
+            selected = frequency_grid.selected_combo['index'] if frequency_grid.selected_combo else None
+            if damage.needs_redraw('frequency_grid', grid_area, (hovered, selected)):
+                screen.fill(visualizer.colors['canvas'], grid_area)
+                frequency_grid.draw(screen)
+            
+            if damage.needs_redraw('lissajous_preview', lissajous_preview.rect, lissajous_preview.revision):
+                screen.fill(visualizer.colors['canvas'], lissajous_preview.rect)
+                lissajous_preview.draw(screen)
+
+def draw_overlays(screen):
+    """Dibuja el indicador de pausa y las instrucciones inferiores."""
+    # No cambian entre redibujados completos
+    if not damage.full_redraw:
+        return
+    
+    # Indicador de pausa mejorado
+    if paused:
+        font = get_font('Arial', 28, bold=True)
+        pause_text = render_text(font, "PAUSADO - Presiona ESPACIO para continuar", (211, 47, 47))
         
-        # Dibujar la interfaz de usuario
-        draw_ui(screen)
+        # Fondo semi-transparente para el texto
+        text_rect = pause_text.get_rect(center=(700, 25))
+        bg_rect = pygame.Rect(text_rect.x - 8, text_rect.y - 4, 
+                            text_rect.width + 16, text_rect.height + 8)
+        pygame.draw.rect(screen, (255, 255, 255, 200), bg_rect, border_radius=6)
+        pygame.draw.rect(screen, (211, 47, 47), bg_rect, 2, border_radius=6)
         
-        # Dibujar grid de frecuencias y preview solo en modo Lissajous
-        if mode:
-            frequency_grid.draw(screen)
-            lissajous_preview.draw(screen)
+        screen.blit(pause_text, text_rect)
+    
+    # Instrucciones en la parte inferior - ACTUALIZADO
+    if mode:
+        mode_text = f"Lissajous (ondas V: {wave_label(wave_v)}, H: {wave_label(wave_h)})"
+    else:
+        mode_text = "Manual (mover sliders para ver efecto)"
+    instructions = [
+        "Controles: ESPACIO = Pausa/Resume, R = Reset, B = Haz Monte Carlo, I = Motor de campo, "
+        "V/H = Forma de onda, F3 = Tiempos por etapa",
+        f"Modo: {mode_text}"
+    ]
+    
+    font_instructions = get_font('Arial', 12)
+    for i, instruction in enumerate(instructions):
+        text = render_text(font_instructions, instruction, (60, 70, 80))
+        screen.blit(text, (400, screen.get_height() - 40 + i * 15))
+
+def draw_profiler_hud(screen):
+    """Dibuja el HUD del perfilador encima de todo (solo si está visible)."""
+    global hud_rect
+    
+    rect = profiler.draw_hud(screen)
+    if rect is not None:
+        if hud_rect is not None and rect != hud_rect:
+            damage.force_full_redraw()  # Cambió el tamaño: borrar el HUD anterior
+        damage.mark(rect)
+    hud_rect = rect
+
+def toggle_profiler():
+    """Muestra u oculta el HUD de tiempos por etapa (tecla F3); el CSV sigue escribiéndose."""
+    profiler.toggle_hud()
+    # Al ocultar el HUD hay que redibujar lo que tapaba
+    damage.force_full_redraw()
+
+def present_frame():
+    """Envía a la ventana las regiones que cambiaron en este cuadro."""
+    damage.present()
+
+def update_simulation(dt):
+    """Avanza la simulación dt segundos y agrega los impactos del haz a la pantalla."""
+    global V_vert, V_horiz, simulation_time, last_manual_update
+    
+    # FIXED: Proper simulation updates
+    if paused:
+        return
+    
+    simulation_time += dt
+    
+    if mode and simulation_worker and not visualizer.beam_enabled:  # Modo Lissajous, simulado en el hilo
+        if not simulation_worker.running:
+            simulation_worker.advance_to(simulation_time)  # Reproducción: pasos fijos sin hilo
+        # Impactos generados por el hilo desde el cuadro anterior
+        x_pos, y_pos, _, (v_vert, v_horiz) = simulation_worker.drain()
+        if len(x_pos):
+            V_vert, V_horiz = v_vert, v_horiz
+            visualizer.add_screen_points(x_pos, y_pos, brightness=simulation_worker.brightness,
+                                         mode="lissajous", sim_time=simulation_time)
+    
+    elif mode:  # Modo Lissajous
+        # Todas las muestras del haz desde el cuadro anterior, en un solo cálculo
+        times, v_vert_samples, v_horiz_samples = beam_sampler.sample(
+            simulation_time, freq_v, freq_h, phase_v, phase_h, wave_v, wave_h)
         
-        # Manejar eventos
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == KEYDOWN:
-                if event.key == K_SPACE:
-                    paused = not paused
-                elif event.key == K_r:  # Tecla R para reset
-                    reset_values()
+        if len(times):
+            V_vert = float(v_vert_samples[-1])
+            V_horiz = float(v_horiz_samples[-1])
+            
+            if visualizer.beam_enabled:
+                visualizer.add_beam_samples(V_acc, v_vert_samples, v_horiz_samples,
+                                            brightness=0.9, mode="lissajous")
             else:
-                handle_ui_events(event)
+                x_pos, y_pos = visualizer.calculate_electron_positions(V_acc, v_vert_samples, v_horiz_samples)
+                visualizer.add_screen_points(x_pos, y_pos, brightness=0.9, mode="lissajous",
+                                             sim_time=simulation_time)
         
-        # Actualizar estado de los sliders según el modo
-        for slider in sliders:
-            if "Aceleración" in slider.title:
-                V_acc = slider.value
-            elif "Vertical" in slider.title and not mode:
-                V_vert = slider.value
-            elif "Horizontal" in slider.title and not mode:
-                V_horiz = slider.value
-            elif "Persistencia" in slider.title:
-                persistence = slider.value
-            elif "Frecuencia Vertical" in slider.title and mode:
-                freq_v = slider.value
-            elif "Frecuencia Horizontal" in slider.title and mode:
-                freq_h = slider.value
+    elif visualizer.beam_enabled:  # Modo manual con haz Monte Carlo: emite en cada cuadro
+        visualizer.add_beam_samples(V_acc, V_vert, V_horiz,
+                                    brightness=BEAM_MANUAL_BRIGHTNESS * dt, mode="manual")
         
-        # FIXED: Proper simulation updates
-        if not paused:
-            simulation_time += dt
-            
-            if mode:  # Modo Lissajous
-                # Generate sinusoidal voltages with proper amplitude
-                amplitude = 800  # Maximum voltage for plates
-                
-                V_vert = amplitude * math.sin(2 * math.pi * freq_v * simulation_time + phase_v)
-                V_horiz = amplitude * math.sin(2 * math.pi * freq_h * simulation_time + phase_h)
-                
-                # Calculate electron position at current time
-                x_pos, y_pos = visualizer.calculate_electron_position(V_acc, V_vert, V_horiz, 0)
-                
-                # FIXED: Add points more frequently for smoother curves
-                if simulation_time - getattr(visualizer, 'last_lissajous_point_time', 0) > 0.01:  # Every 10ms
-                    visualizer.add_screen_point(x_pos, y_pos, brightness=0.9, mode="lissajous")
-                    visualizer.last_lissajous_point_time = simulation_time
-                
-            else:  # Modo manual
-                # Calculate position based on current voltage settings
-                x_pos, y_pos = visualizer.calculate_electron_position(V_acc, V_vert, V_horiz, 0)
-                
-                # FIXED: Add points when voltages change or periodically
-                if (simulation_time - last_manual_update > 0.05 or  # Every 50ms
-                    not hasattr(visualizer, 'last_manual_pos') or
-                    abs(x_pos - getattr(visualizer, 'last_manual_pos', (0,0))[0]) > 0.001 or
-                    abs(y_pos - getattr(visualizer, 'last_manual_pos', (0,0))[1]) > 0.001):
-                    
-                    visualizer.add_screen_point(x_pos, y_pos, brightness=1.0, mode="manual")
-                    visualizer.last_manual_pos = (x_pos, y_pos)
-                    last_manual_update = simulation_time
+    else:  # Modo manual
+        # Calculate position based on current voltage settings
+        x_pos, y_pos = visualizer.calculate_electron_position(V_acc, V_vert, V_horiz, 0)
         
-        # Indicador de pausa mejorado
-        if paused:
-            font = pygame.font.SysFont('Arial', 28, bold=True)
-            pause_text = font.render("PAUSADO - Presiona ESPACIO para continuar", True, (211, 47, 47))
+        # FIXED: Add points when voltages change or periodically
+        if (simulation_time - last_manual_update > 0.05 or  # Every 50ms
+            not hasattr(visualizer, 'last_manual_pos') or
+            abs(x_pos - getattr(visualizer, 'last_manual_pos', (0,0))[0]) > 0.001 or
+            abs(y_pos - getattr(visualizer, 'last_manual_pos', (0,0))[1]) > 0.001):
             
-            # Fondo semi-transparente para el texto
-            text_rect = pause_text.get_rect(center=(700, 25))
-            bg_rect = pygame.Rect(text_rect.x - 8, text_rect.y - 4, 
-                                text_rect.width + 16, text_rect.height + 8)
-            pygame.draw.rect(screen, (255, 255, 255, 200), bg_rect, border_radius=6)
-            pygame.draw.rect(screen, (211, 47, 47), bg_rect, 2, border_radius=6)
-            
-            screen.blit(pause_text, text_rect)
+            visualizer.add_screen_point(x_pos, y_pos, brightness=1.0, mode="manual",
+                                        sim_time=simulation_time)
+            visualizer.last_manual_pos = (x_pos, y_pos)
+            last_manual_update = simulation_time
+
+def export_rect(region):
+    """Rectángulo a exportar: toda la ventana (None) o solo la pantalla del CRT."""
+    return pygame.Rect(visualizer.screen_view) if region == "screen" else None
+
+def export_frame(exporter, region):
+    if exporter:
+        exporter.submit(pygame.display.get_surface(), export_rect(region))
+
+def close_exporter(exporter):
+    if exporter:
+        exporter.close()
+        stats = exporter.stats()
+        print(f"Exportados {stats['written']} cuadros a {exporter.output_dir}/ "
+              f"({stats['dropped']} descartados, cola máxima {stats['max_queue_depth']}, "
+              f"{stats['blocked_s']:.2f} s de espera)")
+
+def main(profile=False, profile_csv=None, record=None, export=None, export_format="png",
+         export_region="window", offline_fps=None):
+    """
+    Bucle principal. profile=True empieza con el perfilador activado;
+    profile_csv guarda los tiempos por etapa de cada cuadro en ese archivo.
+    record graba las entradas del usuario en ese archivo (ver replay_log).
+    export guarda los cuadros (o solo la pantalla, export_region="screen") en ese
+    directorio desde un hilo escritor. Con offline_fps cada cuadro simula 1/offline_fps s
+    sin importar cuánto tarde en dibujarse, y la exportación no descarta cuadros: los
+    cuadros exportados dependen solo de ese paso (el fósforo decae con el reloj simulado).
+    """
+    global recorder
+
+    # Inicializar pygame
+    pygame.init()
+    screen = pygame.display.set_mode((1400, 900))
+    pygame.display.set_caption("Simulación de un Tubo de Rayos Catódicos")
+    
+    # Offline: el mismo motor que en vivo, pero el SimulationWorker avanza a paso fijo
+    # desde update_simulation en lugar de seguir al reloj real en su hilo
+    setup_app(screen, realtime=not offline_fps)
+    exporter = None
+    if export:
+        exporter = FrameExporter(export, export_format, fps=offline_fps or 60,
+                                 block=bool(offline_fps)).start()
+    visualizer.profiler = profiler
+    if profile_csv:
+        profiler.open_csv(profile_csv)
+    profiler.set_enabled(profile or profile_csv is not None)
+    profiler.set_hud_visible(profile)  # Con solo --profile-csv se mide sin mostrar el HUD
+    if record:
+        recorder = InputRecorder(record)
+        # La reproducción usa el mismo motor: con o sin hilo de simulación
+        record_input(KIND_ENGINE, value=float(simulation_worker is not None))
+    
+    clock = pygame.time.Clock()
+    running = True
+    
+    while running:
+        dt = clock.tick(0 if offline_fps else 60) / 1000.0  # Delta time en segundos
+        if offline_fps:
+            dt = 1.0 / offline_fps
+        profiler.begin_frame()
         
-        # Instrucciones en la parte inferior - ACTUALIZADO
-        instructions = [
-            "Controles: ESPACIO = Pausa/Resume, R = Reset, Start/Stop = Control simulación",
-            f"Modo: {'Lissajous (curvas automáticas)' if mode else 'Manual (mover sliders para ver efecto)'}"
-        ]
+        with profiler.stage("draw_frame"):
+            draw_frame(screen)
         
-        font_instructions = pygame.font.SysFont('Arial', 12)
-        for i, instruction in enumerate(instructions):
-            text = font_instructions.render(instruction, True, (60, 70, 80))
-            screen.blit(text, (400, screen.get_height() - 40 + i * 15))
+        # Manejar eventos
+        with profiler.stage("events"):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == KEYDOWN:
+                    if event.key == K_SPACE:
+                        toggle_pause()
+                    elif event.key == K_r:  # Tecla R para reset
+                        reset_values()
+                    elif event.key == K_b:
+                        toggle_beam()
+                    elif event.key == K_i:
+                        cycle_field_model()
+                    elif event.key == K_v:
+                        cycle_waveform(0)
+                    elif event.key == K_h:
+                        cycle_waveform(1)
+                    elif event.key == K_F3:
+                        toggle_profiler()
+                else:
+                    handle_ui_events(event)
         
-        pygame.display.flip()
-    
+        with profiler.stage("simulation"):
+            update_simulation(dt)
+        record_input(KIND_TICK, value=dt)
+        with profiler.stage("draw_overlays"):
+            draw_overlays(screen)
+        with profiler.stage("export"):
+            export_frame(exporter, export_region)
+        draw_profiler_hud(screen)
+        
+        with profiler.stage("present"):
+            present_frame()
+        profiler.end_frame()
+    
+    close_exporter(exporter)
+    profiler.close_csv()
+    if recorder:
+        recorder.close()
+        recorder = None
+    if simulation_worker:
+        simulation_worker.stop()
     pygame.quit()
 
+def apply_logged_input(kind, ident, value):
+    """Aplica una entrada grabada (no TICK) igual que lo hizo el evento original."""
+    if kind == KIND_SLIDER:
+        set_slider_value(ident, value)
+    elif kind == KIND_MODE:
+        if bool(value) != mode:
+            toggle_mode()
+    elif kind == KIND_GRID:
+        select_frequency_combo(frequency_grid.freq_combinations[ident])
+    elif kind == KIND_PAUSE:
+        if bool(value) != paused:
+            toggle_pause()
+    elif kind == KIND_RESET:
+        reset_values()
+    elif kind == KIND_BEAM:
+        if bool(value) != visualizer.beam_enabled:
+            toggle_beam()
+    elif kind == KIND_FIELD:
+        set_field_model(ident)
+    elif kind == KIND_WAVE:
+        set_waveform(ident, int(value))
+
+def replay_log(path, screen, frame_cap=0, render=True, exporter=None, export_region="window"):
+    """
+    Reproduce un log grabado con main(record=...). Cada TICK simula exactamente el dt
+    grabado con el mismo motor de la sesión (KIND_ENGINE); el SimulationWorker, si se
+    usó, avanza a paso fijo sin su hilo, así que el resultado es determinista.
+    frame_cap=0 corre a la máxima velocidad; render=False ni siquiera dibuja.
+    Con exporter se exporta cada cuadro dibujado.
+    Devuelve cuadros, tiempo real y la mayor diferencia con el tiempo simulado grabado.
+    """
+    global mode, field_model
+    
+    records = read_log(path)
+    # El log se grabó desde el estado inicial de la aplicación
+    mode = False
+    field_model = 0
+    params.reset()
+    engines = records["value"][records["kind"] == KIND_ENGINE]
+    threaded = bool(engines[0]) if len(engines) else False  # Logs anteriores: sin hilo
+    setup_app(screen, threaded=threaded, realtime=False)
+    clock = pygame.time.Clock()
+    frames = 0
+    max_drift = 0.0
+    start = time.perf_counter()
+    
+    # Como en main(), el cuadro se dibuja antes de atender sus entradas: las grabadas
+    # antes de cada TICK se aplican después de draw_frame, no antes
+    pending = []
+    for kind, ident, value, sim_time in records.tolist():
+        if kind != KIND_TICK:
+            pending.append((kind, ident, value))
+            continue
+        if render:
+            draw_frame(screen)
+        for event in pending:
+            apply_logged_input(*event)
+        pending.clear()
+        update_simulation(value)
+        if render:
+            draw_overlays(screen)
+            export_frame(exporter, export_region)
+            present_frame()
+        pygame.event.pump()
+        max_drift = max(max_drift, abs(simulation_time - sim_time))
+        frames += 1
+        if frame_cap:
+            clock.tick(frame_cap)
+    for event in pending:  # Entradas del último cuadro, si el log terminó sin su TICK
+        apply_logged_input(*event)
+    
+    elapsed = time.perf_counter() - start
+    return {
+        "frames": frames,
+        "elapsed_s": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else float("inf"),
+        "max_time_drift": max_drift,
+        **log_summary(records),
+    }
+
+def replay_main(path, headless=False, render=True, export=None, export_format="png",
+                export_region="window"):
+    """Reproduce un log: en la ventana a 60 FPS o, con headless, sin ventana ni límite."""
+    pygame.init()
+    screen = pygame.display.set_mode((1400, 900))
+    pygame.display.set_caption("Simulación de un Tubo de Rayos Catódicos (reproducción)")
+    # La reproducción ya es de paso fijo: exportar todos los cuadros, sin descartar
+    exporter = FrameExporter(export, export_format, block=True).start() if export else None
+    result = replay_log(path, screen, frame_cap=0 if headless else 60, render=render,
+                        exporter=exporter, export_region=export_region)
+    close_exporter(exporter)
+    pygame.quit()
+    
+    print(f"{result['frames']} cuadros ({result['simulated_s']:.2f} s simulados) en "
+          f"{result['elapsed_s']:.2f} s, {result['fps']:.0f} FPS; "
+          f"diferencia de tiempo máxima {result['max_time_drift']:.3g} s")
+    return result
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulación de un Tubo de Rayos Catódicos.")
+    parser.add_argument("--profile", action="store_true",
+                        help="empezar con el perfilador por etapas y su HUD activados (F3)")
+    parser.add_argument("--profile-csv", metavar="ARCHIVO",
+                        help="guardar los tiempos por etapa de cada cuadro en un CSV")
+    parser.add_argument("--record", metavar="LOG", help="grabar las entradas del usuario en LOG")
+    parser.add_argument("--replay", metavar="LOG", help="reproducir las entradas grabadas en LOG")
+    parser.add_argument("--headless", action="store_true",
+                        help="con --replay: sin ventana y sin límite de cuadros por segundo")
+    parser.add_argument("--no-render", action="store_true",
+                        help="con --replay: solo simular, sin dibujar")
+    parser.add_argument("--export", metavar="DIR", help="exportar los cuadros renderizados a DIR")
+    parser.add_argument("--export-format", choices=FrameExporter.FORMATS, default="png",
+                        help="PNG numerados o un único archivo RGB crudo")
+    parser.add_argument("--export-region", choices=("window", "screen"), default="window",
+                        help="toda la ventana o solo la pantalla del CRT")
+    parser.add_argument("--offline-fps", type=float, metavar="FPS",
+                        help="paso fijo de 1/FPS s por cuadro, más rápido o más lento que el tiempo real")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.replay:
+        if args.headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        replay_main(args.replay, headless=args.headless, render=not args.no_render,
+                    export=args.export, export_format=args.export_format,
+                    export_region=args.export_region)
+    else:
+        main(profile=args.profile, profile_csv=args.profile_csv, record=args.record,
+             export=args.export, export_format=args.export_format,
+             export_region=args.export_region, offline_fps=args.offline_fps)
@@ -0,0 +1,117 @@
+import math
+
+class Parameter:
+    """
+    Parámetro del simulador con nombre, tipo y rango.
+    Los valores se convierten al tipo y se recortan a [minimum, maximum] al fijarlos.
+    """
+
+    def __init__(self, name, default, minimum, maximum, label=None, unit="", kind=float):
+        if not minimum <= default <= maximum:
+            raise ValueError(f"{name}: valor por defecto {default} fuera de [{minimum}, {maximum}]")
+        self.name = name
+        self.kind = kind
+        self.minimum = kind(minimum)
+        self.maximum = kind(maximum)
+        self.default = kind(default)
+        self.label = label or name
+        self.unit = unit
+        self.value = self.default
+
+    def coerce(self, value):
+        """Convierte `value` al tipo del parámetro y lo recorta a su rango."""
+        value = self.kind(value)
+        if isinstance(value, float) and math.isnan(value):
+            raise ValueError(f"{self.name}: valor NaN")
+        return max(self.minimum, min(self.maximum, value))
+
+    def __repr__(self):
+        return f"Parameter({self.name}={self.value!r} {self.unit}, [{self.minimum}, {self.maximum}])"
+
+class ParameterRegistry:
+    """
+    Registro declarativo de parámetros con notificación de cambios.
+
+    observe(nombres, callback) llama a callback({nombre: valor}) solo cuando alguno de
+    esos parámetros cambia de verdad; fijar el mismo valor no notifica a nadie. update()
+    fija varios parámetros a la vez y cada observador recibe una sola llamada con todos
+    los que le interesan.
+    """
+
+    def __init__(self):
+        self.parameters = {}
+        self._observers = []  # (nombres observados o None = todos, callback)
+
+    def define(self, name, default, minimum, maximum, label=None, unit="", kind=float):
+        if name in self.parameters:
+            raise ValueError(f"Parámetro duplicado: {name}")
+        parameter = Parameter(name, default, minimum, maximum, label, unit, kind)
+        self.parameters[name] = parameter
+        return parameter
+
+    def __getitem__(self, name):
+        return self.parameters[name].value
+
+    def __contains__(self, name):
+        return name in self.parameters
+
+    def __iter__(self):
+        return iter(self.parameters.values())
+
+    def get(self, name):
+        return self.parameters[name].value
+
+    def values(self, names=None):
+        """Copia de los valores actuales (de todos o solo de `names`)."""
+        names = self.parameters if names is None else names
+        return {name: self.parameters[name].value for name in names}
+
+    def observe(self, names, callback):
+        """
+        Registra callback para los parámetros `names` (un nombre, varios o None = todos).
+        Devuelve el callback, para poder usarlo como decorador o quitarlo con unobserve.
+        """
+        if isinstance(names, str):
+            names = (names,)
+        if names is not None:
+            names = frozenset(names)
+            unknown = names - set(self.parameters)
+            if unknown:
+                raise KeyError(f"Parámetros desconocidos: {', '.join(sorted(unknown))}")
+        self._observers.append((names, callback))
+        return callback
+
+    def unobserve(self, callback):
+        self._observers = [(names, observer) for names, observer in self._observers
+                           if observer is not callback]
+
+    def clear_observers(self):
+        self._observers.clear()
+
+    def set(self, name, value):
+        """Fija un parámetro; devuelve True si su valor cambió."""
+        return bool(self.update({name: value}))
+
+    def update(self, values=None, **kwargs):
+        """Fija varios parámetros y notifica una vez; devuelve {nombre: valor} de los que cambiaron."""
+        values = dict(values or {}, **kwargs)
+        changed = {}
+        for name, value in values.items():
+            parameter = self.parameters[name]
+            value = parameter.coerce(value)
+            if value != parameter.value:
+                parameter.value = value
+                changed[name] = value
+
+        if changed:
+            for names, callback in list(self._observers):
+                relevant = changed if names is None else {
+                    name: value for name, value in changed.items() if name in names}
+                if relevant:
+                    callback(relevant)
+        return changed
+
+    def reset(self, names=None):
+        """Vuelve los parámetros (todos o `names`) a su valor por defecto."""
+        names = self.parameters if names is None else names
+        return self.update({name: self.parameters[name].default for name in names})
@@ -0,0 +1,84 @@
+import numpy as np
+import pygame
+
+class PhosphorScreen:
+    """
+    Framebuffer de intensidad (float32) que simula el fósforo de la pantalla.
+
+    Los impactos del haz se depositan en el buffer y la intensidad decae
+    exponencialmente con el tiempo de persistencia. Se dibuja con un único blit,
+    así que el costo por cuadro no depende de cuántos puntos se hayan emitido.
+    """
+
+    def __init__(self, width, height, color=(255, 255, 0), deposit_gain=0.35,
+                 core_radius=1, glow_radius=3, glow_level=1 / 3):
+        self.color = np.asarray(color, dtype=np.float32)
+        self.deposit_gain = deposit_gain
+        self.width = 0
+        self.height = 0
+        self.intensity = None
+        self.surface = None
+        self._rgb = None
+
+        # Núcleo brillante + halo tenue, como los dos círculos del dibujo por punto
+        offsets = [(dx, dy) for dx in range(-glow_radius, glow_radius + 1)
+                   for dy in range(-glow_radius, glow_radius + 1)
+                   if dx * dx + dy * dy <= glow_radius * glow_radius]
+        self._kernel_dx = np.array([dx for dx, _ in offsets], dtype=np.int64)
+        self._kernel_dy = np.array([dy for _, dy in offsets], dtype=np.int64)
+        self._kernel_w = np.array([1.0 if dx * dx + dy * dy <= core_radius * core_radius else glow_level
+                                   for dx, dy in offsets], dtype=np.float32)
+
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        """Reasigna el buffer si cambia el tamaño (se pierde el contenido)."""
+        if (width, height) == (self.width, self.height):
+            return
+        self.width, self.height = width, height
+        # Indexado (x, y) como pygame.surfarray
+        self.intensity = np.zeros((width, height), dtype=np.float32)
+        self._rgb = np.zeros((width, height, 3), dtype=np.uint8)
+        self.surface = pygame.Surface((width, height))
+
+    def clear(self):
+        self.intensity.fill(0.0)
+
+    def deposit(self, normalized_x, normalized_y, brightness=1.0, accumulate=True):
+        """
+        Deposita impactos en coordenadas normalizadas [0, 1].
+        Con accumulate=False cada píxel toma el máximo en lugar de la suma.
+        """
+        normalized_x = np.asarray(normalized_x, dtype=np.float32).ravel()
+        normalized_y = np.asarray(normalized_y, dtype=np.float32).ravel()
+        if normalized_x.size == 0:
+            return
+
+        px = np.minimum((normalized_x * self.width).astype(np.int64), self.width - 1)
+        py = np.minimum((normalized_y * self.height).astype(np.int64), self.height - 1)
+
+        # Expandir cada impacto con el kernel y acumular con un solo bincount
+        kx = px[:, None] + self._kernel_dx[None, :]
+        ky = py[:, None] + self._kernel_dy[None, :]
+        weights = np.broadcast_to(self._kernel_w * np.float32(self.deposit_gain), kx.shape)
+        weights = weights * np.asarray(brightness, dtype=np.float32).reshape(-1, 1)
+        inside = (kx >= 0) & (kx < self.width) & (ky >= 0) & (ky < self.height)
+
+        flat = kx[inside] * self.height + ky[inside]
+        if accumulate:
+            hits = np.bincount(flat, weights=weights[inside], minlength=self.intensity.size)
+            self.intensity += hits.reshape(self.intensity.shape).astype(np.float32)
+        else:
+            np.maximum.at(self.intensity.reshape(-1), flat, weights[inside])
+
+    def decay(self, dt, persistence_time):
+        """Decaimiento exponencial: I *= exp(-dt / persistencia)."""
+        if dt <= 0:
+            return
+        self.intensity *= np.float32(np.exp(-dt / max(persistence_time, 1e-3)))
+
+    def draw(self, surface, position, special_flags=pygame.BLEND_RGB_ADD):
+        """Convierte la intensidad a color y la dibuja con un solo blit."""
+        np.multiply(np.minimum(self.intensity, 1.0)[..., None], self.color, out=self._rgb, casting='unsafe')
+        pygame.surfarray.blit_array(self.surface, self._rgb)
+        surface.blit(self.surface, position, special_flags=special_flags)
@@ -0,0 +1,101 @@
+import numpy as np
+
+class PointRingBuffer:
+    """
+    Buffer circular de puntos en pantalla en forma de arreglos (x, y, t, brillo).
+
+    Los puntos se insertan en orden de tiempo, así que los que expiran siempre
+    están al inicio: expirar es mover el índice de cabeza, sin copiar nada.
+    Al llenarse se sobrescriben los más antiguos (como un deque con maxlen).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.t = np.zeros(capacity, dtype=np.float64)
+        self.brightness = np.zeros(capacity, dtype=np.float32)
+        self.head = 0  # Índice del punto más antiguo
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+
+    def append(self, x, y, t, brightness=1.0):
+        """Agrega un punto (O(1))."""
+        index = (self.head + self.size) % self.capacity
+        self.x[index] = x
+        self.y[index] = y
+        self.t[index] = t
+        self.brightness[index] = brightness
+
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.head = (self.head + 1) % self.capacity
+
+    def extend(self, x, y, t, brightness=1.0):
+        """Agrega un bloque de puntos; t y brillo pueden ser escalares."""
+        x = np.asarray(x, dtype=np.float32).ravel()
+        count = x.size
+        if count == 0:
+            return
+        y = np.asarray(y, dtype=np.float32).ravel()
+        t = np.broadcast_to(np.asarray(t, dtype=np.float64), (count,))
+        brightness = np.broadcast_to(np.asarray(brightness, dtype=np.float32), (count,))
+
+        # Si el bloque no cabe, solo sobreviven los últimos `capacity` puntos
+        if count >= self.capacity:
+            x, y, t, brightness = x[-self.capacity:], y[-self.capacity:], t[-self.capacity:], brightness[-self.capacity:]
+            self.x[:], self.y[:], self.t[:], self.brightness[:] = x, y, t, brightness
+            self.head = 0
+            self.size = self.capacity
+            return
+
+        indices = (self.head + self.size + np.arange(count)) % self.capacity
+        self.x[indices] = x
+        self.y[indices] = y
+        self.t[indices] = t
+        self.brightness[indices] = brightness
+
+        overflow = max(0, self.size + count - self.capacity)
+        self.head = (self.head + overflow) % self.capacity
+        self.size = min(self.capacity, self.size + count)
+
+    def _segments(self):
+        """Rangos (inicio, fin) ocupados, del más antiguo al más nuevo."""
+        end = self.head + self.size
+        if end <= self.capacity:
+            return [(self.head, end)]
+        return [(self.head, self.capacity), (0, end - self.capacity)]
+
+    def expire_before(self, cutoff_time):
+        """Descarta los puntos con t < cutoff_time; devuelve cuántos se descartaron."""
+        expired = 0
+        for start, end in self._segments():
+            count = int(np.searchsorted(self.t[start:end], cutoff_time, side='left'))
+            expired += count
+            if count < end - start:
+                break
+
+        self.head = (self.head + expired) % self.capacity
+        self.size -= expired
+        if self.size == 0:
+            self.head = 0
+        return expired
+
+    def arrays(self):
+        """
+        Devuelve (x, y, t, brillo) en orden de inserción.
+        Son vistas sin copia salvo cuando el buffer está partido por el final del arreglo.
+        """
+        segments = self._segments()
+        if len(segments) == 1:
+            start, end = segments[0]
+            return self.x[start:end], self.y[start:end], self.t[start:end], self.brightness[start:end]
+        return tuple(np.concatenate([column[start:end] for start, end in segments])
+                     for column in (self.x, self.y, self.t, self.brightness))
@@ -0,0 +1,177 @@
+import csv
+import time
+from collections import deque
+import pygame
+from text_cache import get_font, render_text
+
+class _NullStage:
+    """Contexto vacío que se devuelve cuando el perfilador está desactivado."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+class FrameProfiler:
+    """
+    Mide cuánto tarda cada etapa del cuadro (dibujo, eventos, simulación...).
+
+    Uso: begin_frame(), luego `with profiler.stage("nombre"):` alrededor de cada etapa
+    y end_frame(). Desactivado, stage() devuelve un contexto vacío compartido y no se
+    mide nada. Guarda los últimos `window` cuadros para el HUD (promedio y peor caso)
+    y, si hay un CSV abierto, escribe una fila por etapa y cuadro.
+
+    Que el HUD se vea (hud_visible) es aparte de medir: ocultarlo no detiene la
+    medición mientras haya un CSV abierto.
+    """
+
+    FRAME = "cuadro"  # Nombre de la etapa con el tiempo total del cuadro
+
+    def __init__(self, window=120, enabled=False, hud_interval=15, hud_visible=None):
+        self.window = window
+        self.enabled = enabled
+        self.hud_visible = enabled if hud_visible is None else hud_visible
+        self.hud_interval = hud_interval  # Cuadros entre actualizaciones del texto del HUD
+        self.history = {}  # etapa -> deque con los últimos tiempos (s)
+        self.frame_index = 0
+        self._current = {}
+        self._frame_start = None
+        self._csv_file = None
+        self._csv_writer = None
+        self._hud_surface = None
+        self._hud_age = 0
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self._frame_start = None
+        self._current.clear()
+        self._hud_surface = None
+
+    def toggle(self):
+        self.set_enabled(not self.enabled)
+        return self.enabled
+
+    def set_hud_visible(self, visible):
+        """
+        Muestra u oculta el HUD. Mostrarlo activa la medición; ocultarlo solo la
+        desactiva si no hay un CSV abierto, que sigue recibiendo filas.
+        """
+        self.hud_visible = visible
+        self._hud_surface = None
+        if visible and not self.enabled:
+            self.set_enabled(True)
+        elif not visible and self._csv_writer is None:
+            self.set_enabled(False)
+
+    def toggle_hud(self):
+        self.set_hud_visible(not self.hud_visible)
+        return self.hud_visible
+
+    def stage(self, name):
+        """Contexto que mide la etapa `name` dentro del cuadro actual."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        """Suma `seconds` a la etapa `name` (una etapa puede ejecutarse varias veces por cuadro)."""
+        self._current[name] = self._current.get(name, 0.0) + seconds
+
+    def begin_frame(self):
+        if self.enabled:
+            self._current.clear()
+            self._frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        self.record(self.FRAME, time.perf_counter() - self._frame_start)
+        self._frame_start = None
+
+        for name, seconds in self._current.items():
+            samples = self.history.get(name)
+            if samples is None:
+                samples = self.history[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+        if self._csv_writer is not None:
+            self._csv_writer.writerows((self.frame_index, name, f"{seconds * 1000:.4f}")
+                                       for name, seconds in self._current.items())
+        self.frame_index += 1
+
+    def summary(self):
+        """etapa -> (promedio ms, peor ms) sobre la ventana, con el cuadro completo primero."""
+        names = sorted(self.history, key=lambda name: (name != self.FRAME, name))
+        return {name: (1000 * sum(self.history[name]) / len(self.history[name]),
+                       1000 * max(self.history[name]))
+                for name in names}
+
+    def open_csv(self, path):
+        """Escribe los tiempos de cada cuadro en `path` (columnas frame, stage, ms)."""
+        self.close_csv()
+        self._csv_file = open(path, "w", newline="")
+        self._csv_writer = csv.writer(self._csv_file)
+        self._csv_writer.writerow(("frame", "stage", "ms"))
+
+    def close_csv(self):
+        if self._csv_file is not None:
+            self._csv_file.close()
+        self._csv_file = None
+        self._csv_writer = None
+
+    def hud_rect(self, surface):
+        """Rectángulo que ocupa el HUD en `surface` (esquina inferior derecha)."""
+        hud = self._hud_surface
+        if hud is None:
+            return None
+        return hud.get_rect(bottomright=(surface.get_width() - 10, surface.get_height() - 50))
+
+    def draw_hud(self, surface):
+        """
+        Dibuja el HUD (fondo opaco, así que se puede redibujar encima de sí mismo)
+        y devuelve su rectángulo. El texto se regenera cada hud_interval cuadros.
+        """
+        if not self.enabled or not self.hud_visible or not self.history:
+            return None
+        self._hud_age += 1
+        if self._hud_surface is None or self._hud_age >= self.hud_interval:
+            self._hud_surface = self._render_hud()
+            self._hud_age = 0
+
+        rect = self.hud_rect(surface)
+        surface.blit(self._hud_surface, rect)
+        return rect
+
+    def _render_hud(self):
+        font = get_font('Arial', 12)
+        line_height = font.get_linesize()
+        summary = self.summary()
+        rows = [("etapa", "prom ms", "peor ms")]
+        rows += [(name, f"{average:.2f}", f"{worst:.2f}") for name, (average, worst) in summary.items()]
+
+        columns = (0, 120, 175)
+        hud = pygame.Surface((225, 10 + line_height * len(rows)))
+        hud.fill((30, 34, 40))
+        for i, row in enumerate(rows):
+            color = (255, 220, 120) if i == 0 else (230, 235, 240)
+            for x, text in zip(columns, row):
+                # Los números cambian en cada actualización: sin caché para no llenarla
+                rendered = render_text(font, text, color) if i == 0 or x == 0 else font.render(text, True, color)
+                hud.blit(rendered, (8 + x, 5 + i * line_height))
+        return hud
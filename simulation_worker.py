@@ -0,0 +1,165 @@
+import threading
+import time
+import numpy as np
+from beam_sampler import BeamSampler
+from calculos import screen_hit_normalized, on_screen
+from point_buffer import PointRingBuffer
+
+class SimulationWorker:
+    """
+    Hilo que simula el haz en modo Lissajous a paso fijo, independiente del render.
+
+    Cada paso avanza block_time segundos de simulación, genera las muestras con
+    BeamSampler, calcula sus impactos en pantalla y los escribe en un buffer circular.
+    El render vacía el buffer en cada cuadro con drain(); si tarda demasiado, las
+    muestras más antiguas se sobrescriben y se cuentan como overruns.
+    """
+
+    def __init__(self, sample_rate=10000, block_time=1 / 240, buffer_time=0.5, brightness=0.9,
+                 amplitude=800.0):
+        self.sampler = BeamSampler(sample_rate=sample_rate, amplitude=amplitude)
+        self.block_time = block_time
+        self.brightness = brightness
+        self.buffer = PointRingBuffer(int(sample_rate * buffer_time))
+        self.lock = threading.Lock()
+
+        # Parámetros que lee el hilo; se cambian con set_params()
+        self.params = {"V_acc": 1000, "freq_v": 1.0, "freq_h": 1.0, "phase_v": 0, "phase_h": 0,
+                       "wave_v": 0, "wave_h": 0}  # Índices en WAVE_SHAPES, como el registro
+        self.field = None  # Campo integrado numéricamente (None = fórmulas analíticas)
+        self.simulation_time = 0.0
+        self.last_voltages = (0.0, 0.0)
+        self.enabled = False
+        self.paused = False
+
+        # Contadores
+        self.generated_samples = 0
+        self.overrun_samples = 0  # Sobrescritos antes de que el render los leyera
+        self.offscreen_samples = 0  # Desviados fuera de la pantalla: no dejan rastro
+        self.skipped_samples = 0  # No generados por atraso del hilo
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def dropped_samples(self):
+        """Muestras que no se generaron porque el hilo se atrasó demasiado."""
+        return self.skipped_samples + self.sampler.skipped_samples
+
+    @property
+    def running(self):
+        """True si el hilo está corriendo; si no, se avanza con step() o advance_to()."""
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="crt-simulation", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def set_params(self, **params):
+        with self.lock:
+            self.params.update(params)
+
+    def set_field(self, field):
+        with self.lock:
+            self.field = field
+
+    def set_enabled(self, enabled):
+        with self.lock:
+            self.enabled = enabled
+
+    def set_paused(self, paused):
+        with self.lock:
+            self.paused = paused
+
+    def reset(self, simulation_time=0.0):
+        """Reinicia el reloj de simulación y descarta las muestras pendientes."""
+        with self.lock:
+            self.simulation_time = simulation_time
+            self.sampler.reset(simulation_time)
+            self.buffer.clear()
+
+    def step(self):
+        """Avanza un paso fijo de simulación (lo llama el hilo; útil también sin hilo)."""
+        # Los bloques son pequeños (block_time * sample_rate muestras): se calculan con el lock
+        with self.lock:
+            if not self.enabled or self.paused:
+                return
+            self.simulation_time += self.block_time
+            params = self.params
+
+            times, v_vert, v_horiz = self.sampler.sample(
+                self.simulation_time, params["freq_v"], params["freq_h"], params["phase_v"], params["phase_h"],
+                params["wave_v"], params["wave_h"])
+            if len(times) == 0:
+                return
+            x_pos, y_pos = screen_hit_normalized(params["V_acc"], v_vert, v_horiz, field=self.field)
+            hit = on_screen(x_pos, y_pos)
+            hits = int(np.count_nonzero(hit))
+            self.offscreen_samples += len(times) - hits
+
+            free = self.buffer.capacity - len(self.buffer)
+            self.overrun_samples += max(0, hits - free)
+            self.buffer.extend(x_pos[hit], y_pos[hit], times[hit], self.brightness)
+            self.generated_samples += len(times)
+            self.last_voltages = (float(v_vert[-1]), float(v_horiz[-1]))
+
+    def advance_to(self, simulation_time):
+        """
+        Sin hilo: da los pasos fijos que faltan hasta simulation_time. Los bloques son los
+        mismos que con el hilo, pero no dependen de cuándo corre, así que es determinista.
+        """
+        while self.simulation_time + self.block_time <= simulation_time + 1e-9:
+            previous = self.simulation_time
+            self.step()
+            if self.simulation_time == previous:  # Desactivado o en pausa
+                break
+
+    def drain(self):
+        """
+        Devuelve (x, y, t) de todas las muestras pendientes y vacía el buffer,
+        junto con los últimos voltajes (V_vert, V_horiz) generados.
+        """
+        with self.lock:
+            x_pos, y_pos, times, _ = (np.array(column) for column in self.buffer.arrays())
+            self.buffer.clear()
+            return x_pos, y_pos, times, self.last_voltages
+
+    def stats(self):
+        with self.lock:
+            return {
+                "generated": self.generated_samples,
+                "overruns": self.overrun_samples,
+                "offscreen": self.offscreen_samples,
+                "dropped": self.dropped_samples,
+                "pending": len(self.buffer),
+            }
+
+    def _run(self):
+        next_step = time.perf_counter()
+        while not self._stop_event.is_set():
+            self.step()
+            next_step += self.block_time
+
+            wait = next_step - time.perf_counter()
+            if wait > 0:
+                self._stop_event.wait(wait)
+            elif wait < -self.sampler.max_block_time:
+                # Demasiado atrasado (p. ej. el proceso estuvo suspendido): saltar el retraso
+                self._skip(-wait)
+                next_step = time.perf_counter()
+
+    def _skip(self, lag):
+        with self.lock:
+            if not self.enabled or self.paused:
+                return
+            self.simulation_time += lag
+            self.skipped_samples += int(lag * self.sampler.sample_rate)
+            self.sampler.reset(self.simulation_time)
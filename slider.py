@@ -1,19 +1,22 @@
 import pygame
+from text_cache import get_font, render_text
 
 class Slider:
-    def __init__(self, x, y, width, height, min_val, max_val, initial_val, title="Slider", unit="n/a", toggle=False):
+    def __init__(self, x, y, width, height, min_val, max_val, initial_val, title="Slider", unit="n/a", toggle=False, name=None):
         #definición de los atributos de la clase slider
         self.rect = pygame.Rect(x, y, width, height)
-        self.min_val = max(0, min_val)
+        # Se permiten mínimos negativos (p. ej. los voltajes de placa -1000..1000 V)
+        self.min_val = min_val
         self.max_val = max(self.min_val, max_val)
         self.value = max(self.min_val, min(initial_val, self.max_val))
         self.handle_radius = height // 2
         self.handle_pos = self.value_to_pos(self.value)
         self.dragging = False
-        self.font = pygame.font.SysFont(None, 24)
+        self.font = get_font(None, 24)
         self.title = title
         self.unit = unit
         self.disabled = toggle
+        self.name = name  # Parámetro del registro que controla, si hay uno
 
     def value_to_pos(self, value):
         # se utiliza un ratio para mapear el valor al rango del slider
@@ -37,9 +40,9 @@ class Slider:
              line_thickness=5, 
              handle_radius=None):
         # Permitir personalizar tamaños y posiciones del slider mediante parámetros
-        font_title = pygame.font.SysFont(None, title_font_size)
-        font_value = pygame.font.SysFont(None, value_font_size)
-        title_text = font_title.render(self.title, True, (0, 0, 0))
+        font_title = get_font(None, title_font_size)
+        font_value = get_font(None, value_font_size)
+        title_text = render_text(font_title, self.title, (0, 0, 0))
         surface.blit(title_text, (self.rect.x, self.rect.y - title_offset_y))
         line_color = (180, 180, 180) if self.disabled else (200, 200, 200)
         handle_color = (120, 120, 180) if self.disabled else (100, 100, 250)
@@ -48,7 +51,7 @@ class Slider:
         # Permitir cambiar el radio del handle
         radius = handle_radius if handle_radius is not None else self.handle_radius
         pygame.draw.circle(surface, handle_color, (self.handle_pos, self.rect.centery), radius)
-        value_text = font_value.render(f"{self.value:.2f} {self.unit}", True, value_color)
+        value_text = render_text(font_value, f"{self.value:.2f} {self.unit}", value_color)
         surface.blit(value_text, (self.rect.x, self.rect.y - value_offset_y))
         if self.disabled:
             overlay = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
@@ -57,9 +60,10 @@ class Slider:
 
 
     def handle_event(self, event):
+        # Devuelve True si el evento cambió el valor del slider
         # Si está deshabilitado, ignora eventos
         if self.disabled:
-            return
+            return False
         #se definen los eventos que va a manejar el slider, izqquierda bajar, derecha subir valor
         if event.type == pygame.MOUSEBUTTONDOWN:
             if self.is_over_handle(event.pos):
@@ -68,9 +72,18 @@ class Slider:
             self.dragging = False
         elif event.type == pygame.MOUSEMOTION:
             if self.dragging:
+                old_value = self.value
                 self.handle_pos = max(self.rect.x, min(event.pos[0], self.rect.right))
                 self.value = self.pos_to_value(self.handle_pos)
                 self.handle_pos = self.value_to_pos(self.value)  # se actualiza la posición del handle
+                return self.value != old_value
+        return False
+
+    def set_value(self, value):
+        # Fija el valor desde el programa (reset, grid, reproducción) y mueve el handle
+        self.value = max(self.min_val, min(value, self.max_val))
+        self.handle_pos = self.value_to_pos(self.value)
+
     def set_disabled(self, toggle):
         #desabilitar el slider
         self.disabled = toggle
@@ -0,0 +1,188 @@
+# Barridos de parámetros sobre rejillas (V_acc, V_vert, V_horiz[, frecuencias, fases, tiempo]).
+# Los resultados se escriben directamente en arreglos .npy mapeados en memoria, por
+# bloques y en paralelo, así que el tamaño del barrido no está limitado por la RAM.
+#
+#   python sweep.py --vacc 500 2000 16 --vvert -1000 1000 201 --vhoriz -1000 1000 201
+#   python sweep.py --vacc 1000 1000 1 --vvert 800 800 1 --vhoriz 800 800 1 \
+#                   --freq-v 1 6 6 --freq-h 1 6 6 --time 0 1 1000 --output barrido_lissajous
+#
+# Con ejes de frecuencia, fase o tiempo, V_vert y V_horiz son amplitudes y el voltaje de
+# las placas es V * sin(2π f t + fase). Los tiempos de región dependen solo de V_acc y se
+# guardan una vez por valor de V_acc.
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from calculos import get_final_screen_position_batch, deflection_sensitivity, sinusoidal_signal
+
+# Orden de los ejes de la rejilla (el primero es el más externo)
+AXES = ("V_acc", "V_vert", "V_horiz", "freq_v", "freq_h", "phase_v", "phase_h", "time")
+SIGNAL_AXES = ("freq_v", "freq_h", "phase_v", "phase_h", "time")
+# Valores usados para los ejes de señal que no se barren
+SIGNAL_DEFAULTS = {"freq_v": 1.0, "freq_h": 1.0, "phase_v": 0.0, "phase_h": 0.0}
+
+REGION_KEYS = ("time_0", "start_vplates", "end_vplates", "start_hplates", "end_hplates", "reach_screen")
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # Puntos por bloque de trabajo
+
+# Estado de cada proceso del pool (lo fija _init_worker)
+_worker = {}
+
+def sweep_axes(V_acc, V_vert, V_horiz, **signal_axes):
+    """
+    Normaliza los ejes del barrido a arreglos 1-D, en el orden de AXES.
+    Los ejes de señal son opcionales, pero si se da alguno hace falta el eje time.
+    """
+    axes = {"V_acc": V_acc, "V_vert": V_vert, "V_horiz": V_horiz}
+    signal_axes = {name: values for name, values in signal_axes.items() if values is not None}
+    unknown = set(signal_axes) - set(SIGNAL_AXES)
+    if unknown:
+        raise ValueError(f"Ejes desconocidos: {', '.join(sorted(unknown))}")
+    if signal_axes and "time" not in signal_axes:
+        raise ValueError("Los ejes de frecuencia o fase necesitan también un eje time")
+    axes.update(signal_axes)
+
+    return {name: np.atleast_1d(np.asarray(axes[name], dtype=float)) for name in AXES if name in axes}
+
+def _init_worker(axes, output_dir):
+    _worker["axes"] = axes
+    _worker["shape"] = tuple(len(values) for values in axes.values())
+    _worker["x"] = np.load(os.path.join(output_dir, "x_displacement.npy"), mmap_mode="r+")
+    _worker["y"] = np.load(os.path.join(output_dir, "y_displacement.npy"), mmap_mode="r+")
+
+def _compute_chunk(bounds):
+    """Calcula los impactos de los índices planos [start, stop) y los escribe en los memmaps."""
+    start, stop = bounds
+    axes = _worker["axes"]
+    indices = dict(zip(axes, np.unravel_index(np.arange(start, stop), _worker["shape"])))
+    values = {name: axes[name][index] for name, index in indices.items()}
+
+    v_vert, v_horiz = values["V_vert"], values["V_horiz"]
+    if "time" in values:
+        signal = {name: values.get(name, default) for name, default in SIGNAL_DEFAULTS.items()}
+        v_vert = sinusoidal_signal(values["time"], signal["freq_v"], v_vert, signal["phase_v"])
+        v_horiz = sinusoidal_signal(values["time"], signal["freq_h"], v_horiz, signal["phase_h"])
+
+    # V_acc es el eje más externo: un bloque abarca muy pocos valores distintos
+    x_out = _worker["x"].reshape(-1)[start:stop]
+    y_out = _worker["y"].reshape(-1)[start:stop]
+    acc_index = indices["V_acc"]
+    for i in np.unique(acc_index):
+        selected = slice(*np.searchsorted(acc_index, [i, i + 1]))
+        hit = get_final_screen_position_batch(axes["V_acc"][i], v_vert[selected], v_horiz[selected])
+        x_out[selected] = hit["x_displacement"]
+        y_out[selected] = hit["y_displacement"]
+
+    return stop - start
+
+def run_sweep(output_dir, V_acc, V_vert, V_horiz, chunk_size=DEFAULT_CHUNK_SIZE,
+              workers=None, dtype=np.float32, **signal_axes):
+    """
+    Ejecuta el barrido y escribe en output_dir:
+      x_displacement.npy, y_displacement.npy  forma = rejilla (un eje por parámetro)
+      time_to_screen.npy                      forma (len(V_acc),)
+      region_times.npy                        forma (len(V_acc), 6), columnas REGION_KEYS
+      manifest.json                           ejes, forma, archivos y tiempos
+    Devuelve el manifiesto.
+    """
+    axes = sweep_axes(V_acc, V_vert, V_horiz, **signal_axes)
+    shape = tuple(len(values) for values in axes.values())
+    total = int(np.prod(shape))
+    os.makedirs(output_dir, exist_ok=True)
+    start_time = time.perf_counter()
+
+    # Crear los archivos de resultados; los procesos los abren en modo r+
+    for name in ("x_displacement", "y_displacement"):
+        np.lib.format.open_memmap(os.path.join(output_dir, name + ".npy"),
+                                  mode="w+", dtype=dtype, shape=shape).flush()
+
+    # Tiempos de región: solo dependen de V_acc
+    sensitivities = [deflection_sensitivity(V) for V in axes["V_acc"]]
+    region_times = np.array([[s.region_times[key] for key in REGION_KEYS] for s in sensitivities])
+    np.save(os.path.join(output_dir, "region_times.npy"), region_times)
+    np.save(os.path.join(output_dir, "time_to_screen.npy"), region_times[:, -1])
+
+    chunks = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(axes, output_dir)
+        for chunk in chunks:
+            _compute_chunk(chunk)
+        _worker["x"].flush()
+        _worker["y"].flush()
+        _worker.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(axes, output_dir)) as executor:
+            for _ in executor.map(_compute_chunk, chunks):
+                pass
+
+    manifest = {
+        "axes": {name: values.tolist() for name, values in axes.items()},
+        "shape": list(shape),
+        "points": total,
+        "dtype": np.dtype(dtype).name,
+        "region_keys": list(REGION_KEYS),
+        "files": {
+            "x_displacement": "x_displacement.npy",
+            "y_displacement": "y_displacement.npy",
+            "time_to_screen": "time_to_screen.npy",
+            "region_times": "region_times.npy",
+        },
+        "chunk_size": chunk_size,
+        "workers": workers,
+        "elapsed_s": time.perf_counter() - start_time,
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def load_sweep(output_dir, mmap_mode="r"):
+    """Abre un barrido ya calculado: devuelve (manifiesto, {nombre: arreglo mapeado})."""
+    with open(os.path.join(output_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    arrays = {name: np.load(os.path.join(output_dir, filename), mmap_mode=mmap_mode)
+              for name, filename in manifest["files"].items()}
+    return manifest, arrays
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Barrido de parámetros del CRT a arreglos .npy.")
+    axis = dict(type=float, nargs=3, metavar=("INICIO", "FIN", "N"))
+    parser.add_argument("--vacc", required=True, help="voltajes de aceleración (V)", **axis)
+    parser.add_argument("--vvert", required=True, help="voltajes (o amplitudes) verticales", **axis)
+    parser.add_argument("--vhoriz", required=True, help="voltajes (o amplitudes) horizontales", **axis)
+    parser.add_argument("--freq-v", help="frecuencias verticales (Hz)", **axis)
+    parser.add_argument("--freq-h", help="frecuencias horizontales (Hz)", **axis)
+    parser.add_argument("--phase-v", help="fases verticales (rad)", **axis)
+    parser.add_argument("--phase-h", help="fases horizontales (rad)", **axis)
+    parser.add_argument("--time", help="instantes de muestreo de las señales (s)", **axis)
+    parser.add_argument("--output", default="sweep", help="directorio de salida")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="puntos por bloque")
+    parser.add_argument("--workers", type=int, help="procesos del pool (por defecto, uno por CPU)")
+    parser.add_argument("--dtype", default="float32", choices=("float32", "float64"),
+                        help="tipo de los desplazamientos guardados")
+    return parser.parse_args(argv)
+
+def _linspace(spec):
+    return None if spec is None else np.linspace(spec[0], spec[1], int(spec[2]))
+
+def main(argv=None):
+    args = parse_args(argv)
+    manifest = run_sweep(args.output, _linspace(args.vacc), _linspace(args.vvert), _linspace(args.vhoriz),
+                         chunk_size=args.chunk_size, workers=args.workers, dtype=args.dtype,
+                         freq_v=_linspace(args.freq_v), freq_h=_linspace(args.freq_h),
+                         phase_v=_linspace(args.phase_v), phase_h=_linspace(args.phase_h),
+                         time=_linspace(args.time))
+
+    rate = manifest["points"] / manifest["elapsed_s"] if manifest["elapsed_s"] > 0 else float("inf")
+    print(f"{manifest['points']} puntos {tuple(manifest['shape'])} en {args.output}/ "
+          f"({manifest['elapsed_s']:.2f} s, {rate / 1e6:.1f} M puntos/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import pygame
+from collections import OrderedDict
+
+# Fuentes resueltas una sola vez: (nombre, tamaño, negrita) -> Font
+_fonts = {}
+# pygame.quit() olvida las funciones registradas: se vuelve a registrar tras cada cierre
+_quit_registered = False
+
+# Superficies de texto ya renderizadas: (font, texto, color, antialias) -> Surface
+RENDER_CACHE_SIZE = 512
+_rendered = OrderedDict()
+
+def get_font(name, size, bold=False):
+    """Devuelve la fuente del sistema pedida; la búsqueda con SysFont se hace una vez."""
+    global _quit_registered
+    if not pygame.font.get_init():
+        # Las fuentes de una sesión anterior de pygame.font ya no son válidas
+        reset_text_cache()
+        pygame.font.init()
+    key = (name, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        if not _quit_registered:
+            pygame.register_quit(reset_text_cache)
+            _quit_registered = True
+        font = pygame.font.SysFont(name, size, bold=bold)
+        _fonts[key] = font
+    return font
+
+def render_text(font, text, color, antialias=True):
+    """
+    Renderiza text con font y color usando una caché LRU.
+    La Surface devuelta es compartida: no se debe modificar.
+    """
+    key = (font, text, tuple(color), antialias)
+    surface = _rendered.get(key)
+    if surface is not None:
+        _rendered.move_to_end(key)
+        return surface
+
+    surface = font.render(text, antialias, color)
+    _rendered[key] = surface
+    if len(_rendered) > RENDER_CACHE_SIZE:
+        _rendered.popitem(last=False)
+    return surface
+
+def clear_text_cache():
+    """Vacía la caché de texto renderizado (las fuentes se conservan)."""
+    _rendered.clear()
+
+def reset_text_cache():
+    """
+    Descarta las fuentes y el texto renderizado. pygame.quit() la llama (ver
+    register_quit): usar un Font después de cerrar pygame.font provoca un segfault.
+    """
+    global _quit_registered
+    _quit_registered = False
+    _fonts.clear()
+    _rendered.clear()
@@ -0,0 +1,165 @@
+# Arnés sin ventana para medir el rendimiento de extremo a extremo.
+# Ejecuta escenarios guionizados a través de main.draw_frame / update_simulation
+# (las mismas funciones que usa el bucle interactivo) con el driver "dummy" de SDL.
+#
+#   python throughput.py                       # todos los escenarios
+#   python throughput.py --frames 300 --scenario lissajous_ratios
+#   python throughput.py --json resultados.json --min-fps 30
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import sys
+import time
+import numpy as np
+import pygame
+from pygame.locals import MOUSEBUTTONDOWN, MOUSEMOTION
+
+import main as app
+
+# Paso fijo de simulación: la carga de trabajo no depende de la velocidad de la máquina
+SIMULATION_DT = 1 / 60
+
+def click(pos):
+    """Envía un clic izquierdo por handle_ui_events, como lo haría pygame."""
+    app.handle_ui_events(pygame.event.Event(MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)))
+    app.handle_ui_events(pygame.event.Event(MOUSEBUTTONDOWN, pos=pos, button=1))
+
+def set_lissajous_mode(enabled):
+    """Cambia de modo pulsando el botón de modo si hace falta."""
+    if app.mode != enabled:
+        mode_button = next(button for button in app.buttons if button['id'] == 'mode')
+        click(mode_button['rect'].center)
+
+def run_frames(screen, frames, before_frame=None):
+    """Dibuja y simula `frames` cuadros; devuelve tiempos por cuadro y puntos emitidos."""
+    visualizer = app.visualizer
+    points_before = visualizer.lissajous_point_count + visualizer.manual_point_count
+    frame_times = np.empty(frames)
+
+    for frame in range(frames):
+        start = time.perf_counter()
+        if before_frame:
+            before_frame(frame)
+        app.draw_frame(screen)
+        app.update_simulation(SIMULATION_DT)
+        app.draw_overlays(screen)
+        app.present_frame()
+        pygame.event.pump()
+        frame_times[frame] = time.perf_counter() - start
+
+    points = visualizer.lissajous_point_count + visualizer.manual_point_count - points_before
+    return frame_times, points
+
+def scenario_manual_sweep(screen, frames):
+    """Barrido manual de V Vertical / V Horizontal y V Aceleración."""
+    set_lissajous_mode(False)
+
+    def sweep(frame):
+        phase = 2 * np.pi * frame / max(frames, 1)
+        for name, harmonic in (("V_vert", 3), ("V_horiz", 2), ("V_acc", 1)):
+            # Recorre todo el rango del parámetro
+            parameter = app.params.parameters[name]
+            ratio = 0.5 + 0.5 * np.sin(harmonic * phase)
+            app.params.set(name, parameter.minimum + ratio * (parameter.maximum - parameter.minimum))
+
+    return run_frames(screen, frames, sweep)
+
+def scenario_lissajous_ratios(screen, frames):
+    """Selecciona cada razón de FrequencyGrid y la corre en modo Lissajous."""
+    set_lissajous_mode(True)
+    combos = app.frequency_grid.freq_combinations
+    frames_per_combo = max(1, frames // len(combos))
+    all_times = []
+    total_points = 0
+
+    for combo in combos:
+        cell = app.frequency_grid.get_cell_rect(combo['row'], combo['col'])
+        click(cell.center)
+        frame_times, points = run_frames(screen, frames_per_combo)
+        all_times.append(frame_times)
+        total_points += points
+
+    return np.concatenate(all_times), total_points
+
+def scenario_high_point_count(screen, frames, sample_rate=100000):
+    """Modo Lissajous a alta frecuencia de muestreo (muchos puntos por cuadro)."""
+    set_lissajous_mode(True)
+    previous_rate = app.beam_sampler.sample_rate
+    app.beam_sampler.set_sample_rate(sample_rate)
+    try:
+        return run_frames(screen, frames)
+    finally:
+        app.beam_sampler.set_sample_rate(previous_rate)
+
+SCENARIOS = {
+    "manual_sweep": scenario_manual_sweep,
+    "lissajous_ratios": scenario_lissajous_ratios,
+    "high_point_count": scenario_high_point_count,
+}
+
+def summarize(name, frame_times, points):
+    total = frame_times.sum()
+    return {
+        "scenario": name,
+        "frames": int(frame_times.size),
+        "fps": frame_times.size / total if total > 0 else float("inf"),
+        "points_per_s": points / total if total > 0 else float("inf"),
+        "p50_ms": float(np.percentile(frame_times, 50) * 1000),
+        "p99_ms": float(np.percentile(frame_times, 99) * 1000),
+    }
+
+def run(scenarios, frames):
+    pygame.init()
+    screen = pygame.display.set_mode((1400, 900))
+    # Sin hilo de simulación: cada cuadro simula exactamente SIMULATION_DT
+    app.setup_app(screen, threaded=False)
+
+    results = []
+    for name in scenarios:
+        app.reset_values()
+        # Un cuadro de calentamiento para que las cachés no cuenten en la medición
+        run_frames(screen, 1)
+        frame_times, points = SCENARIOS[name](screen, frames)
+        results.append(summarize(name, frame_times, points))
+
+    pygame.quit()
+    return results
+
+def print_report(results):
+    print(f"{'escenario':<20}{'cuadros':>9}{'FPS':>10}{'puntos/s':>14}{'p50 ms':>10}{'p99 ms':>10}")
+    for result in results:
+        print(f"{result['scenario']:<20}{result['frames']:>9}{result['fps']:>10.1f}"
+              f"{result['points_per_s']:>14.0f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el rendimiento del simulador CRT sin ventana.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="escenario a ejecutar (se puede repetir; por defecto todos)")
+    parser.add_argument("--frames", type=int, default=600, help="cuadros por escenario")
+    parser.add_argument("--json", help="guardar los resultados en este archivo JSON")
+    parser.add_argument("--min-fps", type=float,
+                        help="terminar con error si algún escenario queda por debajo de estos FPS")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args.scenario or list(SCENARIOS), args.frames)
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.min_fps is not None:
+        slow = [result["scenario"] for result in results if result["fps"] < args.min_fps]
+        if slow:
+            print(f"Por debajo de {args.min_fps:.0f} FPS: {', '.join(slow)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,34 @@
 import pygame
 import math
-from collections import deque
-import time
-from calculos import get_position_by_time
+from collections import deque, OrderedDict
+import numpy as np
+from calculos import (get_position_by_time, screen_hit_normalized, on_screen, compile_trajectory,
+                      monte_carlo_beam, db_plates_canyon, lon_plates, db_between_plates)
+from phosphor import PhosphorScreen
+from point_buffer import PointRingBuffer
+from text_cache import get_font, render_text
+from profiler import FrameProfiler
+
+# Trajectory polylines for the lateral/top views: LRU keyed by quantized voltages
+TRAJECTORY_CACHE_SIZE = 512
+TRAJECTORY_VOLTAGE_STEP = 2.0  # V; sweeps within one step reuse the same polyline
+TRAJECTORY_SAMPLES = 64
+# Transverse deflection (m) drawn at the full half-height of a view
+TRAJECTORY_MAX_DEFLECTION = 0.12
+
+# Monte Carlo beam (see calculos.monte_carlo_beam)
+BEAM_ELECTRONS = 2000          # Electrons per sample when there is one sample (manual mode)
+BEAM_ELECTRON_BUDGET = 30000   # Electrons per call when there are many samples, split evenly
+BEAM_INTEGRATED_BUDGET = 5000  # Same, when the trajectories are integrated numerically
+BEAM_MIN_ELECTRONS = 16
+BEAM_ENERGY_SPREAD = 0.01      # Relative sigma of V_acc
+BEAM_DIVERGENCE = 5e-3         # Angular sigma per axis (rad)
+BEAM_SPOT_GAIN = 8.0           # A sample's electrons together deposit like this many single hits
+BEAM_MAX_DEFLECTION = 0.12     # Same screen scale as screen_hit_normalized
+
+# Manual points fade exponentially and drop below the drawing threshold (10/255)
+# after persistence_time, the same lifetime as the ring-buffer expiry
+MANUAL_FADE_TIME_CONSTANTS = math.log(255 / 10)
 
 class CRTVisualizer:
     def __init__(self, screen_width=1200, screen_height=720):
@@ -24,8 +50,30 @@ class CRTVisualizer:
         
         # FIXED: Separate collections for different modes
         self.electron_trail = deque(maxlen=100)
-        self.screen_persistence = deque(maxlen=2000)  # Manual mode points (green)
-        self.lissajous_points = deque(maxlen=10000)   # Lissajous mode points (yellow)
+        self.screen_persistence = PointRingBuffer(2000)  # Manual mode points (green)
+        # Lissajous mode points (yellow) go straight into a phosphor framebuffer
+        self.lissajous_phosphor = PhosphorScreen(self.screen_view.width, self.screen_view.height,
+                                                 color=(255, 255, 0))
+        self.lissajous_point_count = 0
+        self.manual_point_count = 0
+        # Simulation clock (s), never the wall clock: decay and expiry depend only on the
+        # simulated dt, so replays and offline exports are reproducible
+        self.sim_time = 0.0
+        self.last_phosphor_update = 0.0
+        # Manual mode points are deposited once into their own decaying phosphor;
+        # screen_persistence only keeps them for the point count
+        self.manual_phosphor = PhosphorScreen(self.screen_view.width, self.screen_view.height,
+                                              color=(0, 255, 0), deposit_gain=1.0,
+                                              core_radius=2, glow_radius=4, glow_level=1 / 4)
+        # Monte Carlo beam spot in manual mode (in Lissajous mode it uses lissajous_phosphor)
+        self.beam_phosphor = PhosphorScreen(self.screen_view.width, self.screen_view.height,
+                                            color=(0, 255, 0))
+        self.beam_enabled = False
+        self.beam_rng = np.random.default_rng()
+        self.beam_transmission = 1.0
+        # Deflection field integrated numerically (None = analytic formulas), see set_field
+        self.field = None
+        self.field_label = None
         self.current_electron_pos = [0, 0, 0]
         self.electron_velocity = [0, 0, 0]
         self.current_mode = "manual"
@@ -43,13 +91,21 @@ class CRTVisualizer:
             'manual_points': (0, 255, 0),       # Bright green
             'manual_glow': (100, 255, 100),     # Light green for glow
             'text': (0, 0, 0),
-            'border': (50, 50, 50)
+            'border': (50, 50, 50),
+            'canvas': (255, 255, 255)           # Fill behind all views
         }
         
+        # Cached static layers: name -> (key, Surface)
+        self._static_layers = {}
+        # Cached trajectory polylines: (view, geometry, V_acc, V) -> points
+        self._trajectory_cache = OrderedDict()
+        # Per-stage timings; main replaces it with the app's profiler
+        self.profiler = FrameProfiler()
+        
         # Fuentes
         pygame.font.init()
-        self.font = pygame.font.SysFont('Arial', 16)
-        self.title_font = pygame.font.SysFont('Arial', 18, bold=True)
+        self.font = get_font('Arial', 16)
+        self.title_font = get_font('Arial', 18, bold=True)
 
     def set_mode(self, mode):
         """FIXED: Properly set mode and handle transitions"""
@@ -59,66 +115,99 @@ class CRTVisualizer:
         if hasattr(self, 'current_mode') and self.current_mode != new_mode:
             if new_mode == "lissajous":
                 self.screen_persistence.clear()  # Clear manual points
+                self.manual_phosphor.clear()
+                self.beam_phosphor.clear()
             else:
-                self.lissajous_points.clear()    # Clear lissajous points
+                self.clear_lissajous_points()    # Clear lissajous points
         
         self.current_mode = new_mode
 
-    def draw_lateral_view(self, surface, V_acc=1000, V_vert=0):
-        """Dibuja la vista lateral del CRT (muestra deflexión vertical)"""
-        view_rect = self.lateral_view
+    def _geometry_key(self):
+        """Geometry/colors that the cached static layers depend on"""
+        return (self.distance_gun_to_vert_plates, self.distance_vert_to_horiz_plates,
+                self.distance_plates_to_screen, self.plate_separation,
+                tuple(sorted(self.colors.items())))
+
+    def invalidate_static_layers(self):
+        """Drop cached static layers (call after changing geometry or colors)"""
+        self._static_layers.clear()
+
+    def _get_static_layer(self, name, area, draw_static, *extra_key):
+        """
+        Pre-rendered static layer for `area`, rebuilt only when the layout,
+        geometry or extra_key change. draw_static draws in layer-local coordinates.
+        """
+        key = (tuple(area), self._geometry_key()) + extra_key
+        cached = self._static_layers.get(name)
+        if cached is None or cached[0] != key:
+            layer = pygame.Surface(area.size)
+            draw_static(layer, pygame.Rect((0, 0), area.size))
+            cached = (key, layer)
+            self._static_layers[name] = cached
+        return cached[1]
+
+    def _lateral_layout(self, view_rect):
+        """Plate positions for the lateral view inside view_rect"""
+        # CORREGIDO: Placas de deflexión vertical en la posición física correcta
+        total_length = 0.23  # 23 cm total (5+5+3+15 cm)
+        tube_start_x = view_rect.x + 30
+        
+        plate_start_x = tube_start_x + int((self.distance_gun_to_vert_plates / total_length) * 280)
+        plate_end_x = plate_start_x + int((0.05 / total_length) * 280)  # 5 cm de longitud de placa
+        
+        return {
+            'plate_start_x': plate_start_x,
+            'plate_end_x': plate_end_x,
+            'plate_y_top': view_rect.y + 70,
+            'plate_y_bottom': view_rect.y + 150,
+        }
+
+    def _draw_lateral_static(self, surface, view_rect):
+        """Background, title, tube and plates of the lateral view"""
         pygame.draw.rect(surface, self.colors['background'], view_rect)
         pygame.draw.rect(surface, self.colors['border'], view_rect, 2)
         
         # Título
-        title = self.title_font.render("Vista Lateral", True, self.colors['text'])
+        title = render_text(self.title_font, "Vista Lateral", self.colors['text'])
         surface.blit(title, (view_rect.x + 10, view_rect.y + 5))
         
         # Dibujar el tubo del CRT
         tube_rect = pygame.Rect(view_rect.x + 30, view_rect.y + 80, 280, 60)
         pygame.draw.rect(surface, self.colors['crt_body'], tube_rect, 2)
         
-        # CORREGIDO: Placas de deflexión vertical en la posición física correcta
-        total_length = 0.23  # 23 cm total (5+5+3+15 cm)
-        tube_start_x = view_rect.x + 30
-        
-        plate_start_x = tube_start_x + int((self.distance_gun_to_vert_plates / total_length) * 280)
-        plate_end_x = plate_start_x + int((0.05 / total_length) * 280)  # 5 cm de longitud de placa
-        
-        plate_y_top = view_rect.y + 70
-        plate_y_bottom = view_rect.y + 150
-        plate_width = plate_end_x - plate_start_x
+        layout = self._lateral_layout(view_rect)
+        plate_width = layout['plate_end_x'] - layout['plate_start_x']
         
         # Placa superior
         pygame.draw.rect(surface, self.colors['plates'], 
-                        (plate_start_x, plate_y_top, plate_width, 8), 0)
+                        (layout['plate_start_x'], layout['plate_y_top'], plate_width, 8), 0)
         # Placa inferior  
         pygame.draw.rect(surface, self.colors['plates'], 
-                        (plate_start_x, plate_y_bottom, plate_width, 8), 0)
+                        (layout['plate_start_x'], layout['plate_y_bottom'], plate_width, 8), 0)
+
+    def draw_lateral_view(self, surface, V_acc=1000, V_vert=0):
+        """Dibuja la vista lateral del CRT (muestra deflexión vertical)"""
+        view_rect = self.lateral_view
+        surface.blit(self._get_static_layer('lateral', view_rect, self._draw_lateral_static), view_rect)
+        
+        layout = self._lateral_layout(view_rect)
+        plate_start_x = layout['plate_start_x']
+        plate_end_x = layout['plate_end_x']
+        plate_y_top = layout['plate_y_top']
+        plate_y_bottom = layout['plate_y_bottom']
         
         # Mostrar polaridad de las placas
         polarity_text = "+" if V_vert > 0 else "-" if V_vert < 0 else "0"
-        surface.blit(self.font.render(polarity_text, True, self.colors['text']), 
+        surface.blit(render_text(self.font, polarity_text, self.colors['text']), 
                     (plate_end_x + 5, plate_y_top - 5))
         
         polarity_text = "-" if V_vert > 0 else "+" if V_vert < 0 else "0"
-        surface.blit(self.font.render(polarity_text, True, self.colors['text']), 
+        surface.blit(render_text(self.font, polarity_text, self.colors['text']), 
                     (plate_end_x + 5, plate_y_bottom + 10))
         
-        # Dibujar trayectoria del electrón (simplificada para esta vista)
-        start_x = view_rect.x + 50
-        start_y = view_rect.y + 110
-        
-        # Calcular deflexión aproximada basada en V_vert
-        deflection = (V_vert / 1000) * 30  # Escalado para visualización
-        
-        # Trayectoria en segmentos que corresponden a las regiones físicas
-        points = [
-            (start_x, start_y),  # Inicio (cañón)
-            (plate_start_x, start_y),  # Antes de las placas verticales
-            (plate_end_x, start_y + deflection * 0.5),  # Durante las placas (deflexión parcial)
-            (view_rect.x + 320, start_y + deflection)  # Después de las placas (deflexión completa)
-        ]
+        # Trayectoria real del electrón (parabólica en las placas, recta después)
+        points = self._trajectory_polyline('lateral', view_rect, layout, V_acc, V_vert,
+                                           db_plates_canyon)
         
         if len(points) > 1:
             pygame.draw.lines(surface, self.colors['electron_trail'], False, points, 2)
@@ -128,30 +217,41 @@ class CRTVisualizer:
         pygame.draw.circle(surface, self.colors['electron'], 
                             (int(electron_pos[0]), int(electron_pos[1])), 4)
 
-    def draw_top_view(self, surface, V_acc=1000, V_horiz=0):
-        """Dibuja la vista superior del CRT (muestra deflexión horizontal)"""
-        view_rect = self.top_view
+    def _top_layout(self, view_rect):
+        """Plate positions for the top view inside view_rect"""
+        # CORREGIDO: Placas de deflexión horizontal en la posición física correcta
+        total_length = 0.23  # 23 cm total
+        tube_start_x = view_rect.x + 30
+        
+        plate_start_pos = self.distance_gun_to_vert_plates + 0.05 + self.distance_vert_to_horiz_plates  # 13 cm
+        plate_start_x = tube_start_x + int((plate_start_pos / total_length) * 280)
+        plate_end_x = plate_start_x + int((0.05 / total_length) * 280)  # 5 cm de longitud de placa
+        
+        return {
+            'plate_start_x': plate_start_x,
+            'plate_end_x': plate_end_x,
+            'plate_y_center': view_rect.y + 110,
+            'plate_height': 25,
+        }
+
+    def _draw_top_static(self, surface, view_rect):
+        """Background, title, tube and plates of the top view"""
         pygame.draw.rect(surface, self.colors['background'], view_rect)
         pygame.draw.rect(surface, self.colors['border'], view_rect, 2)
         
         # Título
-        title = self.title_font.render("Vista Superior", True, self.colors['text'])
+        title = render_text(self.title_font, "Vista Superior", self.colors['text'])
         surface.blit(title, (view_rect.x + 10, view_rect.y + 5))
         
         # Dibujar el tubo del CRT
         tube_rect = pygame.Rect(view_rect.x + 30, view_rect.y + 80, 280, 60)
         pygame.draw.rect(surface, self.colors['crt_body'], tube_rect, 2)
         
-        # CORREGIDO: Placas de deflexión horizontal en la posición física correcta
-        total_length = 0.23  # 23 cm total
-        tube_start_x = view_rect.x + 30
-        
-        plate_start_pos = self.distance_gun_to_vert_plates + 0.05 + self.distance_vert_to_horiz_plates  # 13 cm
-        plate_start_x = tube_start_x + int((plate_start_pos / total_length) * 280)
-        plate_end_x = plate_start_x + int((0.05 / total_length) * 280)  # 5 cm de longitud de placa
-        
-        plate_y_center = view_rect.y + 110
-        plate_height = 25
+        layout = self._top_layout(view_rect)
+        plate_start_x = layout['plate_start_x']
+        plate_end_x = layout['plate_end_x']
+        plate_y_center = layout['plate_y_center']
+        plate_height = layout['plate_height']
         
         # Placa superior (en vista superior se ve como líneas horizontales)
         pygame.draw.rect(surface, self.colors['plates'], 
@@ -161,30 +261,30 @@ class CRTVisualizer:
         pygame.draw.rect(surface, self.colors['plates'], 
                         (plate_start_x, plate_y_center + plate_height//2 - 3, 
                          plate_end_x - plate_start_x, 8), 0)
+
+    def draw_top_view(self, surface, V_acc=1000, V_horiz=0):
+        """Dibuja la vista superior del CRT (muestra deflexión horizontal)"""
+        view_rect = self.top_view
+        surface.blit(self._get_static_layer('top', view_rect, self._draw_top_static), view_rect)
+        
+        layout = self._top_layout(view_rect)
+        plate_start_x = layout['plate_start_x']
+        plate_end_x = layout['plate_end_x']
+        plate_y_center = layout['plate_y_center']
+        plate_height = layout['plate_height']
         
         # Mostrar polaridad de las placas
         polarity_text = "+" if V_horiz > 0 else "-" if V_horiz < 0 else "0"
-        surface.blit(self.font.render(polarity_text, True, self.colors['text']), 
+        surface.blit(render_text(self.font, polarity_text, self.colors['text']), 
                     (plate_end_x + 5, plate_y_center + plate_height//2 - 8))
         
         polarity_text = "-" if V_horiz > 0 else "+" if V_horiz < 0 else "0"
-        surface.blit(self.font.render(polarity_text, True, self.colors['text']), 
+        surface.blit(render_text(self.font, polarity_text, self.colors['text']), 
                     (plate_end_x + 5, plate_y_center - plate_height//2 - 5))
         
-        # Dibujar trayectoria del electrón
-        start_x = view_rect.x + 50
-        start_y = view_rect.y + 110
-        
-        # Calcular deflexión aproximada basada en V_horiz
-        deflection = (V_horiz / 1000) * 25  # Escalado para visualización
-        
-        # Trayectoria en segmentos que corresponden a las regiones físicas
-        points = [
-            (start_x, start_y),  # Inicio (cañón)
-            (plate_start_x, start_y),  # Antes de las placas horizontales
-            (plate_end_x, start_y + deflection * 0.5),  # Durante las placas (deflexión parcial)
-            (view_rect.x + 320, start_y + deflection)  # Después de las placas (deflexión completa)
-        ]
+        # Trayectoria real del electrón (parabólica en las placas, recta después)
+        points = self._trajectory_polyline('top', view_rect, layout, V_acc, V_horiz,
+                                           db_plates_canyon + lon_plates + db_between_plates)
         
         if len(points) > 1:
             pygame.draw.lines(surface, self.colors['electron_trail'], False, points, 2)
@@ -194,109 +294,252 @@ class CRTVisualizer:
         pygame.draw.circle(surface, self.colors['electron'], 
                             (int(electron_pos[0]), int(electron_pos[1])), 4)
 
-    def draw_screen_view(self, surface, persistence_time=1.0):
-        """FIXED: Enhanced screen view with better point visibility"""
-        view_rect = self.screen_view
+    def _trajectory_polyline(self, view, view_rect, layout, V_acc, plates_voltage, plates_depth):
+        """
+        Electron path for a side view, in screen coordinates, from the calculos engine.
+        Cached per view geometry and quantized (V_acc, plates_voltage).
+        """
+        step = TRAJECTORY_VOLTAGE_STEP
+        V_acc = round(V_acc / step) * step
+        plates_voltage = round(plates_voltage / step) * step
+        key = (view, tuple(view_rect), V_acc, plates_voltage)
+        
+        points = self._trajectory_cache.get(key)
+        if points is not None:
+            self._trajectory_cache.move_to_end(key)
+            return points
+        
+        # Dense samples up to the screen, plus the exact region boundaries
+        voltages = (plates_voltage, 0.0) if view == 'lateral' else (0.0, plates_voltage)
+        trajectory = compile_trajectory(V_acc, *voltages)
+        times = np.union1d(np.linspace(0.0, trajectory.breakpoints[-1], TRAJECTORY_SAMPLES),
+                           trajectory.breakpoints)
+        depth, lateral, superior = trajectory.evaluate(times)
+        deflection = lateral if view == 'lateral' else superior
+        
+        # Depth: gun and plates on the tube drawing, the drift after the plates compressed
+        # so that the screen lands at the right end of the view
+        screen_depth = depth[-1]
+        x = np.interp(depth,
+                      (0.0, plates_depth, plates_depth + lon_plates, screen_depth),
+                      (view_rect.x + 50, layout['plate_start_x'], layout['plate_end_x'], view_rect.x + 320))
+        
+        # Transverse deflection, clamped to the view
+        center_y = view_rect.y + 110
+        half_height = min(center_y - view_rect.y - 30, view_rect.bottom - 5 - center_y)
+        y = np.clip(center_y + deflection / TRAJECTORY_MAX_DEFLECTION * half_height,
+                    center_y - half_height, center_y + half_height)
+        
+        points = tuple(zip(x.tolist(), y.tolist()))
+        self._trajectory_cache[key] = points
+        if len(self._trajectory_cache) > TRAJECTORY_CACHE_SIZE:
+            self._trajectory_cache.popitem(last=False)
+        return points
+
+    def _screen_title(self):
+        return f"Pantalla del CRT ({self.current_mode.upper()})"
+
+    def _screen_area(self):
+        """Screen view plus the title strip above it"""
+        title_width = self.title_font.size(self._screen_title())[0]
+        return pygame.Rect(self.screen_view.x, self.screen_view.y - 25,
+                           max(self.screen_view.width, title_width), self.screen_view.height + 25)
+
+    def _draw_screen_static(self, surface, area):
+        """Title and black CRT screen, drawn on the canvas color"""
+        surface.fill(self.colors['canvas'])
+        view_rect = pygame.Rect(0, area.height - self.screen_view.height,
+                                self.screen_view.width, self.screen_view.height)
 
         # Fondo negro de la pantalla del CRT
         pygame.draw.rect(surface, (0, 0, 0), view_rect, border_radius=15)
         pygame.draw.rect(surface, self.colors['border'], view_rect, 3, border_radius=15)
 
         # Título con indicador del modo
-        mode_indicator = f"({self.current_mode.upper()})"
-        title_text = f"Pantalla del CRT {mode_indicator}"
-        title = self.title_font.render(title_text, True, self.colors['text'])
+        title = render_text(self.title_font, self._screen_title(), self.colors['text'])
         surface.blit(title, (view_rect.x, view_rect.y - 25))
 
-        current_time = time.time()
+    def advance_clock(self, sim_time=None):
+        """Move the simulation clock to sim_time (None keeps it); returns the current time"""
+        if sim_time is not None:
+            self.sim_time = sim_time
+        return self.sim_time
+
+    def reset_clock(self, sim_time=0.0):
+        """Restart the clock (e.g. after a reset) without decaying the phosphor"""
+        self.sim_time = sim_time
+        self.last_phosphor_update = sim_time
+
+    def draw_screen_view(self, surface, persistence_time=1.0, sim_time=None):
+        """
+        FIXED: Enhanced screen view with better point visibility.
+        Fades by the simulation time elapsed since the previous draw.
+        """
+        view_rect = self.screen_view
+
+        # Static part (title + black screen) is cached per layout and mode
+        area = self._screen_area()
+        surface.blit(self._get_static_layer('screen', area, self._draw_screen_static, self.current_mode), area)
 
-        # FIXED: Better Lissajous rendering
+        current_time = self.advance_clock(sim_time)
+
+        # Lissajous points live in the phosphor framebuffer: decay + one blit per frame
         if self.current_mode == "lissajous":
-            # Draw all lissajous points (they are persistent)
-            points_drawn = 0
-            for pos, timestamp, brightness in self.lissajous_points:
-                screen_x = view_rect.x + int(pos[0] * view_rect.width)
-                screen_y = view_rect.y + int(pos[1] * view_rect.height)
-                
-                # Ensure coordinates are within screen bounds
-                if (view_rect.x <= screen_x < view_rect.right and 
-                    view_rect.y <= screen_y < view_rect.bottom):
-                    
-                    # Bright yellow points for Lissajous
-                    color_intensity = min(255, int(brightness * 255))
-                    point_color = (color_intensity, color_intensity, 0)  # Yellow
-                    glow_color = (color_intensity // 3, color_intensity // 3, 0)  # Dimmer yellow
-                    
-                    # Draw glow effect first (larger, dimmer)
-                    pygame.draw.circle(surface, glow_color, (screen_x, screen_y), 3)
-                    # Draw bright center point
-                    pygame.draw.circle(surface, point_color, (screen_x, screen_y), 1)
-                    points_drawn += 1
+            phosphor = self._get_lissajous_phosphor()
+            phosphor.decay(current_time - self.last_phosphor_update, persistence_time)
+            self.last_phosphor_update = current_time
+            phosphor.draw(surface, view_rect.topleft)
 
         else:  # Manual mode
-            # Clean up old points based on persistence time
-            self.screen_persistence = deque([
-                (pos, timestamp, brightness) for pos, timestamp, brightness in self.screen_persistence
-                if current_time - timestamp < persistence_time
-            ], maxlen=2000)
-
-            # Draw manual mode points with fade
-            points_drawn = 0
-            for pos, timestamp, brightness in self.screen_persistence:
-                age = current_time - timestamp
-                fade_factor = max(0, 1 - (age / persistence_time))
-                
-                screen_x = view_rect.x + int(pos[0] * view_rect.width)
-                screen_y = view_rect.y + int(pos[1] * view_rect.height)
-                
-                # Ensure coordinates are within screen bounds
-                if (view_rect.x <= screen_x < view_rect.right and 
-                    view_rect.y <= screen_y < view_rect.bottom):
-                    
-                    # Green color with fade
-                    color_intensity = min(255, int(brightness * fade_factor * 255))
-                    if color_intensity > 10:  # Only draw visible points
-                        point_color = (0, color_intensity, 0)  # Green
-                        glow_color = (0, color_intensity // 4, 0)  # Dimmer green
-                        
-                        # Draw glow effect first (larger, dimmer)
-                        pygame.draw.circle(surface, glow_color, (screen_x, screen_y), 4)
-                        # Draw bright center point
-                        pygame.draw.circle(surface, point_color, (screen_x, screen_y), 2)
-                        points_drawn += 1
+            # Points are time-ordered: expiring old ones just moves the ring buffer head
+            self.screen_persistence.expire_before(current_time - persistence_time)
+
+            # Points were deposited when added: one decay + one blit, whatever the count
+            phosphor = self._get_manual_phosphor()
+            phosphor.decay(current_time - self.last_phosphor_update,
+                           persistence_time / MANUAL_FADE_TIME_CONSTANTS)
+            phosphor.draw(surface, view_rect.topleft)
+
+            # Monte Carlo beam spot: accumulated like the Lissajous phosphor
+            if self.beam_enabled:
+                beam = self._get_beam_phosphor()
+                beam.decay(current_time - self.last_phosphor_update, persistence_time)
+                beam.draw(surface, view_rect.topleft)
+            self.last_phosphor_update = current_time
 
         # Show point count and mode info
         info_color = self.colors['lissajous_points'] if self.current_mode == "lissajous" else self.colors['manual_points']
-        count_text = f"Puntos: {len(self.lissajous_points) if self.current_mode == 'lissajous' else len(self.screen_persistence)}"
-        count_surface = pygame.font.SysFont('Arial', 12).render(count_text, True, info_color)
+        count_text = f"Puntos: {self.lissajous_point_count if self.current_mode == 'lissajous' else len(self.screen_persistence)}"
+        if self.beam_enabled:
+            count_text += f"   Haz: {self.beam_transmission:.0%} llega"
+        if self.field is not None:
+            count_text += f"   Campo: {self.field_label}"
+        count_surface = render_text(get_font('Arial', 12), count_text, info_color)
         surface.blit(count_surface, (view_rect.x + 5, view_rect.y + 5))
 
-    def add_screen_point(self, normalized_x, normalized_y, brightness=1.0, mode="manual"):
+    def add_screen_point(self, normalized_x, normalized_y, brightness=1.0, mode="manual", sim_time=None):
         """FIXED: Enhanced point addition with better coordinate handling"""
-        # Clamp coordinates to valid range
-        normalized_x = max(0.0, min(1.0, normalized_x))
-        normalized_y = max(0.0, min(1.0, normalized_y))
+        # Hits past the screen edge (NaN from screen_hit_normalized) leave no trace
+        if not on_screen(normalized_x, normalized_y):
+            return
         
-        current_time = time.time()
-        point_data = ((normalized_x, normalized_y), current_time, brightness)
+        current_time = self.advance_clock(sim_time)
         
         # Add to appropriate collection
         if mode.lower() == "lissajous" or self.current_mode == "lissajous":
-            self.lissajous_points.append(point_data)
+            self._get_lissajous_phosphor().deposit(normalized_x, normalized_y, brightness)
+            self.lissajous_point_count += 1
         else:
-            self.screen_persistence.append(point_data)
+            self.screen_persistence.append(normalized_x, normalized_y, current_time, brightness)
+            self._get_manual_phosphor().deposit(normalized_x, normalized_y, brightness, accumulate=False)
+            self.manual_point_count += 1
+
+    def add_screen_points(self, normalized_x, normalized_y, brightness=1.0, mode="manual", sim_time=None):
+        """Bulk version of add_screen_point for arrays of beam samples"""
+        normalized_x = np.asarray(normalized_x, dtype=float)
+        normalized_y = np.asarray(normalized_y, dtype=float)
+        hit = on_screen(normalized_x, normalized_y)
+        if not hit.all():
+            normalized_x, normalized_y = normalized_x[hit], normalized_y[hit]
+            if np.ndim(brightness):
+                brightness = np.asarray(brightness)[hit]
+
+        if mode.lower() == "lissajous" or self.current_mode == "lissajous":
+            self._get_lissajous_phosphor().deposit(normalized_x, normalized_y, brightness)
+            self.lissajous_point_count += len(normalized_x)
+            return
+
+        self.screen_persistence.extend(normalized_x, normalized_y, self.advance_clock(sim_time), brightness)
+        self._get_manual_phosphor().deposit(normalized_x, normalized_y, brightness, accumulate=False)
+        self.manual_point_count += len(normalized_x)
+
+    def set_beam(self, enabled, seed=None):
+        """Turn the Monte Carlo beam on or off; a seed makes the electron sampling reproducible"""
+        self.beam_enabled = enabled
+        self.beam_rng = np.random.default_rng(seed)
+        self.beam_transmission = 1.0
+        self.beam_phosphor.clear()
+
+    def add_beam_samples(self, V_acc, V_vert, V_horiz, brightness=1.0, mode="manual", electrons=None):
+        """
+        Push a Monte Carlo beam through each plate-voltage sample (one NumPy pass for all
+        samples) and deposit the electrons that reach the screen. Returns the transmission.
+        """
+        V_vert = np.atleast_1d(np.asarray(V_vert, dtype=float))
+        V_horiz = np.atleast_1d(np.asarray(V_horiz, dtype=float))
+        samples = max(V_vert.size, V_horiz.size)
+        if samples == 0:
+            return self.beam_transmission
+        if electrons is None:
+            if self.field is None:
+                single, budget = BEAM_ELECTRONS, BEAM_ELECTRON_BUDGET
+            else:
+                # Fields that are costlier to evaluate than the uniform one say so (relative_cost)
+                cost = getattr(self.field, "relative_cost", 1)
+                single, budget = int(BEAM_ELECTRONS / cost), int(BEAM_INTEGRATED_BUDGET / cost)
+            electrons = single if samples == 1 else max(BEAM_MIN_ELECTRONS, budget // samples)
+
+        hits = monte_carlo_beam(V_acc, V_vert, V_horiz, electrons, BEAM_ENERGY_SPREAD,
+                                BEAM_DIVERGENCE, self.beam_rng, field=self.field)
+        self.beam_transmission = hits.transmission
+
+        lissajous = mode.lower() == "lissajous" or self.current_mode == "lissajous"
+        # Manual mode draws positive V_vert upwards, like calculate_electron_position
+        y_sign = 1.0 if lissajous else -1.0
+
+        # Intercepted electrons and those that miss the screen leave no trace
+        x_normalized = 0.5 + hits.x_displacement[hits.transmitted] / (2 * BEAM_MAX_DEFLECTION)
+        y_normalized = 0.5 + y_sign * hits.y_displacement[hits.transmitted] / (2 * BEAM_MAX_DEFLECTION)
+        hit = on_screen(x_normalized, y_normalized)
+        weight = brightness * BEAM_SPOT_GAIN / electrons
+
+        if lissajous:
+            phosphor = self._get_lissajous_phosphor()
+            self.lissajous_point_count += samples
+        else:
+            phosphor = self._get_beam_phosphor()
+            self.manual_point_count += samples
+        phosphor.deposit(x_normalized[hit], y_normalized[hit], weight)
+        return self.beam_transmission
+
+    def set_field(self, field, label=None):
+        """Integrate `field` (see calculos.integrate_trajectories) instead of the analytic formulas"""
+        self.field = field
+        self.field_label = label
+
+    def _get_manual_phosphor(self):
+        self.manual_phosphor.resize(self.screen_view.width, self.screen_view.height)
+        return self.manual_phosphor
+
+    def _get_beam_phosphor(self):
+        self.beam_phosphor.resize(self.screen_view.width, self.screen_view.height)
+        return self.beam_phosphor
+
+    def _get_lissajous_phosphor(self):
+        """Phosphor framebuffer matching the current screen_view size"""
+        self.lissajous_phosphor.resize(self.screen_view.width, self.screen_view.height)
+        return self.lissajous_phosphor
+
+    def clear_lissajous_points(self):
+        """Clear the Lissajous phosphor framebuffer"""
+        self.lissajous_phosphor.clear()
+        self.lissajous_point_count = 0
 
     def clear_screen_persistence(self):
         """Clear points for current mode"""
         if self.current_mode == "lissajous":
-            self.lissajous_points.clear()
+            self.clear_lissajous_points()
         else:
             self.screen_persistence.clear()
+            self.manual_phosphor.clear()
+            self.beam_phosphor.clear()
 
     def clear_all_points(self):
         """Clear ALL points from both modes"""
         self.screen_persistence.clear()
-        self.lissajous_points.clear()
+        self.manual_phosphor.clear()
+        self.beam_phosphor.clear()
+        self.clear_lissajous_points()
 
     def draw_coordinate_system(self, surface, view_rect, title):
         """Dibuja un sistema de coordenadas para las vistas"""
@@ -326,22 +569,51 @@ class CRTVisualizer:
         ]
         
         for i, text in enumerate(info_texts):
-            rendered_text = self.font.render(text, True, self.colors['text'])
+            rendered_text = render_text(self.font, text, self.colors['text'])
             surface.blit(rendered_text, (info_x, info_y + i * 25))
 
+    def screen_is_animating(self):
+        """True while something on the CRT screen is still fading"""
+        if self.sim_time == self.last_phosphor_update:
+            return False  # Clock stopped (paused): nothing fades
+        if self.current_mode == "lissajous":
+            return bool(self.lissajous_phosphor.intensity.max() * 255 >= 1)
+        if self.beam_enabled and self.beam_phosphor.intensity.max() * 255 >= 1:
+            return True
+        return bool(self.manual_phosphor.intensity.max() * 255 >= 1)
+
     def draw_all_views(self, surface, V_acc=1000, V_vert=0, V_horiz=0, 
-                        persistence_time=1.0, mode_text="Manual"):
-        """FIXED: Main drawing function with proper mode handling"""
+                        persistence_time=1.0, mode_text="Manual", damage=None, sim_time=None):
+        """
+        FIXED: Main drawing function with proper mode handling.
+        With a DamageTracker, views whose state did not change are skipped.
+        sim_time is the simulation clock that drives the phosphor fade.
+        """
         # Update mode
         self.set_mode(mode_text)
+        self.advance_clock(sim_time)
+        full_redraw = damage is None or damage.full_redraw
         
         # Clear background
-        surface.fill((255, 255, 255))
+        if full_redraw:
+            surface.fill(self.colors['canvas'])
         
         # Draw all three views
-        self.draw_lateral_view(surface, V_acc, V_vert)
-        self.draw_top_view(surface, V_acc, V_horiz)
-        self.draw_screen_view(surface, persistence_time)
+        if damage is None or damage.needs_redraw('lateral_view', self.lateral_view, (V_acc, V_vert)):
+            self.draw_lateral_view(surface, V_acc, V_vert)
+        if damage is None or damage.needs_redraw('top_view', self.top_view, (V_acc, V_horiz)):
+            self.draw_top_view(surface, V_acc, V_horiz)
+        
+        screen_area = self._screen_area()
+        if damage is None or self._screen_needs_redraw(damage, screen_area):
+            if not full_redraw:
+                surface.fill(self.colors['canvas'], screen_area)
+            with self.profiler.stage('draw_screen_view'):
+                self.draw_screen_view(surface, persistence_time)
+        
+        # Info panel and instructions sit under the control panel: only on full redraws
+        if not full_redraw:
+            return
         
         # Info panel
         self.draw_info_panel(surface, V_acc, V_vert, V_horiz, mode_text)
@@ -356,9 +628,17 @@ class CRTVisualizer:
         ]
         
         for i, instruction in enumerate(instructions):
-            text = self.font.render(instruction, True, self.colors['text'])
+            text = render_text(self.font, instruction, self.colors['text'])
             surface.blit(text, (50, 450 + i * 20))
 
+    def _screen_needs_redraw(self, damage, screen_area):
+        """The screen changes every frame while points fade, otherwise only on new points"""
+        if self.screen_is_animating():
+            damage.mark(screen_area)
+            return True
+        signature = (self.current_mode, self.lissajous_point_count, self.manual_point_count)
+        return damage.needs_redraw('screen_view', screen_area, signature)
+
     def calculate_electron_position(self, V_acc, V_vert, V_horiz, t=0):
         """MEJORADO: Cálculo de posición que responde correctamente a voltajes"""
         try:
@@ -397,13 +677,28 @@ class CRTVisualizer:
                 x_normalized = 0.5 + (superior_pos[1] / (2 * max_deflection_x))
                 y_normalized = 0.5 + (lateral_pos[1] / (2 * max_deflection_y))
                 
-                # Clamp to screen bounds
-                x_normalized = max(0.0, min(1.0, x_normalized))
-                y_normalized = max(0.0, min(1.0, y_normalized))
+                # Past the screen edge the electron misses, as in screen_hit_normalized
+                if not on_screen(x_normalized, y_normalized):
+                    return math.nan, math.nan
                 
                 return x_normalized, y_normalized
             
         except Exception as e:
             # Fallback to center if calculation fails
             print(f"Position calculation error: {e}")
-            return 0.5, 0.5
\ No newline at end of file
+            return 0.5, 0.5
+
+    def calculate_electron_positions(self, V_acc, V_vert, V_horiz):
+        """Vectorized screen positions for arrays of plate voltages"""
+        V_vert = np.asarray(V_vert, dtype=float)
+        V_horiz = np.asarray(V_horiz, dtype=float)
+
+        if self.current_mode == "manual":
+            # Same direct mapping as calculate_electron_position
+            max_voltage = 1000.0
+            x_normalized = np.clip(0.5 + V_horiz / (2 * max_voltage), 0.0, 1.0)
+            y_normalized = np.clip(0.5 - V_vert / (2 * max_voltage), 0.0, 1.0)
+            return x_normalized, y_normalized
+
+        # Lissajous: impact point on the screen from the physics engine
+        return screen_hit_normalized(V_acc, V_vert, V_horiz, max_deflection=0.12, field=self.field)
@@ -0,0 +1,169 @@
+# Generador de formas de onda para las placas a partir de tablas precalculadas.
+#
+# Cada forma es un período muestreado en una tabla (Wavetable); evaluarla en un arreglo
+# de tiempos es una búsqueda con interpolación lineal, sin funciones trigonométricas
+# por muestra. Waveform agrega amplitud, frecuencia, fase y offset de continua:
+#
+#   v = offset + amplitude * tabla(frequency * t + phase / 2π)
+#
+# El seno, la triangular y el diente de sierra empiezan en 0 y suben, así que cambiar
+# entre ellas no desplaza la figura; la cuadrada empieza en +1 (medio período arriba,
+# medio abajo) y el ruido es una tabla aleatoria fija. Wavetable(muestras) usa un
+# período propio. El seno también sale de su tabla (error < 3e-7, ~0.2 mV a 800 V);
+# Waveform(..., exact=True) lo evalúa con np.sin para quien necesite el valor exacto.
+
+import math
+from functools import lru_cache
+import numpy as np
+
+TABLE_SIZE = 4096  # Muestras por período (potencia de 2); error del seno interpolado < 3e-7
+NOISE_SEED = 0     # El ruido es una tabla aleatoria fija: la figura es reproducible
+# Muestras por bloque al evaluar una tabla. Con el arreglo entero, cada temporal
+# (índices, pendientes...) es memoria nueva y sus fallos de página duplicaban el costo
+LOOKUP_BLOCK = 4096
+
+WAVE_SHAPES = ("sine", "square", "triangle", "sawtooth", "noise")
+WAVE_LABELS = {
+    "sine": "seno",
+    "square": "cuadrada",
+    "triangle": "triangular",
+    "sawtooth": "diente de sierra",
+    "noise": "ruido",
+}
+
+class Wavetable:
+    """
+    Un período de una señal, muestreado a intervalos regulares. Llamarla con un arreglo
+    de ciclos (1.0 = un período) interpola linealmente entre muestras; la tabla se
+    repite, así que los ciclos pueden ser cualquier número real.
+    """
+
+    def __init__(self, samples, label="personalizada"):
+        samples = np.array(samples, dtype=float).ravel()  # Copia: la tabla es de solo lectura
+        if samples.size < 2:
+            raise ValueError("Una tabla de onda necesita al menos 2 muestras")
+        if not np.all(np.isfinite(samples)):
+            raise ValueError("La tabla de onda tiene valores no finitos")
+        self.size = samples.size
+        self.label = label
+        # Con un tamaño potencia de 2 el índice se envuelve con una máscara de bits
+        self._mask = self.size - 1 if self.size & (self.size - 1) == 0 else None
+        self.values = samples
+        # Pendiente hacia la muestra siguiente (la última vuelve a la primera)
+        self.slopes = np.roll(samples, -1) - samples
+        self.values.flags.writeable = False
+        self.slopes.flags.writeable = False
+
+    def __call__(self, cycles):
+        cycles = np.asarray(cycles, dtype=float)
+        if cycles.size <= LOOKUP_BLOCK:
+            return self._lookup(cycles)
+        # Por bloques: los temporales son chicos y se reutilizan en caché
+        value = np.empty(cycles.shape)
+        flat_cycles, flat_value = cycles.reshape(-1), value.reshape(-1)
+        for start in range(0, flat_cycles.size, LOOKUP_BLOCK):
+            block = slice(start, start + LOOKUP_BLOCK)
+            flat_value[block] = self._lookup(flat_cycles[block])
+        return value
+
+    def _lookup(self, cycles):
+        position = cycles * self.size
+        base = np.floor(position)
+        position -= base  # Fracción dentro de la celda
+        index = base.astype(np.int64)
+        if self._mask is not None:
+            index &= self._mask
+        else:
+            index %= self.size
+        value = self.values.take(index)
+        slope = self.slopes.take(index)
+        slope *= position
+        value += slope
+        return value
+
+    def __repr__(self):
+        return f"Wavetable({self.label!r}, {self.size} muestras)"
+
+def _shape_samples(shape, size):
+    phase = np.arange(size) / size
+    if shape == "sine":
+        return np.sin(2 * np.pi * phase)
+    if shape == "square":
+        return np.where(phase < 0.5, 1.0, -1.0)
+    if shape == "triangle":
+        return 1.0 - 4.0 * np.abs((phase + 0.25) % 1.0 - 0.5)
+    if shape == "sawtooth":
+        return 2.0 * ((phase + 0.5) % 1.0) - 1.0
+    if shape == "noise":
+        return np.random.default_rng(NOISE_SEED).uniform(-1.0, 1.0, size)
+    raise ValueError(f"Forma de onda desconocida: {shape} (opciones: {', '.join(WAVE_SHAPES)})")
+
+@lru_cache(maxsize=None)
+def _builtin_wavetable(shape, size):
+    return Wavetable(_shape_samples(shape, size), WAVE_LABELS[shape])
+
+def wavetable(shape, size=TABLE_SIZE):
+    """
+    Tabla de una forma de onda: un nombre de WAVE_SHAPES, su índice (como lo guarda
+    el registro de parámetros) o una Wavetable, que se devuelve tal cual.
+    """
+    if isinstance(shape, Wavetable):
+        return shape
+    if isinstance(shape, (int, np.integer)):
+        shape = WAVE_SHAPES[shape]
+    return _builtin_wavetable(shape, size)
+
+def wave_label(shape):
+    """Nombre de la forma para la interfaz."""
+    return wavetable(shape).label
+
+def waveform_signal(time, freq, amplitude, phase, shape="sine", offset=0.0):
+    """Como calculos.sinusoidal_signal, pero con cualquier forma (ver wavetable)."""
+    cycles = np.asarray(time, dtype=float) * freq
+    cycles += phase / (2 * math.pi)
+    value = wavetable(shape)(cycles)
+    value *= amplitude
+    if offset:
+        value += offset
+    return value
+
+class Waveform:
+    """
+    Señal de una placa: forma, amplitud (V), frecuencia (Hz), fase (rad) y offset (V).
+    Con exact=True el seno se calcula con np.sin en lugar de su tabla.
+    """
+
+    def __init__(self, shape="sine", amplitude=1.0, frequency=1.0, phase=0.0, offset=0.0,
+                 exact=False):
+        self.table = wavetable(shape)
+        if exact and self.table is not wavetable("sine"):
+            raise ValueError("exact=True solo se aplica a la forma seno")
+        self.amplitude = float(amplitude)
+        self.frequency = float(frequency)
+        self.phase = float(phase)
+        self.offset = float(offset)
+        self.exact = exact
+
+    @classmethod
+    def from_samples(cls, samples, label="personalizada", **kwargs):
+        """Onda con un período dado por el usuario (cualquier cantidad de muestras)."""
+        return cls(Wavetable(samples, label), **kwargs)
+
+    def __call__(self, time):
+        if self.exact:
+            angle = np.asarray(time, dtype=float) * (2 * math.pi * self.frequency)
+            angle += self.phase
+            return self.offset + self.amplitude * np.sin(angle)
+        return waveform_signal(time, self.frequency, self.amplitude, self.phase,
+                               self.table, self.offset)
+
+    def replace(self, **changes):
+        """Copia con algunos atributos cambiados (shape, amplitude, frequency, phase, offset, exact)."""
+        attributes = {"shape": self.table, "amplitude": self.amplitude, "frequency": self.frequency,
+                      "phase": self.phase, "offset": self.offset, "exact": self.exact}
+        attributes.update(changes)
+        return Waveform(**attributes)
+
+    def __repr__(self):
+        return (f"Waveform({self.table.label}, {self.amplitude:g} V, {self.frequency:g} Hz, "
+                f"fase {self.phase:g} rad, offset {self.offset:g} V)")